@@ -1,6 +1,8 @@
 import streamlit as st
 import os
 
+from stt.warmup import prewarm
+
 # ================================
 # 🔧 CẤU HÌNH TRANG
 # ================================
@@ -48,6 +50,7 @@ page = st.sidebar.radio(
     [
         "Home – Giới thiệu đề tài",
         "Analysis – Phân tích audio & Speech to Text",
+        "Search – Tìm kiếm transcript",
         "Training Info – Thông tin mô hình STT",
     ],
 )
@@ -64,6 +67,10 @@ elif page.startswith("Analysis"):
     from pages.Analysis import show
     show()
 
+elif page.startswith("Search"):
+    from pages.Search import show
+    show()
+
 elif page.startswith("Training Info"):
     # Bạn sẽ tạo file pages/Training_Info.py sau
     from pages.Training_Info import show
@@ -115,3 +122,8 @@ st.markdown(
     ''',
     unsafe_allow_html=True
 )
+
+# ================================
+# 🔥 IMPORT + NẠP SẴN MODEL (chạy nền sau khi trang đã vẽ, một lần / process)
+# ================================
+prewarm()
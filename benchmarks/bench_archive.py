@@ -0,0 +1,71 @@
+"""
+Đo tốc độ đánh chỉ mục và tìm kiếm của stt.archive trên kho transcript giả lập.
+
+Sinh N cuộc họp, mỗi cuộc họp S segment ghép từ các âm tiết tiếng Việt có
+dấu, thêm lần lượt (mỗi cuộc họp một transaction như khi job xong), rồi đo
+độ trễ các truy vấn từ / phrase / tiền tố theo hai cách xếp hạng. Bộ từ vựng
+nhỏ nên mỗi từ khớp rất nhiều segment: trường hợp xấu nhất cho bm25.
+
+Chạy từ thư mục gốc repo:
+    python -m benchmarks.bench_archive --meetings 20000 --segments 200
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from stt.archive import TranscriptArchive
+
+SYLLABLES = (
+    "ngân sách quý một hai ba dự án cuộc họp báo cáo kế hoạch tiến độ đường sắt "
+    "Đà Nẵng Hà Nội thành phố khách hàng hợp đồng nhân sự tuyển dụng doanh thu "
+    "chi phí sản phẩm thị trường phát triển công nghệ hệ thống dữ liệu bảo mật "
+    "đào tạo đánh giá thống nhất phương án triển khai tuần sau tháng này năm nay"
+).split()
+
+QUERIES = ('"ngân sách"', "đường sắt", "đà nẵng", '"kế hoạch triển khai"', "tuyển*", "bảo mật")
+
+
+def fake_meeting(rng: random.Random, segments: int):
+    t = 0.0
+    out = []
+    for _ in range(segments):
+        dur = rng.uniform(2, 8)
+        words = rng.choices(SYLLABLES, k=rng.randint(8, 25))
+        out.append({"start": t, "end": t + dur, "text": " ".join(words),
+                    "speaker": f"S{rng.randint(1, 4)}"})
+        t += dur + rng.uniform(0, 1)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--meetings", type=int, default=2000)
+    parser.add_argument("--segments", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as folder:
+        archive = TranscriptArchive(os.path.join(folder, "archive.sqlite"))
+
+        t0 = time.perf_counter()
+        for i in range(args.meetings):
+            archive.add(f"m{i}", fake_meeting(rng, args.segments), title=f"Cuộc họp {i}")
+        elapsed = time.perf_counter() - t0
+        print(f"add: {args.meetings} cuộc họp, {elapsed:.1f}s "
+              f"({elapsed / args.meetings * 1000:.2f} ms / cuộc họp) | {archive.stats()}")
+
+        print(f"{'query':>24} {'order':>10} {'hits':>6} {'ms (top 50)':>12}")
+        for query in QUERIES:
+            for order in ("recent", "relevance"):
+                t0 = time.perf_counter()
+                for _ in range(args.repeat):
+                    hits = archive.search(query, limit=50, order=order)
+                ms = (time.perf_counter() - t0) / args.repeat * 1000
+                print(f"{query:>24} {order:>10} {len(hits):>6} {ms:12.2f}")
+
+
+if __name__ == "__main__":
+    main()
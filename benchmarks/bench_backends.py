@@ -0,0 +1,63 @@
+"""
+So sánh các backend inference CPU: thời gian load, real-time factor (RTF)
+và WER so với output của backend fp32 (kiểm tra tương đương độ chính xác).
+
+Chạy từ thư mục gốc repo:
+    python -m benchmarks.bench_backends --audio demo.mp3 --model base --language vi
+"""
+import argparse
+import tempfile
+import time
+
+from benchmarks.common import wer
+from stt.audio import normalize_audio_to_wav, chunk_signal
+from stt.backends import BACKENDS, build_model
+from stt.engine import transcribe_chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--audio", default="demo.mp3")
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--language", default="vi")
+    parser.add_argument("--chunk-seconds", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:  # audio.f32 / audio.wav chuẩn hoá, xoá khi xong
+        _, sr, y = normalize_audio_to_wav(args.audio, out_dir=folder)
+        duration = len(y) / sr
+        chunks = [y[s0:s1] for s0, s1 in chunk_signal(y, sr, args.chunk_seconds)]
+        print(f"{args.audio}: {duration:.1f}s, {len(chunks)} chunk, model {args.model}")
+
+        # fp32 luôn chạy đầu tiên để làm transcript tham chiếu
+        backends = ["fp32"] + [b for b in args.backends if b != "fp32"]
+        reference = None
+
+        print(f"{'backend':<10} {'load (s)':>9} {'decode (s)':>11} {'RTF':>7} {'WER vs fp32':>12}")
+        for backend in backends:
+            t0 = time.perf_counter()
+            model = build_model(args.model, backend, args.threads)
+            load_time = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            results = transcribe_chunks(
+                model, chunks, language=args.language, batch_size=args.batch_size
+            )
+            elapsed = time.perf_counter() - t0
+
+            text = " ".join(r["text"] for r in results)
+            if reference is None:
+                reference = text
+
+            print(
+                f"{backend:<10} {load_time:9.2f} {elapsed:11.2f} "
+                f"{elapsed / duration:7.3f} {wer(reference, text):12.2%}"
+            )
+            del model
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark overhead chuẩn bị chunk trước khi vào model (không tính decode).
+
+  before: ghi WAV PCM16 tạm -> whisper.load_audio (ffmpeg subprocess)
+  after : slice view của y đã chuẩn hoá
+
+Chạy từ thư mục gốc repo:
+    python -m benchmarks.bench_chunk_io --audio demo.mp3 --chunk-seconds 30
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+import whisper
+
+from stt.audio import normalize_audio_to_wav, chunk_signal
+from stt.engine import _as_audio
+
+
+def chunk_via_temp_wav(chunk_y: np.ndarray, sr: int) -> np.ndarray:
+    tmp_wav = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
+    tmp_wav.close()
+    try:
+        sf.write(tmp_wav.name, chunk_y, sr, subtype="PCM_16")
+        return whisper.load_audio(tmp_wav.name)
+    finally:
+        os.remove(tmp_wav.name)
+
+
+def chunk_via_view(chunk_y: np.ndarray, sr: int) -> np.ndarray:
+    return _as_audio(chunk_y)
+
+
+def measure(fn, y, sr, ranges, repeat):
+    times = []
+    for _ in range(repeat):
+        for s0, s1 in ranges:
+            t0 = time.perf_counter()
+            fn(y[s0:s1], sr)
+            times.append(time.perf_counter() - t0)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--audio", default="demo.mp3")
+    parser.add_argument("--chunk-seconds", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:  # audio.f32 / audio.wav chuẩn hoá, xoá khi xong
+        _, sr, y = normalize_audio_to_wav(args.audio, out_dir=folder)
+        ranges = chunk_signal(y, sr, args.chunk_seconds)
+        print(f"{args.audio}: {len(y) / sr:.1f}s, {len(ranges)} chunk x {args.chunk_seconds}s")
+
+        view = _as_audio(y[ranges[0][0]:ranges[0][1]])
+        print(f"zero-copy view: {np.shares_memory(view, y)}")
+
+        for name, fn in [("before (temp WAV + ffmpeg)", chunk_via_temp_wav),
+                         ("after  (numpy view)", chunk_via_view)]:
+            times = measure(fn, y, sr, ranges, args.repeat)
+            print(
+                f"{name}: mean {statistics.mean(times) * 1e3:8.3f} ms/chunk | "
+                f"median {statistics.median(times) * 1e3:8.3f} ms | "
+                f"max {max(times) * 1e3:8.3f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
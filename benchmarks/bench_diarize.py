@@ -0,0 +1,48 @@
+"""
+Đo thời gian diarization theo độ dài bản ghi (kiểm tra chi phí tuyến tính).
+
+Audio được lặp lại tới từng độ dài cần đo; in thời gian tính log-mel, thời
+gian embedding + phân cụm, số cửa sổ và số người nói ước lượng.
+
+Chạy từ thư mục gốc repo:
+    python -m benchmarks.bench_diarize --audio demo.mp3 --hours 0.5 1 2 3
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from stt.audio import normalize_audio_to_wav
+from stt.diarize import diarize
+from stt.features import LogMel
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--audio", default="demo.mp3")
+    parser.add_argument("--hours", nargs="+", type=float, default=[0.5, 1, 2, 3])
+    parser.add_argument("--speakers", type=int, default=None)
+    args = parser.parse_args()
+
+    # audio chuẩn hoá + log-mel đều nằm trong thư mục tạm, xoá khi đo xong
+    with tempfile.TemporaryDirectory() as cache_dir:
+        _, sr, y = normalize_audio_to_wav(args.audio, out_dir=cache_dir)
+        print(f"{'hours':>6} {'log-mel s':>10} {'diarize s':>10} {'turns':>7} {'speakers':>9}")
+
+        for hours in args.hours:
+            n = int(hours * 3600 * sr)
+            signal = np.resize(np.asarray(y, dtype=np.float32), n)
+
+            t0 = time.perf_counter()
+            features = LogMel.compute(signal, cache_dir=cache_dir)
+            t1 = time.perf_counter()
+            turns = diarize(signal, sr, num_speakers=args.speakers, features=features)
+            t2 = time.perf_counter()
+
+            speakers = len({t["speaker"] for t in turns})
+            print(f"{hours:6.1f} {t1 - t0:10.2f} {t2 - t1:10.2f} {len(turns):7d} {speakers:9d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Đo thời gian import lạnh (cold start) của các trang và module stt.
+
+Mỗi lần đo chạy một interpreter mới: `python -X importtime -c "import <module>"`,
+ghi thời gian import, các thư viện nặng bị kéo theo và những module
+tốn thời gian nhất (cumulative). Kết quả có thể ghi ra JSON để so sánh.
+
+Chạy từ thư mục gốc repo:
+    python -m benchmarks.bench_import
+    python -m benchmarks.bench_import --modules pages.Analysis --repeat 5 --output import.json
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+
+DEFAULT_MODULES = [
+    "pages.Home",
+    "pages.Analysis",
+    "pages.Analysis_VN",
+    "pages.Training_Info",
+    "stt.jobs",
+    "stt.engine",
+]
+HEAVY = ("torch", "whisper", "librosa", "matplotlib", "scipy", "numba")
+
+CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t0
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{"seconds": elapsed, "heavy": heavy}}))
+"""
+
+
+def parse_importtime(stderr: str, top: int):
+    """-X importtime: 'import time: self [us] | cumulative | imported package'"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) == 3:
+            rows.append((int(parts[1]), parts[2].strip()))
+    rows.sort(reverse=True)
+    return [{"module": name, "cumulative_ms": round(us / 1000, 1)} for us, name in rows[:top]]
+
+
+def measure(module: str, top: int):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD.format(module=module, heavy=HEAVY)],
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} lỗi:\n{proc.stderr[-2000:]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["slowest"] = parse_importtime(proc.stderr, top)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    report = []
+    print(f"{'module':<22} {'median (s)':>10} {'min (s)':>8}  thư viện nặng bị import")
+    for module in args.modules:
+        runs = [measure(module, args.top) for _ in range(args.repeat)]
+        seconds = [r["seconds"] for r in runs]
+        entry = {
+            "module": module,
+            "median_s": round(statistics.median(seconds), 3),
+            "min_s": round(min(seconds), 3),
+            "heavy": runs[-1]["heavy"],
+            "slowest": runs[-1]["slowest"],
+        }
+        report.append(entry)
+        print(f"{module:<22} {entry['median_s']:10.3f} {entry['min_s']:8.3f}  "
+              f"{', '.join(entry['heavy']) or '-'}")
+        for row in entry["slowest"]:
+            print(f"{'':<24}{row['cumulative_ms']:8.1f} ms  {row['module']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "results": report}, f, indent=2)
+        print(f"Đã ghi {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Tìm cách chia workers x torch threads tốt nhất cho số core hiện có.
+
+Mỗi cấu hình (workers, threads) với workers * threads <= số core được chạy
+trên cùng một audio; in thời gian, real-time factor (RTF) và cấu hình nhanh nhất.
+
+Chạy từ thư mục gốc repo:
+    python -m benchmarks.bench_parallel --audio demo.mp3 --model base
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import torch
+import whisper
+
+from stt.audio import normalize_audio_to_wav, chunk_signal
+from stt.engine import transcribe_chunks
+from stt.parallel import ParallelTranscriber
+
+
+def candidate_splits(cores: int):
+    splits = []
+    for threads in range(1, cores + 1):
+        workers = cores // threads
+        if workers >= 1 and (workers, threads) not in splits:
+            splits.append((workers, threads))
+    return splits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--audio", default="demo.mp3")
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--chunk-seconds", type=int, default=15)
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--language", default="vi")
+    parser.add_argument("--cores", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:  # audio.f32 / audio.wav chuẩn hoá, xoá khi xong
+        _, sr, y = normalize_audio_to_wav(args.audio, out_dir=folder)
+        duration = len(y) / sr
+        chunks = [y[s0:s1] for s0, s1 in chunk_signal(y, sr, args.chunk_seconds)]
+        print(f"{args.audio}: {duration:.1f}s, {len(chunks)} chunk, {args.cores} core")
+
+        # baseline: một process dùng toàn bộ core cho intra-op threads
+        torch.set_num_threads(args.cores)
+        model = whisper.load_model(args.model)
+        t0 = time.perf_counter()
+        transcribe_chunks(model, chunks, language=args.language, batch_size=args.batch_size)
+        elapsed = time.perf_counter() - t0
+        print(f"{'sequential':>12} 1 x {args.cores:<3} {elapsed:8.2f}s  RTF {elapsed / duration:.3f}")
+        del model
+
+        best = ("sequential", elapsed)
+        for workers, threads in candidate_splits(args.cores):
+            transcriber = ParallelTranscriber(args.model, workers, threads)
+            try:
+                t0 = time.perf_counter()
+                transcriber.transcribe(chunks, language=args.language, batch_size=args.batch_size)
+                elapsed = time.perf_counter() - t0
+            finally:
+                transcriber.shutdown()
+
+            label = f"{workers} x {threads}"
+            print(f"{'parallel':>12} {label:<7} {elapsed:8.2f}s  RTF {elapsed / duration:.3f}")
+            if elapsed < best[1]:
+                best = (label, elapsed)
+
+        print(f"best: {best[0]} ({best[1]:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+So sánh throughput khi nhiều người dùng cùng nhận dạng trên một model.
+
+N session chạy đồng thời (mỗi session một thread, cùng audio):
+  - direct:    mỗi session tự gọi transcribe_chunks, chỉ tuần tự hoá bằng decode_lock
+  - scheduler: mọi cửa sổ đi qua một InferenceScheduler (micro-batch xoay vòng)
+In tổng thời gian, throughput (giây audio / giây) và độ trễ tới khi xong của từng session.
+
+Chạy từ thư mục gốc repo:
+    python -m benchmarks.bench_scheduler --audio demo.mp3 --model base --sessions 1 2 4 8
+"""
+import argparse
+import threading
+import tempfile
+import time
+
+from stt.audio import normalize_audio_to_wav, chunk_signal
+from stt.backends import build_model
+from stt.engine import DEFAULT_BATCH_SIZE, transcribe_chunks
+from stt.scheduler import InferenceScheduler
+
+
+def run_sessions(n: int, fn):
+    """Chạy fn(i) trên n thread cùng lúc, trả về (tổng thời gian, thời gian xong của từng session)"""
+    finished = [0.0] * n
+    t0 = time.perf_counter()
+
+    def worker(i):
+        fn(i)
+        finished[i] = time.perf_counter() - t0
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - t0, finished
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--audio", default="demo.mp3")
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--chunk-seconds", type=int, default=30)
+    parser.add_argument("--language", default="vi")
+    parser.add_argument("--sessions", nargs="+", type=int, default=[1, 2, 4, 8])
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=int, default=30)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:  # audio.f32 / audio.wav chuẩn hoá, xoá khi xong
+        _, sr, y = normalize_audio_to_wav(args.audio, out_dir=folder)
+        duration = len(y) / sr
+        chunks = [y[s0:s1] for s0, s1 in chunk_signal(y, sr, args.chunk_seconds)]
+        model = build_model(args.model)
+        print(f"{args.audio}: {duration:.1f}s, {len(chunks)} chunk / session")
+        print(f"{'sessions':>8} {'mode':>10} {'total s':>8} {'audio/s':>8} {'p50 done':>9} {'max done':>9}")
+
+        scheduler = InferenceScheduler(model, args.batch_size, args.max_wait_ms / 1000)
+        try:
+            for n in args.sessions:
+                modes = {
+                    "direct": lambda i: transcribe_chunks(
+                        model, chunks, language=args.language, batch_size=args.batch_size
+                    ),
+                    "scheduler": lambda i: scheduler.transcribe(
+                        chunks, session=i, language=args.language
+                    ),
+                }
+                for mode, fn in modes.items():
+                    total, finished = run_sessions(n, fn)
+                    finished.sort()
+                    print(f"{n:>8} {mode:>10} {total:8.2f} {n * duration / total:8.1f} "
+                          f"{finished[len(finished) // 2]:9.2f} {finished[-1]:9.2f}")
+        finally:
+            scheduler.close()
+        print(f"scheduler: {scheduler.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Benchmark toàn bộ pipeline: load model, chuẩn hoá, độ trễ từng chunk, RTF, peak RSS.
+
+Mỗi cấu hình (model size x chunk_seconds) chạy trong một process riêng để
+thời gian load là cold-load và peak RSS không bị lẫn giữa các cấu hình.
+Audio dài tổng hợp bằng cách lặp demo.mp3 tới --duration giây.
+Kết quả ghi ra JSON; --compare so với một lần chạy trước và báo regression.
+
+Chạy từ thư mục gốc repo:
+    python -m benchmarks.bench_suite --models tiny base --chunk-seconds 10 20 30 \\
+        --duration 600 --output bench.json
+    python -m benchmarks.bench_suite ... --output new.json --compare bench.json
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import soundfile as sf
+
+from stt.audio import SAMPLE_RATE, normalize_audio_to_wav, chunk_signal
+
+
+# chỉ số dùng khi so sánh hai lần chạy: tăng quá ngưỡng = regression
+COMPARED = ("load_s", "normalize_s", "rtf", "latency_p90_ms", "peak_rss_mb")
+# chênh lệch tuyệt đối nhỏ hơn mức này coi là nhiễu đo
+NOISE_FLOOR = {"load_s": 0.1, "normalize_s": 0.1, "latency_p90_ms": 20, "peak_rss_mb": 20}
+
+
+# ==========================
+# 🎧 Audio tổng hợp
+# ==========================
+def synthesize(audio_path: str, duration: float, out_path: str) -> float:
+    """Lặp audio gốc tới đủ `duration` giây, ghi WAV PCM16 16kHz"""
+    with tempfile.TemporaryDirectory() as folder:  # audio.f32 / audio.wav trung gian
+        _, sr, y = normalize_audio_to_wav(audio_path, SAMPLE_RATE, out_dir=folder)
+        if duration and duration > len(y) / sr:
+            y = np.resize(np.asarray(y), int(duration * sr))
+        sf.write(out_path, y, sr, subtype="PCM_16")
+        return len(y) / sr
+
+
+def percentile_ms(values, q):
+    return round(float(np.percentile(values, q)) * 1000, 1) if values else 0.0
+
+
+# ==========================
+# 🧪 Một cấu hình (chạy trong process con)
+# ==========================
+def run_config(audio_path, model_size, chunk_seconds, backend, language, batch_size, threads):
+    from stt.backends import build_model
+    from stt.engine import iter_transcribe_chunks
+
+    with tempfile.TemporaryDirectory() as folder:  # xoá audio chuẩn hoá khi đo xong
+        t0 = time.perf_counter()
+        _, sr, y = normalize_audio_to_wav(audio_path, SAMPLE_RATE, out_dir=folder)
+        normalize_s = time.perf_counter() - t0
+        duration = len(y) / sr
+
+        t0 = time.perf_counter()
+        model = build_model(model_size, backend, threads)
+        load_s = time.perf_counter() - t0
+
+        chunks = [y[s0:s1] for s0, s1 in chunk_signal(y, sr, chunk_seconds)]
+        latencies = []
+        t0 = last = time.perf_counter()
+        for _ in iter_transcribe_chunks(model, chunks, language=language, batch_size=batch_size):
+            now = time.perf_counter()
+            latencies.append(now - last)
+            last = now
+        decode_s = time.perf_counter() - t0
+        del chunks, y
+
+    # Linux: ru_maxrss tính bằng KB, macOS: byte
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_mb = rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+    return {
+        "model": model_size,
+        "backend": backend,
+        "chunk_seconds": chunk_seconds,
+        "batch_size": batch_size,
+        "audio_seconds": round(duration, 2),
+        "chunks": len(chunks),
+        "normalize_s": round(normalize_s, 3),
+        "load_s": round(load_s, 3),
+        "decode_s": round(decode_s, 3),
+        "rtf": round(decode_s / duration, 4) if duration else 0.0,
+        "throughput_x": round(duration / decode_s, 2) if decode_s else 0.0,
+        "latency_p50_ms": percentile_ms(latencies, 50),
+        "latency_p90_ms": percentile_ms(latencies, 90),
+        "latency_p99_ms": percentile_ms(latencies, 99),
+        "latency_max_ms": percentile_ms(latencies, 100),
+        "peak_rss_mb": round(peak_rss_mb, 1),
+    }
+
+
+# ==========================
+# 📊 So sánh với lần chạy trước
+# ==========================
+def compare(results, baseline_path: str, threshold: float) -> int:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {
+            (r["model"], r.get("backend", "fp32"), r["chunk_seconds"]): r
+            for r in json.load(f)["results"]
+        }
+
+    regressions = 0
+    print(f"\nSo với {baseline_path} (ngưỡng {threshold:.0%}):")
+    for r in results:
+        old = baseline.get((r["model"], r["backend"], r["chunk_seconds"]))
+        if old is None:
+            continue
+        cells = []
+        for metric in COMPARED:
+            if not old.get(metric):
+                continue
+            change = r[metric] / old[metric] - 1
+            noisy = abs(r[metric] - old[metric]) < NOISE_FLOOR.get(metric, 0)
+            flag = " !" if change > threshold and not noisy else ""
+            regressions += bool(flag)
+            cells.append(f"{metric} {change:+.1%}{flag}")
+        print(f"  {r['model']:<8} {r['chunk_seconds']:>3}s  " + "  ".join(cells))
+
+    print(f"{regressions} regression" if regressions else "Không có regression")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--audio", default="demo.mp3")
+    parser.add_argument("--duration", type=float, default=600,
+                        help="Độ dài audio tổng hợp (giây); 0 = dùng nguyên audio")
+    parser.add_argument("--models", nargs="+", default=["tiny", "base"])
+    parser.add_argument("--chunk-seconds", nargs="+", type=int, default=[10, 20, 30])
+    parser.add_argument("--backend", default="fp32")
+    parser.add_argument("--language", default="vi")
+    parser.add_argument("--batch-size", type=int, default=1,
+                        help="1 = độ trễ đo được là độ trễ của từng chunk")
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--output", default="bench.json")
+    parser.add_argument("--compare", default=None, help="JSON của lần chạy trước")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+
+    fd, long_path = tempfile.mkstemp(suffix=".wav")
+    os.close(fd)
+    try:
+        duration = synthesize(args.audio, args.duration, long_path)
+        print(f"{args.audio} -> {duration:.0f}s audio tổng hợp")
+        print(f"{'model':<8} {'chunk':>5} {'load':>7} {'norm':>7} {'RTF':>7} "
+              f"{'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'RSS MB':>8}")
+
+        results = []
+        for model_size in args.models:
+            for chunk_seconds in args.chunk_seconds:
+                # process mới cho mỗi cấu hình: cold load + peak RSS riêng
+                with ProcessPoolExecutor(1, mp_context=mp.get_context("spawn")) as pool:
+                    r = pool.submit(
+                        run_config, long_path, model_size, chunk_seconds, args.backend,
+                        args.language, args.batch_size, args.threads,
+                    ).result()
+                results.append(r)
+                print(f"{model_size:<8} {chunk_seconds:>4}s {r['load_s']:7.2f} "
+                      f"{r['normalize_s']:7.2f} {r['rtf']:7.3f} {r['latency_p50_ms']:8.0f} "
+                      f"{r['latency_p90_ms']:8.0f} {r['latency_p99_ms']:8.0f} {r['peak_rss_mb']:8.0f}")
+    finally:
+        os.remove(long_path)
+
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "audio": args.audio,
+            "audio_seconds": round(duration, 2),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "threads": args.threads,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Đã ghi {args.output}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""Hàm dùng chung cho các script benchmark."""
+import re
+
+import numpy as np
+
+
+def words(text: str):
+    return re.findall(r"\w+", text.lower())
+
+
+def wer(reference: str, hypothesis: str) -> float:
+    """Word error rate = khoảng cách Levenshtein theo từ / số từ của reference"""
+    ref, hyp = words(reference), words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+
+    prev = np.arange(len(hyp) + 1)
+    for i, r in enumerate(ref, start=1):
+        cur = np.empty_like(prev)
+        cur[0] = i
+        for j, h in enumerate(hyp, start=1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (r != h))
+        prev = cur
+    return float(prev[-1]) / len(ref)
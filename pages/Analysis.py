@@ -1,14 +1,24 @@
 import streamlit as st
-import numpy as np
-import tempfile
 import os
+import time
+import uuid
 
-import librosa
-import librosa.display
-import matplotlib.pyplot as plt
-import soundfile as sf
+from stt.archive import TranscriptArchive
+from stt.audio import chunk_signal
+from stt.engine import DEFAULT_BATCH_SIZE
+from stt.cache import TranscriptCache
+from stt.config import BACKEND
+from stt.parallel import default_split
+from stt.jobs import JobManager, ACTIVE
+from stt.exports import FORMATS, MIME_TYPES, render, to_txt
+from stt.vad import vad_chunks, speech_ratio
+from stt.registry import get_registry, MODEL_SIZES
+from stt.storage import get_store, session_upload
+from stt.viz import plot_waveform
+from stt.trace import PROFILERS, Tracer, stage, summarize, to_chrome_trace, to_json
 
-import whisper
+
+JOB_POLL_SECONDS = 1.5
 
 
 # ==========================
@@ -34,52 +44,152 @@ def yellow_box(html: str):
 # ==========================
 # ✅ Load Whisper model (Cloud-safe)
 # ==========================
-@st.cache_resource
-def load_whisper(model_size: str = "base"):
+def load_whisper(model_size: str = "base", backend: str = BACKEND):
     """
     Load Whisper model trực tiếp từ thư viện.
     Phù hợp Streamlit Cloud – không lưu file .pkl
+    Model được giữ trong registry dùng chung (nạp sẵn khi app khởi động,
+    tự bỏ model ít dùng khi vượt giới hạn RAM).
     """
-    return whisper.load_model(model_size)
+    return get_registry().get(model_size, backend)
+
+
+@st.cache_resource
+def get_transcript_cache():
+    """Cache transcript theo chunk, dùng chung cho mọi session"""
+    return TranscriptCache()
+
+
+@st.cache_resource
+def get_archive():
+    """Kho transcript + chỉ mục tìm kiếm, dùng chung với trang Search"""
+    return TranscriptArchive()
+
+
+@st.cache_resource
+def get_job_manager():
+    """Hàng đợi job dùng chung cho mọi session (giới hạn số job đồng thời)"""
+    return JobManager(cache=get_transcript_cache(), archive=get_archive(), store=get_store())
 
 
 # ==========================
-# ✅ Audio utils
+# 🗂️ Job chạy nền (sống sót qua rerun / refresh)
 # ==========================
-def normalize_audio_to_wav(audio_path: str, target_sr: int = 16000):
-    """Load audio -> mono 16kHz WAV PCM16"""
-    y, sr = librosa.load(audio_path, sr=target_sr, mono=True)
+def current_job_id():
+    """Job của session, hoặc từ URL (?job=...) sau khi refresh trình duyệt"""
+    return st.session_state.get("job_id") or st.query_params.get("job")
+
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def live_job_panel(job_id: str):
+    """Poll job mỗi vài giây, chỉ rerun phần này; job xong thì rerun cả trang"""
+    job = get_job_manager().get(job_id)
+    if job is None or job["status"] not in ACTIVE:
+        st.rerun()
+
+    label = "Đang chờ tới lượt..." if job["status"] == "queued" else "Đang xử lý..."
+    st.progress(
+        job["done"] / max(job["total"], 1),
+        text=f"Job `{job_id}` – {label} {job['done']}/{job['total']} đoạn",
+    )
+    st.text(to_txt(job["segments"]))
+
+    if st.button("⏹️ Huỷ job"):
+        get_job_manager().cancel(job_id)
+
+
+def show_job(job_id: str):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        st.warning(f"Không tìm thấy job `{job_id}`.")
+        return
+
+    if job["status"] in ACTIVE:
+        live_job_panel(job_id)
+        return
+
+    if job["status"] == "error":
+        st.error(f"❌ Job `{job_id}` lỗi: {job['error']}")
+        return
+    if job["status"] == "cancelled":
+        st.warning(f"Job `{job_id}` đã bị huỷ ({job['done']}/{job['total']} đoạn).")
+        return
 
-    peak = float(np.max(np.abs(y))) if y.size else 0.0
-    if peak > 0:
-        y = y / peak
+    stats = get_transcript_cache().stats()
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Cache hit", stats["hits"])
+    c2.metric("Cache miss", stats["misses"])
+    c3.metric("Số đoạn trong cache", stats["entries"])
+    c4.metric("Dung lượng cache (MB)", stats["size_mb"])
 
-    out_wav = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
-    out_wav.close()
-    sf.write(out_wav.name, y, target_sr, subtype="PCM_16")
+    detected = list(dict.fromkeys(seg["language"] for seg in job["segments"] if seg["language"]))
+    if job["options"].get("language") is None and detected:
+        st.info(f"🌍 Ngôn ngữ phát hiện: **{', '.join(detected)}**")
 
-    return out_wav.name, target_sr, y
+    speakers = sorted({seg["speaker"] for seg in job["segments"] if seg.get("speaker")})
+    if speakers:
+        st.info(f"👥 Số người nói: **{len(speakers)}** ({', '.join(speakers)})")
 
+    full_text = to_txt(job["segments"])
 
-def chunk_signal(y: np.ndarray, sr: int, chunk_seconds: int):
-    total_samples = len(y)
-    chunk_len = int(chunk_seconds * sr)
+    st.success("✅ Hoàn thành Speech-to-Text")
 
-    if chunk_len <= 0 or total_samples == 0:
-        return [(0, total_samples)]
+    edited_text = st.text_area(
+        "📝 Transcript",
+        value=full_text,
+        height=300,
+    )
+
+    # mọi định dạng lấy từ cùng segment / timestamp từng từ của job, không decode lại
+    result = {
+        "job": job["id"],
+        "duration": job["options"].get("duration"),
+        "language": detected[0] if detected else None,
+        "segments": job["segments"],
+    }
+    for col, fmt in zip(st.columns(len(FORMATS)), FORMATS):
+        col.download_button(
+            f"⬇️ Tải transcript (.{fmt})",
+            # .txt giữ nội dung đã chỉnh sửa trong ô transcript
+            data=edited_text if fmt == "txt" else render(result, fmt),
+            file_name=f"transcript.{fmt}",
+            mime=MIME_TYPES[fmt],
+            key=f"download_{fmt}",
+        )
 
-    ranges = []
-    for start in range(0, total_samples, chunk_len):
-        end = min(start + chunk_len, total_samples)
-        ranges.append((start, end))
+    show_trace(job)
 
-    return ranges
 
+def show_trace(job):
+    """Panel hiệu năng: span của trang (upload, chuẩn hoá, vẽ...) + span của job"""
+    traces = [
+        t for t in (st.session_state.get("page_traces", {}).get(job["id"]), job.get("trace")) if t
+    ]
+    if not traces:
+        return
 
-def format_timestamp(seconds: float) -> str:
-    m = int(seconds // 60)
-    s = int(seconds % 60)
-    return f"{m:02d}:{s:02d}"
+    with st.expander("⏱️ Hiệu năng (trace)"):
+        spans = [s for t in traces for s in t["spans"]]
+        st.dataframe(summarize(spans))
+
+        for t in traces:
+            if t.get("profile"):
+                st.caption(f"Profile – {t['name']}")
+                st.code(t["profile"])
+
+        c1, c2 = st.columns(2)
+        c1.download_button(
+            "⬇️ Trace (.json)",
+            data=to_json(traces),
+            file_name=f"trace_{job['id']}.json",
+            mime="application/json",
+        )
+        c2.download_button(
+            "⬇️ Chrome trace (chrome://tracing)",
+            data=to_chrome_trace(traces),
+            file_name=f"trace_{job['id']}.chrome.json",
+            mime="application/json",
+        )
 
 
 # ==========================
@@ -97,8 +207,9 @@ def show():
         <ul style="margin:10px 0 0 18px;">
             <li>Upload audio (WAV / MP3 / FLAC)</li>
             <li>Chuẩn hoá về <b>mono – 16kHz – WAV</b></li>
-            <li>Speech-to-Text bằng <b>Whisper Base</b></li>
+            <li>Speech-to-Text bằng <b>Whisper (tiny / base / small)</b></li>
             <li>Xử lý audio dài bằng <b>chunking</b></li>
+            <li>Phân biệt <b>người nói</b> trong cuộc họp (tuỳ chọn)</li>
         </ul>
         """
     )
@@ -115,19 +226,29 @@ def show():
 
     if audio_file is None:
         st.info("Vui lòng upload file audio để bắt đầu.")
+        # Sau khi refresh trình duyệt: vẫn hiển thị job đang chạy / đã xong
+        job_id = current_job_id()
+        if job_id:
+            show_job(job_id)
         return
 
-    suffix = "." + audio_file.name.split(".")[-1].lower()
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        tmp.write(audio_file.read())
-        raw_path = tmp.name
+    # spool theo block + hash vào kho audio (một lần mỗi upload, rerun dùng lại khoá);
+    # upload trùng nội dung dùng lại bản đã chuẩn hoá
+    session = st.session_state.setdefault("stt_session", uuid.uuid4().hex)
+    upload_keys = st.session_state.setdefault("upload_keys", {})
+    file_id = getattr(audio_file, "file_id", audio_file.name)
+    upload_start = time.perf_counter()
+    upload_keys[file_id] = session_upload(
+        audio_file, audio_file.name, session, upload_keys.get(file_id)
+    )
+    upload_end = time.perf_counter()
 
     # ==========================
     # Options
     # ==========================
     st.subheader("⚙️ Tuỳ chọn")
 
-    col1, col2 = st.columns(2)
+    col1, col2, col3, col_overlap, col4 = st.columns(5)
 
     with col1:
         lang_mode = st.selectbox(
@@ -135,33 +256,144 @@ def show():
             ["Auto-detect", "Vietnamese (vi)", "English (en)"],
             index=0,
         )
+        recheck_every = st.selectbox(
+            "Nhận diện lại ngôn ngữ mỗi N đoạn",
+            [0, 5, 10, 20],
+            index=0,
+            format_func=lambda n: "Không (khoá một lần)" if n == 0 else str(n),
+            disabled=lang_mode != "Auto-detect",
+        )
 
     with col2:
+        seg_mode = st.selectbox(
+            "Phân đoạn",
+            ["VAD (bỏ khoảng lặng)", "Cố định"],
+            index=0,
+        )
+
+    with col3:
         chunk_seconds = st.selectbox(
-            "Độ dài mỗi đoạn (giây)",
-            [15, 30, 45, 60],
-            index=1,
+            "Độ dài (tối đa) mỗi đoạn (giây)",
+            [10, 15, 20, 30],  # tối đa một cửa sổ 30s của Whisper
+            index=3,
         )
 
+    with col_overlap:
+        overlap_seconds = st.selectbox(
+            "Chồng lấn giữa các đoạn (giây)",
+            [0, 1, 2, 3, 5],
+            index=2,
+            disabled=seg_mode != "Cố định",
+        )
+
+    with col4:
+        batch_size = st.selectbox(
+            "Batch size (số đoạn decode cùng lúc)",
+            [1, 2, 4, 8, 16],
+            index=[1, 2, 4, 8, 16].index(DEFAULT_BATCH_SIZE),
+            help="Áp dụng cho chế độ song song; chế độ tuần tự dùng scheduler chung, "
+                 "tự gộp đoạn của mọi người dùng thành batch",
+        )
+
+    col5, col6, col7, col8 = st.columns(4)
+    default_workers, default_threads = default_split()
+
+    with col5:
+        model_size = st.selectbox(
+            "Model Whisper",
+            MODEL_SIZES,
+            index=MODEL_SIZES.index("base"),
+        )
+
+    with col6:
+        exec_mode = st.selectbox(
+            "Chế độ thực thi",
+            ["Tuần tự (1 process)", "Song song (nhiều process)"],
+            index=0,
+        )
+
+    parallel = exec_mode.startswith("Song song")
+
+    with col7:
+        workers = st.number_input(
+            "Số worker process",
+            min_value=1,
+            max_value=os.cpu_count() or 1,
+            value=default_workers,
+            disabled=not parallel,
+        )
+
+    with col8:
+        threads = st.number_input(
+            "Số torch thread / worker",
+            min_value=1,
+            max_value=os.cpu_count() or 1,
+            value=default_threads,
+            disabled=not parallel,
+        )
+
+    col_diar, col_spk = st.columns(2)
+
+    with col_diar:
+        diarize = st.checkbox(
+            "👥 Phân biệt người nói (diarization)",
+            value=False,
+            help="Chạy trên CPU song song với nhận dạng, gắn nhãn S1, S2... cho từng đoạn",
+        )
+
+    with col_spk:
+        num_speakers = st.selectbox(
+            "Số người nói",
+            [None, 2, 3, 4, 5, 6, 7, 8],
+            format_func=lambda n: "Tự ước lượng" if n is None else str(n),
+            disabled=not diarize,
+        )
+
+    col9, col10 = st.columns(2)
+
+    with col9:
+        trace_on = st.checkbox("🔬 Ghi trace hiệu năng", value=False)
+
+    with col10:
+        profiler = st.selectbox(
+            "Profiler",
+            [None, *PROFILERS],
+            format_func=lambda p: {None: "Không", "cprofile": "cProfile", "torch": "torch.profiler"}[p],
+            disabled=not trace_on,
+        )
+
+    # Tắt trace: tracer = None, stage(...) chỉ là nullcontext
+    tracer = Tracer("page") if trace_on else None
+    if tracer is not None:
+        tracer.add("upload_write", upload_start, upload_end, bytes=audio_file.size)
+
     # ==========================
     # Normalize
     # ==========================
     st.subheader("🧼 Chuẩn hoá audio")
-    with st.spinner("Đang chuẩn hoá audio..."):
-        norm_path, sr, y = normalize_audio_to_wav(raw_path)
+    with st.spinner("Đang chuẩn hoá audio..."), stage(tracer, "normalize"):
+        norm_path, sr, y = get_store().normalized(upload_keys[file_id])
 
-    duration = librosa.get_duration(y=y, sr=sr)
+    duration = len(y) / sr
     st.success(f"Chuẩn hoá xong | Duration: {duration:.2f}s")
 
-    st.audio(open(norm_path, "rb").read())
+    st.audio(norm_path)
 
     # ==========================
     # Visualization
     # ==========================
+    # Envelope min/max theo độ phân giải màn hình, cache theo khoá nội dung trong kho
+    # audio (đã có từ lúc spool upload): rerun không hash lại cả tín hiệu
+    audio_key = upload_keys[file_id]
+
     st.subheader("📈 Waveform")
-    fig, ax = plt.subplots(figsize=(10, 3))
-    librosa.display.waveshow(y, sr=sr, ax=ax)
-    st.pyplot(fig)
+    with stage(tracer, "waveform_plot"):
+        import matplotlib.pyplot as plt  # import muộn: chỉ tốn khi thật sự vẽ
+
+        fig, ax = plt.subplots(figsize=(10, 3))
+        plot_waveform(y, sr, audio_key, ax)
+        st.pyplot(fig)
+        plt.close(fig)
 
     # ==========================
     # Speech-to-Text
@@ -175,55 +407,43 @@ def show():
     elif lang_mode == "English (en)":
         lang_param = "en"
 
-    ranges = chunk_signal(y, sr, int(chunk_seconds))
-    st.write(f"🔹 Số đoạn: **{len(ranges)}**")
-
-    if st.button("▶️ Thực hiện Speech-to-Text"):
-        model = load_whisper("base")
-
-        progress = st.progress(0.0)
-        transcripts = []
-        detected_lang = None
-
-        for i, (s0, s1) in enumerate(ranges, start=1):
-            chunk_y = y[s0:s1]
-
-            tmp_wav = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
-            tmp_wav.close()
-            sf.write(tmp_wav.name, chunk_y, sr, subtype="PCM_16")
-
-            kwargs = {"fp16": False}
-            if lang_param:
-                kwargs["language"] = lang_param
-
-            with st.spinner(f"Đang xử lý đoạn {i}/{len(ranges)}..."):
-                result = model.transcribe(tmp_wav.name, **kwargs)
-
-            if detected_lang is None:
-                detected_lang = result.get("language")
-
-            text = (result.get("text") or "").strip()
-            header = f"[{format_timestamp(s0/sr)} - {format_timestamp(s1/sr)}]"
-            transcripts.append(f"{header} {text}")
-
-            progress.progress(i / len(ranges))
-
-        if lang_mode == "Auto-detect" and detected_lang:
-            st.info(f"🌍 Ngôn ngữ phát hiện: **{detected_lang}**")
-
-        full_text = "\n".join(transcripts)
-
-        st.success("✅ Hoàn thành Speech-to-Text")
-
-        edited_text = st.text_area(
-            "📝 Transcript",
-            value=full_text,
-            height=300,
+    if seg_mode == "Cố định":
+        with stage(tracer, "segmentation", mode="fixed"):
+            ranges = chunk_signal(y, sr, int(chunk_seconds), overlap_seconds)
+        st.write(f"🔹 Số đoạn: **{len(ranges)}**")
+    else:
+        with stage(tracer, "segmentation", mode="vad"):
+            ranges = vad_chunks(y, sr, int(chunk_seconds))
+        st.write(
+            f"🔹 Số đoạn: **{len(ranges)}** | "
+            f"Tỉ lệ có tiếng nói: **{speech_ratio(ranges, len(y)):.0%}**"
         )
 
-        st.download_button(
-            "⬇️ Tải transcript (.txt)",
-            data=edited_text,
-            file_name="transcript.txt",
-            mime="text/plain",
+    if st.button("▶️ Thực hiện Speech-to-Text"):
+        job_id = get_job_manager().submit(
+            y,
+            sr,
+            ranges,
+            model_size=model_size,
+            backend=BACKEND,
+            language=lang_param,
+            recheck_every=int(recheck_every),
+            batch_size=int(batch_size),
+            workers=int(workers) if parallel else 0,
+            threads=int(threads),
+            trace=(profiler or "spans") if trace_on else None,
+            diarize=diarize,
+            num_speakers=num_speakers,
+            title=audio_file.name,
+            audio_hash=audio_key,
+            wav_path=norm_path,
+            audio_key=audio_key,
         )
+        if tracer is not None:
+            st.session_state.setdefault("page_traces", {})[job_id] = tracer.to_dict()
+        st.session_state["job_id"] = job_id
+        st.query_params["job"] = job_id
+
+    job_id = current_job_id()
+    if job_id:
+        show_job(job_id)
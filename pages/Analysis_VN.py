@@ -1,12 +1,18 @@
 import streamlit as st
-import librosa
-import librosa.display
-import matplotlib.pyplot as plt
-import numpy as np
-import tempfile
-import whisper
+import uuid
 import soundfile as sf
 
+from stt.audio import SAMPLE_RATE
+from stt.features import LogMel, mel_chunks
+from stt.registry import MODEL_SIZES
+from stt.scheduler import get_scheduler
+from stt.stitch import stitch
+from stt.storage import get_store, session_upload
+from stt.vad import vad_chunks
+from stt.viz import plot_waveform, plot_mel
+
+CHUNK_SECONDS = 30  # một cửa sổ Whisper
+
 # ==========================
 # 🎯 TRANG ANALYSIS
 # ==========================
@@ -39,17 +45,30 @@ def show():
         st.info("Vui lòng upload file audio để bắt đầu phân tích.")
         return
 
-    # Lưu file tạm
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
-        tmp.write(audio_file.read())
-        audio_path = tmp.name
+    # Spool upload vào kho audio (giữ đúng đuôi file gốc, dedup theo nội dung)
+    session = st.session_state.setdefault("stt_session", uuid.uuid4().hex)
+    upload_keys = st.session_state.setdefault("upload_keys", {})
+    file_id = getattr(audio_file, "file_id", audio_file.name)
+    upload_key = upload_keys[file_id] = session_upload(
+        audio_file, audio_file.name, session, upload_keys.get(file_id)
+    )
+    audio_path = get_store().upload_path(upload_key)
+
+    # matplotlib import muộn: chỉ tốn khi đã có file để phân tích
+    import matplotlib.pyplot as plt
 
     # ==========================
     # 📊 THÔNG TIN AUDIO
     # ==========================
-    y, sr = librosa.load(audio_path, sr=None)
+    # bản chuẩn hoá 16kHz mono nằm trong kho audio (memmap, chuẩn hoá một lần mỗi nội
+    # dung): rerun của Streamlit không giải mã / hash lại file
+    _, _, audio_16k = get_store().normalized(upload_key)
+    try:
+        sr = sf.info(audio_path).samplerate
+    except RuntimeError:  # định dạng libsndfile không đọc được header
+        sr = SAMPLE_RATE
 
-    duration = librosa.get_duration(y=y, sr=sr)
+    duration = len(audio_16k) / SAMPLE_RATE
 
     st.subheader("🔍 Thông tin Audio")
     col1, col2, col3 = st.columns(3)
@@ -64,29 +83,25 @@ def show():
     # ==========================
     st.subheader("📈 Waveform")
 
+    # Envelope min/max + mel thu gọn theo độ phân giải màn hình, cache theo khoá trong kho audio
     fig, ax = plt.subplots(figsize=(10, 3))
-    librosa.display.waveshow(y, sr=sr, ax=ax)
-    ax.set_xlabel("Time (seconds)")
-    ax.set_ylabel("Amplitude")
+    plot_waveform(audio_16k, SAMPLE_RATE, upload_key, ax)
     st.pyplot(fig)
+    plt.close(fig)
 
     # ==========================
     # 📊 SPECTROGRAM
     # ==========================
     st.subheader("📊 Spectrogram")
 
-    D = librosa.amplitude_to_db(np.abs(librosa.stft(y)), ref=np.max)
+    # log-mel 16kHz của cả file tính một lần (memmap theo khoá nội dung): phổ đồ và encoder dùng chung
+    features = LogMel.compute(audio_16k, key=upload_key)
 
     fig, ax = plt.subplots(figsize=(10, 4))
-    img = librosa.display.specshow(
-        D,
-        sr=sr,
-        x_axis="time",
-        y_axis="hz",
-        ax=ax
-    )
+    img = plot_mel(features, duration, upload_key, ax)
     fig.colorbar(img, ax=ax, format="%+2.0f dB")
     st.pyplot(fig)
+    plt.close(fig)
 
     st.write("---")
 
@@ -102,12 +117,27 @@ def show():
         """
     )
 
+    model_size = st.selectbox(
+        "Model Whisper",
+        MODEL_SIZES,
+        index=MODEL_SIZES.index("base"),
+    )
+
     if st.button("▶️ Thực hiện Speech-to-Text"):
         with st.spinner("Đang nhận dạng giọng nói..."):
-            model = whisper.load_model("base")
-            result = model.transcribe(audio_path, language="vi")
-
-        transcript = result["text"]
+            # decode qua scheduler dùng chung: gộp batch với các session khác
+            session = st.session_state.setdefault("stt_session", uuid.uuid4().hex)
+            # cắt theo VAD tại chỗ ngắt nghỉ (như trang Analysis), mỗi đoạn là slice của log-mel
+            scheduler = get_scheduler(model_size)
+            ranges = vad_chunks(audio_16k, SAMPLE_RATE, CHUNK_SECONDS)
+            stream = scheduler.iter_transcribe(
+                mel_chunks(audio_16k, ranges, scheduler.model.dims.n_mels, key=upload_key),
+                session=session,
+                language="vi",
+            )
+            segments = list(stitch(stream, ranges, SAMPLE_RATE))
+
+        transcript = " ".join(seg["text"].strip() for seg in segments if seg["text"].strip())
 
         st.success("Hoàn thành nhận dạng!")
 
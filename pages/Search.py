@@ -0,0 +1,88 @@
+import streamlit as st
+import os
+import time
+
+from stt.audio import format_timestamp
+from stt.archive import TranscriptArchive
+
+
+PAGE_SIZE = 20
+
+
+@st.cache_resource
+def get_archive():
+    """Cùng kho với trang Analysis (CACHE_DIR/archive.sqlite)"""
+    return TranscriptArchive()
+
+
+# ==========================
+# ▶️ Nghe lại đúng đoạn khớp
+# ==========================
+def show_player(hit: dict):
+    st.subheader(f"🎧 {hit['title'] or hit['meeting_id']} – {format_timestamp(hit['start'])}")
+    path = hit["audio_path"]
+    if path and os.path.exists(path):
+        st.audio(path, start_time=int(hit["start"]))
+    else:
+        st.warning("Audio gốc của cuộc họp này không còn trên máy chủ, chỉ còn transcript.")
+    speaker = f"**{hit['speaker']}:** " if hit["speaker"] else ""
+    st.markdown(f"{speaker}{hit['snippet']}")
+
+
+# ==========================
+# 🎯 TRANG SEARCH
+# ==========================
+def show():
+    st.markdown(
+        "<h3 style='color:#2b6f3e;'>Search – Tìm kiếm trong transcript đã lưu</h3>",
+        unsafe_allow_html=True,
+    )
+
+    archive = get_archive()
+    stats = archive.stats()
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Cuộc họp", stats["meetings"])
+    c2.metric("Segment", stats["segments"])
+    c3.metric("Dung lượng (MB)", stats["size_mb"])
+
+    query = st.text_input(
+        "🔎 Từ khoá",
+        placeholder='vd. ngan sach  |  "kế hoạch triển khai"  |  tuyển*',
+        help="Không phân biệt dấu / hoa thường; cụm trong ngoặc kép tìm đúng cụm, "
+             "từ kết thúc bằng * tìm theo tiền tố",
+    )
+    if not query.strip():
+        st.info("Nhập từ khoá để tìm trong các transcript đã nhận dạng.")
+        return
+
+    col1, col2 = st.columns(2)
+    order = col1.selectbox(
+        "Sắp xếp",
+        ["recent", "relevance"],
+        format_func=lambda o: {"recent": "Mới nhất", "relevance": "Liên quan nhất (bm25)"}[o],
+    )
+    page = col2.number_input("Trang", min_value=1, value=1, step=1)
+
+    t0 = time.perf_counter()
+    hits = archive.search(
+        query, limit=PAGE_SIZE, offset=(int(page) - 1) * PAGE_SIZE, order=order
+    )
+    elapsed = (time.perf_counter() - t0) * 1000
+    st.caption(f"{len(hits)} kết quả trên trang {int(page)} – {elapsed:.1f} ms")
+
+    if not hits:
+        st.warning("Không tìm thấy đoạn nào khớp.")
+        return
+
+    selected = st.session_state.get("search_hit")
+    if selected is not None:
+        show_player(selected)
+        st.write("---")
+
+    for i, hit in enumerate(hits):
+        col1, col2 = st.columns([1, 6])
+        if col1.button(f"▶️ {format_timestamp(hit['start'])}", key=f"hit_{i}"):
+            st.session_state["search_hit"] = hit
+            st.rerun()
+        speaker = f"**{hit['speaker']}:** " if hit["speaker"] else ""
+        col2.markdown(f"*{hit['title'] or hit['meeting_id']}* · {speaker}{hit['snippet']}")
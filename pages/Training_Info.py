@@ -1,12 +1,11 @@
 import streamlit as st
 import os
-import pickle
-import torch
+import sys
 
-# ==========================
-# 📦 Model persistence
-# ==========================
-MODEL_DIR = "models"
+from stt.artifacts import read_manifests
+from stt.backends import BACKENDS
+from stt.config import BACKEND, TORCH_THREADS, MODEL_MEMORY_MB, PRELOAD_MODELS, MODEL_DIR
+from stt.registry import get_registry
 
 
 # ==========================
@@ -31,44 +30,23 @@ def info_box(html: str):
 
 
 # ==========================
-# 🔍 ĐỌC THÔNG TIN MODEL OBJECT
+# 🔍 ĐỌC THÔNG TIN MODEL (chỉ manifest, không nạp trọng số)
 # ==========================
 def load_model_info():
-    models_info = []
-
-    if not os.path.exists(MODEL_DIR):
-        return models_info
-
-    for fname in os.listdir(MODEL_DIR):
-        if not fname.endswith(".pkl"):
-            continue
-
-        fpath = os.path.join(MODEL_DIR, fname)
+    models_info = read_manifests(MODEL_DIR)
 
-        try:
-            with open(fpath, "rb") as f:
-                model = pickle.load(f)
+    for m in models_info:
+        if "error" not in m and not os.path.isfile(os.path.join(MODEL_DIR, m.get("weights", ""))):
+            m["error"] = f"Thiếu file trọng số {m.get('weights')}"
 
-            param_count = sum(p.numel() for p in model.parameters())
-            trainable_count = sum(p.numel() for p in model.parameters() if p.requires_grad)
-
-            models_info.append({
-                "name": fname.replace(".pkl", ""),
-                "file": fname,
-                "size_mb": round(os.path.getsize(fpath) / (1024 * 1024), 2),
-                "total_params": param_count,
-                "trainable_params": trainable_count,
-                "device": "CPU"
-            })
+    return models_info
 
-        except Exception as e:
-            models_info.append({
-                "name": fname.replace(".pkl", ""),
-                "file": fname,
-                "error": str(e)
-            })
 
-    return models_info
+def legacy_pickles():
+    """File .pkl cũ: không còn được mở (pickle chạy được code tuỳ ý)"""
+    if not os.path.isdir(MODEL_DIR):
+        return []
+    return sorted(f for f in os.listdir(MODEL_DIR) if f.endswith(".pkl"))
 
 
 # ==========================
@@ -129,30 +107,71 @@ def show():
     # 4️⃣ THÔNG TIN MODEL ĐÃ LƯU (OBJECT)
     # ==========================================================
     st.write("---")
-    st.subheader("📦 Thông tin Model Object đã lưu")
+    st.subheader("📦 Thông tin Model đã lưu")
 
     models_info = load_model_info()
 
+    for fname in legacy_pickles():
+        st.warning(
+            f"⚠️ {fname}: định dạng pickle không còn được hỗ trợ, chuyển sang artifact bằng "
+            f"`python -m stt.artifacts convert {MODEL_DIR}/{fname}`"
+        )
+
     if not models_info:
-        st.warning("⚠️ Chưa tìm thấy model .pkl trong thư mục models/")
+        st.warning(
+            f"⚠️ Chưa có artifact model trong thư mục {MODEL_DIR}/ "
+            "(tạo bằng `python -m stt.artifacts export base`)"
+        )
     else:
         for m in models_info:
             if "error" in m:
                 st.error(f"❌ {m['file']}: {m['error']}")
                 continue
 
+            dims = m.get("dims", {})
+            dtypes = ", ".join(f"{k}: {v:,}" for k, v in m.get("dtypes", {}).items())
             info_box(f"""
             <h4 style="color:#b30000;">{m['name']}</h4>
             <ul>
-                <li><b>File:</b> {m['file']}</li>
+                <li><b>File:</b> {m['weights']} (manifest {m['file']})</li>
                 <li><b>Dung lượng:</b> {m['size_mb']} MB</li>
                 <li><b>Tổng số tham số:</b> {m['total_params']:,}</li>
                 <li><b>Tham số trainable:</b> {m['trainable_params']:,}</li>
-                <li><b>Thiết bị inference:</b> {m['device']}</li>
-                <li><b>Định dạng lưu:</b> Pickle (.pkl)</li>
+                <li><b>Kiểu dữ liệu:</b> {dtypes}</li>
+                <li><b>Kiến trúc:</b> encoder {dims.get('n_audio_layer')} lớp / decoder {dims.get('n_text_layer')} lớp, d_model {dims.get('n_audio_state')}</li>
+                <li><b>Thiết bị inference:</b> CPU</li>
+                <li><b>Định dạng lưu:</b> {m['format']} (nạp bằng mmap)</li>
             </ul>
             """)
 
+    # ==========================================================
+    # ⚙️ BACKEND INFERENCE ĐANG DÙNG
+    # ==========================================================
+    st.subheader("⚙️ Backend inference")
+
+    # không import torch chỉ để đọc số thread: chưa nạp thì torch dùng mặc định theo số core
+    torch = sys.modules.get("torch")
+    threads = TORCH_THREADS or (torch.get_num_threads() if torch else os.cpu_count())
+    info_box(f"""
+    <ul>
+        <li><b>Backend:</b> {BACKEND} – {BACKENDS.get(BACKEND, "không hợp lệ")}</li>
+        <li><b>Quantization:</b> {"Dynamic int8 (Linear)" if BACKEND.startswith("int8") else "Không (fp32)"}</li>
+        <li><b>Encoder:</b> {"TorchScript (trace + freeze)" if BACKEND.endswith("-jit") else "PyTorch eager"}</li>
+        <li><b>Số thread torch:</b> {threads}{"" if TORCH_THREADS else " (mặc định)"}</li>
+        <li><b>Cấu hình:</b> biến môi trường <code>STT_BACKEND</code>, <code>STT_TORCH_THREADS</code></li>
+    </ul>
+    """)
+
+    loaded = get_registry().loaded()
+    loaded_html = "".join(
+        f"<li>{size} ({backend}) – {mb} MB</li>" for size, backend, mb in loaded
+    ) or "<li>Chưa có model nào được nạp</li>"
+    info_box(f"""
+    <b>Model đang nạp trong RAM</b>
+    (nạp sẵn: {", ".join(PRELOAD_MODELS) or "không"} | giới hạn {MODEL_MEMORY_MB} MB):
+    <ul>{loaded_html}</ul>
+    """)
+
     # ==========================================================
     # 5️⃣ ĐÁNH GIÁ
     # ==========================================================
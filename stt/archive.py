@@ -0,0 +1,286 @@
+"""
+Kho transcript đã nhận dạng + tìm kiếm full-text không dấu.
+
+Mỗi segment (thời gian, người nói, text) của mỗi cuộc họp được lưu trong
+SQLite, kèm hash audio và model; chỉ mục FTS5 trên text đã bỏ dấu tiếng
+Việt (kể cả đ -> d) được cập nhật ngay khi thêm transcript mới.
+
+Chạy từ thư mục gốc repo:
+    python -m stt.archive search '"ngân sách" quý'
+    python -m stt.archive stats
+"""
+import argparse
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from stt.config import CACHE_DIR
+
+
+# ==========================
+# 🔤 Bỏ dấu tiếng Việt (giữ nguyên độ dài chuỗi)
+# ==========================
+_FOLD = {"đ": "d", "Đ": "d"}
+
+
+def _fold_char(c: str) -> str:
+    if c in _FOLD:
+        return _FOLD[c]
+    if c.isascii():
+        return c.lower()
+    return unicodedata.normalize("NFD", c)[0].lower()
+
+
+def fold(text: str) -> str:
+    """
+    "Ngân sách Đà Nẵng" -> "ngan sach da nang". Đổi từng ký tự thành đúng
+    một ký tự nên vị trí trong chuỗi đã bỏ dấu trùng với chuỗi gốc (để tô đậm).
+    """
+    return "".join(map(_fold_char, text))
+
+
+# ==========================
+# 🔎 Cú pháp truy vấn
+# ==========================
+_QUERY = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def parse_query(query: str):
+    """
+    'hop "ngan sach" quy*' -> list (các từ, prefix?): cụm trong ngoặc kép là
+    phrase, từ kết thúc bằng * là tìm theo tiền tố; mọi phần đều phải khớp.
+    """
+    terms = []
+    for phrase, word in _QUERY.findall(query):
+        prefix = bool(word) and word.endswith("*")
+        words = re.findall(r"\w+", fold(phrase or word))
+        if words:
+            terms.append((words, prefix))
+    return terms
+
+
+def fts_query(terms) -> str:
+    """Biểu thức MATCH của FTS5; mỗi từ được đặt trong ngoặc kép nên không dính cú pháp FTS"""
+    return " AND ".join(
+        '"' + " ".join(words) + '"' + ("*" if prefix else "") for words, prefix in terms
+    )
+
+
+def highlight(text: str, terms, mark: str = "**") -> str:
+    """Tô đậm (markdown) các chỗ khớp trong text gốc, so khớp trên bản đã bỏ dấu"""
+    if not terms:
+        return text
+    patterns = [
+        r"\b" + r"\W+".join(map(re.escape, words)) + (r"\w*" if prefix else r"\b")
+        for words, prefix in terms
+    ]
+    spans = [m.span() for m in re.finditer("|".join(patterns), fold(text))]
+    out, last = [], 0
+    for start, end in spans:
+        out.append(text[last:start] + mark + text[start:end] + mark)
+        last = end
+    out.append(text[last:])
+    return "".join(out)
+
+
+# ==========================
+# 🗄️ Kho transcript (SQLite + FTS5)
+# ==========================
+class TranscriptArchive:
+    """
+    meetings: một dòng mỗi cuộc họp (job); segments: một dòng mỗi segment
+    với cột folded (text đã bỏ dấu) làm nội dung cho bảng FTS5 ngoài
+    (external content) -> chỉ mục không lưu lại text, trigger giữ đồng bộ
+    khi thêm / xoá. Truy vấn chỉ chạm các posting list của từ cần tìm.
+    """
+
+    def __init__(self, path: str = None):
+        path = path or os.path.join(CACHE_DIR, "archive.sqlite")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS meetings (
+                id TEXT PRIMARY KEY,
+                title TEXT,
+                audio_hash TEXT,
+                audio_path TEXT,
+                model TEXT,
+                language TEXT,
+                duration REAL,
+                created REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS meetings_audio_hash ON meetings(audio_hash);
+            CREATE TABLE IF NOT EXISTS segments (
+                id INTEGER PRIMARY KEY,
+                meeting_id TEXT NOT NULL,
+                start REAL NOT NULL,
+                end REAL NOT NULL,
+                speaker TEXT,
+                text TEXT NOT NULL,
+                folded TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS segments_meeting ON segments(meeting_id, start);
+            CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5(
+                folded, content='segments', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            );
+            CREATE TRIGGER IF NOT EXISTS segments_ai AFTER INSERT ON segments BEGIN
+                INSERT INTO segments_fts(rowid, folded) VALUES (new.id, new.folded);
+            END;
+            CREATE TRIGGER IF NOT EXISTS segments_ad AFTER DELETE ON segments BEGIN
+                INSERT INTO segments_fts(segments_fts, rowid, folded)
+                VALUES ('delete', old.id, old.folded);
+            END;
+            """
+        )
+        self._db.commit()
+
+    # ---------- Ghi ----------
+    def add(self, meeting_id: str, segments, title: str = None, audio_hash: str = None,
+            audio_path: str = None, model: str = None, language: str = None,
+            duration: float = None):
+        """
+        Lưu (hoặc thay) transcript của một cuộc họp và cập nhật chỉ mục trong
+        cùng một transaction: chỉ các segment mới được đánh chỉ mục.
+        """
+        rows = [
+            (meeting_id, seg["start"], seg["end"], seg.get("speaker"), text, fold(text))
+            for seg in segments
+            for text in [(seg.get("text") or "").strip()]
+            if text
+        ]
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM segments WHERE meeting_id = ?", (meeting_id,))
+            self._db.execute(
+                "INSERT OR REPLACE INTO meetings"
+                " (id, title, audio_hash, audio_path, model, language, duration, created)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (meeting_id, title, audio_hash, audio_path, model, language, duration, time.time()),
+            )
+            self._db.executemany(
+                "INSERT INTO segments (meeting_id, start, end, speaker, text, folded)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def remove(self, meeting_id: str):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM segments WHERE meeting_id = ?", (meeting_id,))
+            self._db.execute("DELETE FROM meetings WHERE id = ?", (meeting_id,))
+
+    def optimize(self):
+        """Gộp các segment b-tree của FTS5 (sau khi nạp hàng loạt)"""
+        with self._lock, self._db:
+            self._db.execute("INSERT INTO segments_fts(segments_fts) VALUES ('optimize')")
+
+    # ---------- Đọc ----------
+    def search(self, query: str, limit: int = 50, offset: int = 0, meeting_id: str = None,
+               order: str = "recent"):
+        """
+        Segment khớp truy vấn (không phân biệt dấu / hoa thường): list dict
+        {"meeting_id", "title", "audio_path", "start", "end", "speaker", "text",
+        "snippet"} (snippet tô đậm chỗ khớp bằng markdown).
+        order="recent": mới nhất trước, FTS5 duyệt posting list ngược theo rowid
+        và dừng khi đủ limit -> vài ms kể cả với từ rất phổ biến;
+        order="relevance": xếp theo bm25, phải chấm điểm mọi segment khớp.
+        """
+        terms = parse_query(query)
+        if not terms:
+            return []
+        if order not in ("recent", "relevance"):
+            raise ValueError(f"Unknown order {order!r}")
+
+        where = "segments_fts MATCH ?"
+        params = [fts_query(terms)]
+        if meeting_id is not None:
+            # rowid của một cuộc họp liền nhau: lọc ngay trong FTS5
+            where += " AND rowid IN (SELECT id FROM segments WHERE meeting_id = ?)"
+            params.append(meeting_id)
+        rank = "rowid DESC" if order == "recent" else "bm25(segments_fts)"
+        sql = (
+            "SELECT s.meeting_id, m.title, m.audio_path, s.start, s.end, s.speaker, s.text"
+            f" FROM (SELECT rowid AS id FROM segments_fts WHERE {where}"
+            f"       ORDER BY {rank} LIMIT ? OFFSET ?) hit"
+            " JOIN segments s ON s.id = hit.id"
+            " JOIN meetings m ON m.id = s.meeting_id"
+        )
+        params += [int(limit), int(offset)]
+
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        keys = ("meeting_id", "title", "audio_path", "start", "end", "speaker", "text")
+        return [dict(zip(keys, row), snippet=highlight(row[-1], terms)) for row in rows]
+
+    def meeting(self, meeting_id: str):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, title, audio_hash, audio_path, model, language, duration, created"
+                " FROM meetings WHERE id = ?",
+                (meeting_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            segments = self._db.execute(
+                "SELECT start, end, speaker, text FROM segments WHERE meeting_id = ? ORDER BY start",
+                (meeting_id,),
+            ).fetchall()
+        keys = ("id", "title", "audio_hash", "audio_path", "model", "language", "duration", "created")
+        return dict(
+            zip(keys, row),
+            segments=[dict(zip(("start", "end", "speaker", "text"), s)) for s in segments],
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            meetings = self._db.execute("SELECT COUNT(*) FROM meetings").fetchone()[0]
+            segments = self._db.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        return {
+            "meetings": meetings,
+            "segments": segments,
+            "size_mb": round(size / (1024 * 1024), 2),
+        }
+
+
+# ==========================
+# 🚀 Entry point
+# ==========================
+def main(argv=None):
+    from stt.audio import format_timestamp
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", default=None, help="Mặc định CACHE_DIR/archive.sqlite")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("search", help="Tìm segment theo truy vấn")
+    p.add_argument("query")
+    p.add_argument("--limit", type=int, default=20)
+    sub.add_parser("stats", help="Số cuộc họp / segment trong kho")
+    sub.add_parser("optimize", help="Gộp chỉ mục FTS5")
+    args = parser.parse_args(argv)
+
+    archive = TranscriptArchive(args.db)
+    if args.command == "stats":
+        print(archive.stats())
+    elif args.command == "optimize":
+        archive.optimize()
+    else:
+        t0 = time.perf_counter()
+        hits = archive.search(args.query, limit=args.limit)
+        elapsed = (time.perf_counter() - t0) * 1000
+        for hit in hits:
+            speaker = f"{hit['speaker']}: " if hit["speaker"] else ""
+            print(f"{hit['title'] or hit['meeting_id']} [{format_timestamp(hit['start'])}] "
+                  f"{speaker}{hit['snippet']}")
+        print(f"{len(hits)} kết quả, {elapsed:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
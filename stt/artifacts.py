@@ -0,0 +1,226 @@
+"""
+Artifact model trong models/: file trọng số mmap được + manifest JSON.
+
+  models/whisper-base.safetensors   (hoặc .pt nếu chưa cài safetensors)
+  models/whisper-base.json          {"format", "weights", "dims", "total_params", ...}
+
+Trang Training Info chỉ đọc manifest (không nạp trọng số); build_model nạp
+trọng số qua mmap nên các worker process dùng chung page cache của file.
+
+Tạo artifact từ thư mục gốc repo:
+    python -m stt.artifacts export tiny base
+    python -m stt.artifacts convert models/old_model.pkl   # file .pkl tin cậy, một lần
+    python -m stt.artifacts list
+"""
+import argparse
+import json
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import asdict
+
+from stt.config import MODEL_DIR
+
+
+FORMATS = ("safetensors", "torch")
+PREFIX = "whisper-"
+
+
+# ==========================
+# 📄 Manifest
+# ==========================
+def manifest_path(name: str, model_dir: str = MODEL_DIR) -> str:
+    return os.path.join(model_dir, f"{name}.json")
+
+
+def read_manifests(model_dir: str = MODEL_DIR):
+    """Đọc mọi manifest *.json trong model_dir (không đụng tới trọng số)"""
+    manifests = []
+    if not os.path.isdir(model_dir):
+        return manifests
+
+    for fname in sorted(os.listdir(model_dir)):
+        if not fname.endswith(".json"):
+            continue
+        path = os.path.join(model_dir, fname)
+        try:
+            with open(path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            manifest["file"] = fname
+            manifests.append(manifest)
+        except (OSError, ValueError) as e:
+            manifests.append({"name": fname[:-5], "file": fname, "error": str(e)})
+    return manifests
+
+
+def find_artifact(model_size: str, model_dir: str = MODEL_DIR):
+    """Manifest của model_size (vd. "base" -> models/whisper-base.json) nếu có đủ trọng số"""
+    for name in (f"{PREFIX}{model_size}", model_size):
+        path = manifest_path(name, model_dir)
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if os.path.exists(os.path.join(model_dir, manifest["weights"])):
+            return manifest
+    return None
+
+
+# ==========================
+# 💾 Ghi artifact
+# ==========================
+def _default_format() -> str:
+    try:
+        import safetensors.torch  # noqa: F401
+    except ImportError:
+        return "torch"
+    return "safetensors"
+
+
+def save_artifact(model, name: str, model_dir: str = MODEL_DIR, fmt: str = None,
+                  alignment_heads: str = None, model_size: str = None) -> dict:
+    """Ghi trọng số fp32 (dùng thẳng trên CPU) + manifest, trả về manifest"""
+    import torch
+
+    fmt = fmt or _default_format()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown artifact format {fmt!r}, expected one of {FORMATS}")
+
+    os.makedirs(model_dir, exist_ok=True)
+    state = {k: v.detach().to("cpu", torch.float32).contiguous() for k, v in model.state_dict().items()}
+    weights = f"{name}.safetensors" if fmt == "safetensors" else f"{name}.pt"
+    weights_path = os.path.join(model_dir, weights)
+
+    tmp = weights_path + ".part"
+    if fmt == "safetensors":
+        from safetensors.torch import save_file
+
+        save_file(state, tmp)
+    else:
+        torch.save(state, tmp)
+    os.replace(tmp, weights_path)
+
+    dtypes = {}
+    for t in state.values():
+        key = str(t.dtype).replace("torch.", "")
+        dtypes[key] = dtypes.get(key, 0) + t.numel()
+
+    manifest = {
+        "name": name,
+        "arch": "whisper",
+        "model_size": model_size,
+        "format": fmt,
+        "weights": weights,
+        "dims": asdict(model.dims),
+        "alignment_heads": alignment_heads,
+        "total_params": sum(p.numel() for p in model.parameters()),
+        "trainable_params": sum(p.numel() for p in model.parameters() if p.requires_grad),
+        "dtypes": dtypes,
+        "size_mb": round(os.path.getsize(weights_path) / (1024 * 1024), 2),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    with open(manifest_path(name, model_dir), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def export_whisper(model_size: str, model_dir: str = MODEL_DIR, fmt: str = None) -> dict:
+    """Tải checkpoint Whisper (size hoặc đường dẫn .pt) và ghi thành artifact"""
+    import whisper
+
+    model = whisper.load_model(model_size, device="cpu")
+    name = PREFIX + os.path.splitext(os.path.basename(model_size))[0]
+    heads = whisper._ALIGNMENT_HEADS.get(model_size)
+    heads = heads.decode() if isinstance(heads, bytes) else heads
+    return save_artifact(model, name, model_dir, fmt, alignment_heads=heads, model_size=model_size)
+
+
+def convert_pickle(pkl_path: str, model_dir: str = MODEL_DIR, fmt: str = None) -> dict:
+    """
+    Chuyển một model .pkl cũ (pickle của whisper.Whisper) sang artifact.
+    pickle chạy được code tuỳ ý: chỉ dùng với file do chính nhóm tạo ra.
+    """
+    import pickle
+
+    with open(pkl_path, "rb") as f:
+        model = pickle.load(f)
+    name = os.path.splitext(os.path.basename(pkl_path))[0]
+    return save_artifact(model, name, model_dir, fmt)
+
+
+# ==========================
+# 📥 Nạp artifact (mmap)
+# ==========================
+@contextmanager
+def _skip_init():
+    """
+    Bỏ khởi tạo ngẫu nhiên của các layer khi dựng khung model: trọng số sẽ được
+    thay bằng tensor mmap ngay sau đó (dựng "small" từ ~2.3s xuống ~0.03s).
+    """
+    from torch import nn
+
+    classes = (nn.Linear, nn.Conv1d, nn.Embedding, nn.LayerNorm)
+    saved = {cls: cls.reset_parameters for cls in classes}
+    for cls in classes:
+        cls.reset_parameters = lambda self: None
+    try:
+        yield
+    finally:
+        for cls, fn in saved.items():
+            cls.reset_parameters = fn
+
+
+def _load_state(path: str, fmt: str):
+    import torch
+
+    if fmt == "safetensors":
+        from safetensors.torch import load_file
+
+        return load_file(path, device="cpu")
+    # file zip của torch: mmap=True -> tensor trỏ thẳng vào page cache của file
+    return torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+
+
+def load_artifact(manifest: dict, model_dir: str = MODEL_DIR):
+    """Dựng whisper.Whisper từ manifest, gán thẳng tensor mmap (không copy)"""
+    from whisper.model import ModelDimensions, Whisper
+
+    with _skip_init():
+        model = Whisper(ModelDimensions(**manifest["dims"]))
+
+    state = _load_state(os.path.join(model_dir, manifest["weights"]), manifest["format"])
+    model.load_state_dict(state, assign=True)
+    if manifest.get("alignment_heads"):
+        model.set_alignment_heads(manifest["alignment_heads"].encode())
+    return model.eval()
+
+
+# ==========================
+# 🚀 CLI
+# ==========================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dir", default=MODEL_DIR)
+    parser.add_argument("--format", choices=FORMATS, default=None,
+                        help="Mặc định safetensors nếu đã cài, không thì torch (.pt, mmap)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("export", help="Xuất checkpoint Whisper").add_argument("models", nargs="+")
+    sub.add_parser("convert", help="Chuyển file .pkl cũ").add_argument("files", nargs="+")
+    sub.add_parser("list", help="Liệt kê manifest")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        for model_size in args.models:
+            m = export_whisper(model_size, args.dir, args.format)
+            print(f"{m['name']}: {m['weights']} ({m['size_mb']} MB, {m['total_params']:,} params)")
+    elif args.command == "convert":
+        for path in args.files:
+            m = convert_pickle(path, args.dir, args.format)
+            print(f"{path} -> {m['weights']} ({m['size_mb']} MB)")
+    else:
+        for m in read_manifests(args.dir):
+            print(f"{m['name']:<24} {m.get('format', '?'):<12} {m.get('size_mb', '?')} MB")
+
+
+if __name__ == "__main__":
+    main()
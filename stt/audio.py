@@ -0,0 +1,149 @@
+import os
+import subprocess
+import tempfile
+
+import numpy as np
+import soundfile as sf
+
+from stt.trace import span
+
+
+# ==========================
+# ⚙️ Tham số đọc audio theo block
+# ==========================
+SAMPLE_RATE = 16000
+BLOCK_SECONDS = 30  # mỗi block 30s @ 16kHz float32 ~ 1.9 MB
+
+
+# ==========================
+# 🎧 Giải mã audio theo block (ffmpeg pipe)
+# ==========================
+def iter_pcm_blocks(audio_path: str, sr: int = SAMPLE_RATE, block_seconds: int = BLOCK_SECONDS):
+    """
+    Giải mã + downmix mono + resample bằng ffmpeg, đọc stdout theo block.
+    Bộ nhớ chỉ phụ thuộc block_seconds, không phụ thuộc độ dài file.
+    """
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-loglevel", "error",
+        "-threads", "0",
+        "-i", audio_path,
+        "-f", "f32le",
+        "-ac", "1",
+        "-acodec", "pcm_f32le",
+        "-ar", str(sr),
+        "-",
+    ]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    block_bytes = int(sr * block_seconds) * 4
+
+    finished = False
+    try:
+        while True:
+            buf = proc.stdout.read(block_bytes)
+            if not buf:
+                break
+            yield np.frombuffer(buf, dtype=np.float32)
+        finished = True
+    finally:
+        if not finished:
+            proc.kill()  # người dùng dừng sớm
+        proc.stdout.close()
+        err = proc.stderr.read()
+        proc.stderr.close()
+        if proc.wait() != 0 and finished:
+            raise RuntimeError(f"Failed to load audio: {err.decode(errors='ignore')}")
+
+
+# ==========================
+# ✅ Audio utils
+# ==========================
+def _output_file(out_dir: str, suffix: str):
+    """File tạm trong /tmp, hoặc file .part trong out_dir (đổi tên khi ghi xong)"""
+    if out_dir is None:
+        return tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+    return tempfile.NamedTemporaryFile(delete=False, dir=out_dir, prefix="audio", suffix=f"{suffix}.part")
+
+
+def normalize_audio_to_wav(audio_path: str, target_sr: int = SAMPLE_RATE, out_dir: str = None):
+    """
+    Load audio -> mono 16kHz WAV PCM16, chuẩn hoá peak theo 2 lượt:
+      1. stream block từ ffmpeg, ghi float32 ra file tạm và tìm peak
+      2. chia cho peak từng block (in-place trên memmap) + ghi WAV PCM16
+    Trả về (wav_path, sr, y) với y là np.memmap chỉ đọc: slice chunk vẫn là
+    view, RAM không tăng theo độ dài audio.
+    out_dir: ghi thành out_dir/audio.f32 + audio.wav (xem stt.storage) thay
+    vì file tạm mà caller phải tự xoá.
+    """
+    raw = _output_file(out_dir, ".f32")
+    peak = 0.0
+    total = 0
+    with raw, span("ffmpeg_decode"):
+        for block in iter_pcm_blocks(audio_path, target_sr):
+            if block.size:
+                peak = max(peak, float(np.max(np.abs(block))))
+            raw.write(block.tobytes())
+            total += block.size
+
+    out_wav = _output_file(out_dir, ".wav")
+    out_wav.close()
+
+    if total == 0:
+        sf.write(out_wav.name, np.zeros(0, dtype=np.float32), target_sr, subtype="PCM_16",
+                 format="WAV")
+    else:
+        block_len = target_sr * BLOCK_SECONDS
+        y = np.memmap(raw.name, dtype=np.float32, mode="r+", shape=(total,))
+        with span("peak_normalize_write_wav", samples=total):
+            with sf.SoundFile(out_wav.name, "w", target_sr, 1, subtype="PCM_16", format="WAV") as wav:
+                for start in range(0, total, block_len):
+                    block = y[start:start + block_len]
+                    if peak > 0:
+                        block /= peak
+                    wav.write(block)
+        y.flush()
+        del y
+
+    raw_path, wav_path = raw.name, out_wav.name
+    if out_dir is not None:
+        raw_path, wav_path = os.path.join(out_dir, "audio.f32"), os.path.join(out_dir, "audio.wav")
+        os.replace(out_wav.name, wav_path)
+        os.replace(raw.name, raw_path)  # audio.f32 có sau cùng = đã chuẩn hoá xong
+
+    if total == 0:
+        if out_dir is None:
+            os.remove(raw_path)
+        return wav_path, target_sr, np.zeros(0, dtype=np.float32)
+    return wav_path, target_sr, np.memmap(raw_path, dtype=np.float32, mode="r", shape=(total,))
+
+
+def chunk_signal(y: np.ndarray, sr: int, chunk_seconds: int, overlap_seconds: float = 0):
+    """
+    Cắt tín hiệu thành các đoạn chunk_seconds; overlap_seconds > 0 thì đoạn sau
+    bắt đầu sớm hơn để hai đoạn liền nhau nghe chung một khoảng (tối đa nửa đoạn),
+    phần trùng được ghép lại bằng stt.stitch.
+    """
+    total_samples = len(y)
+    chunk_len = int(chunk_seconds * sr)
+
+    if chunk_len <= 0 or total_samples == 0:
+        return [(0, total_samples)]
+
+    overlap = min(int(overlap_seconds * sr), chunk_len // 2)
+    step = chunk_len - overlap
+
+    ranges = []
+    for start in range(0, total_samples, step):
+        end = min(start + chunk_len, total_samples)
+        ranges.append((start, end))
+        if end == total_samples:
+            break
+
+    return ranges
+
+
+def format_timestamp(seconds: float) -> str:
+    m = int(seconds // 60)
+    s = int(seconds % 60)
+    return f"{m:02d}:{s:02d}"
@@ -0,0 +1,87 @@
+import warnings
+
+# torch / whisper được import trong hàm: import module này (BACKENDS, model_id)
+# không kéo theo vài giây import ML lúc trang vừa mở
+
+
+# ==========================
+# ⚙️ Các backend inference trên CPU
+# ==========================
+BACKENDS = {
+    "fp32": "PyTorch fp32 (mặc định của Whisper)",
+    "int8": "Dynamic int8 quantization cho các lớp Linear",
+    "fp32-jit": "fp32 + encoder TorchScript (trace + freeze)",
+    "int8-jit": "int8 + encoder TorchScript (trace + freeze)",
+}
+
+
+def model_id(model_size: str, backend: str = "fp32") -> str:
+    """Tên dùng làm khoá cache: backend khác cho kết quả khác"""
+    return model_size if backend == "fp32" else f"{model_size}+{backend}"
+
+
+# ==========================
+# 🔧 Biến đổi model
+# ==========================
+def quantize_int8(model):
+    """
+    Dynamic int8 cho mọi Linear (attention q/k/v/out + MLP của encoder/decoder).
+    whisper.model.Linear chỉ là nn.Linear có ép dtype, quantize_dynamic không
+    nhận subclass nên đổi về nn.Linear trước (trên CPU fp32 là tương đương).
+    """
+    import torch
+    from torch import nn
+
+    for module in model.modules():
+        if isinstance(module, nn.Linear):
+            module.__class__ = nn.Linear
+
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+
+def trace_encoder(model):
+    """Trace encoder với batch 1; kích thước batch vẫn động khi chạy"""
+    import torch
+    import whisper
+
+    example = torch.zeros(1, model.dims.n_mels, whisper.audio.N_FRAMES)
+    with torch.no_grad(), warnings.catch_warnings():
+        # assert kiểm tra shape trong encoder -> TracerWarning, vô hại
+        warnings.simplefilter("ignore", torch.jit.TracerWarning)
+        traced = torch.jit.trace(model.encoder, example, check_trace=False)
+    return torch.jit.freeze(traced.eval())
+
+
+# ==========================
+# 🧠 Load model theo backend
+# ==========================
+def build_model(model_size: str = "base", backend: str = "fp32", threads: int = 0):
+    """
+    Load Whisper trên CPU theo backend đã chọn.
+    Có artifact trong models/ (stt.artifacts) thì nạp trọng số qua mmap,
+    không thì tải checkpoint gốc của Whisper.
+    threads > 0: đặt số intra-op thread của torch cho process hiện tại.
+    """
+    from stt.artifacts import find_artifact, load_artifact
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {list(BACKENDS)}")
+
+    import torch
+    import whisper
+
+    if threads and threads > 0:
+        torch.set_num_threads(threads)
+
+    manifest = find_artifact(model_size)
+    if manifest is not None:
+        model = load_artifact(manifest)
+    else:
+        model = whisper.load_model(model_size, device="cpu").eval()
+
+    if backend.startswith("int8"):
+        model = quantize_int8(model)
+    if backend.endswith("-jit"):
+        model.encoder = trace_encoder(model)
+
+    return model
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from stt.config import CACHE_DIR, TRANSCRIPT_CACHE_MB
+
+
+# ==========================
+# 🔑 Khoá cache
+# ==========================
+def audio_hash(y: np.ndarray) -> str:
+    """Hash nội dung PCM (float32) – không copy nếu y đã liền mạch"""
+    h = hashlib.blake2b(digest_size=20)
+    h.update(np.ascontiguousarray(y, dtype=np.float32).data)
+    return h.hexdigest()
+
+
+def chunk_key(chunk: np.ndarray, **options) -> str:
+    """Khoá = hash PCM của chunk + độ dài + tuỳ chọn decode (model, ngôn ngữ, ...)"""
+    opts = json.dumps(options, sort_keys=True, default=str)
+    return f"{audio_hash(chunk)}:{len(chunk)}:{opts}"
+
+
+# ==========================
+# 💾 Cache transcript theo chunk (SQLite, LRU theo dung lượng)
+# ==========================
+class TranscriptCache:
+    def __init__(self, path: str = None, max_mb: int = TRANSCRIPT_CACHE_MB):
+        path = path or os.path.join(CACHE_DIR, "transcripts.sqlite")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        self.path = path
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS chunks_last_access ON chunks(last_access)"
+        )
+        self._db.commit()
+        self._total = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM chunks"
+        ).fetchone()[0]
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM chunks WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._db.execute(
+                "UPDATE chunks SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self._db.commit()
+            return json.loads(row[0])
+
+    def put(self, key: str, value: dict):
+        data = json.dumps(value, ensure_ascii=False)
+        size = len(key) + len(data.encode("utf-8"))
+
+        with self._lock:
+            old = self._db.execute(
+                "SELECT size FROM chunks WHERE key = ?", (key,)
+            ).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO chunks (key, value, size, last_access)"
+                " VALUES (?, ?, ?, ?)",
+                (key, data, size, time.time()),
+            )
+            self._total += size - (old[0] if old else 0)
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        if self._total <= self.max_bytes:
+            return
+
+        rows = self._db.execute(
+            "SELECT key, size FROM chunks ORDER BY last_access ASC"
+        )
+        victims = []
+        for key, size in rows:
+            if self._total <= self.max_bytes:
+                break
+            victims.append((key,))
+            self._total -= size
+
+        self._db.executemany("DELETE FROM chunks WHERE key = ?", victims)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "size_mb": round(self._total / (1024 * 1024), 2),
+        }
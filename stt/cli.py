@@ -0,0 +1,168 @@
+"""
+Transcribe hàng loạt file ghi âm không cần giao diện.
+
+Đầu vào là file, thư mục (quét đệ quy theo đuôi audio) hoặc glob; mỗi file
+ghi ra <out>/<tên>.{txt,srt,vtt,json}. File đã có đủ output thì bỏ qua.
+Các file chạy song song trên một model dùng chung.
+
+Chạy từ thư mục gốc repo:
+    python -m stt.cli recordings/ -o transcripts --model base --language vi --jobs 2
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from stt.archive import TranscriptArchive
+from stt.backends import BACKENDS, model_id
+from stt.cache import TranscriptCache
+from stt.config import BACKEND
+from stt.engine import DEFAULT_BATCH_SIZE, MAX_CHUNK_SECONDS
+from stt.exports import FORMATS, render
+from stt.pipeline import SEGMENTATIONS, transcribe_file
+from stt.registry import get_registry
+
+
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a", ".flac", ".ogg", ".webm", ".mp4")
+
+
+# ==========================
+# 📂 Tìm file đầu vào
+# ==========================
+def collect_inputs(inputs):
+    """Trả về list (đường dẫn audio, đường dẫn tương đối dùng để đặt tên output)"""
+    found = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                for name in sorted(files):
+                    if name.lower().endswith(AUDIO_EXTENSIONS):
+                        path = os.path.join(root, name)
+                        found.append((path, os.path.relpath(path, item)))
+        elif os.path.isfile(item):
+            found.append((item, os.path.basename(item)))
+        else:
+            for path in sorted(glob.glob(item, recursive=True)):
+                if os.path.isfile(path):
+                    found.append((path, os.path.basename(path)))
+
+    seen, unique = set(), []
+    for path, rel in found:
+        key = os.path.abspath(path)
+        if key not in seen:
+            seen.add(key)
+            unique.append((path, rel))
+    return unique
+
+
+def output_paths(out_dir: str, rel: str, formats):
+    base = os.path.join(out_dir, os.path.splitext(rel)[0])
+    return {fmt: f"{base}.{fmt}" for fmt in formats}
+
+
+def write_outputs(result: dict, paths: dict):
+    for fmt, path in paths.items():
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".part"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(render(result, fmt))
+        os.replace(tmp, path)  # không để lại output dở dang nếu bị ngắt
+
+
+# ==========================
+# 🚀 Entry point
+# ==========================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("inputs", nargs="+", help="File, thư mục hoặc glob")
+    parser.add_argument("-o", "--output", default="transcripts")
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--backend", default=BACKEND, choices=list(BACKENDS))
+    parser.add_argument("--language", default=None, help="vd. vi; bỏ trống để tự nhận diện")
+    parser.add_argument("--recheck-every", type=int, default=0,
+                        help="Auto-detect: nhận diện lại ngôn ngữ mỗi N đoạn (0 = khoá một lần)")
+    parser.add_argument("--chunk-seconds", type=int, default=MAX_CHUNK_SECONDS,
+                        help=f"Độ dài tối đa mỗi đoạn, không vượt quá {MAX_CHUNK_SECONDS}s (cửa sổ Whisper)")
+    parser.add_argument("--segmentation", default="vad", choices=SEGMENTATIONS)
+    parser.add_argument("--overlap-seconds", type=float, default=0,
+                        help="Độ chồng lấn giữa các đoạn khi --segmentation fixed")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--diarize", action="store_true",
+                        help="Phân biệt người nói (CPU, chạy song song với nhận dạng)")
+    parser.add_argument("--speakers", type=int, default=None,
+                        help="Số người nói nếu biết trước (mặc định tự ước lượng)")
+    parser.add_argument("--formats", nargs="+", default=list(FORMATS), choices=FORMATS)
+    parser.add_argument("--jobs", type=int, default=1, help="Số file chạy song song")
+    parser.add_argument("--archive", action="store_true",
+                        help="Lưu transcript vào kho tìm kiếm (stt.archive, trang Search)")
+    parser.add_argument("--overwrite", action="store_true")
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args(argv)
+
+    todo = []
+    for path, rel in collect_inputs(args.inputs):
+        paths = output_paths(args.output, rel, args.formats)
+        if not args.overwrite and all(os.path.exists(p) for p in paths.values()):
+            print(f"skip  {path}")
+            continue
+        todo.append((path, paths))
+
+    if not todo:
+        print("Không có file nào cần xử lý")
+        return 0
+
+    model = get_registry().get(args.model, args.backend)
+    cache = None if args.no_cache else TranscriptCache()
+    options = dict(
+        language=args.language,
+        recheck_every=args.recheck_every,
+        chunk_seconds=args.chunk_seconds,
+        segmentation=args.segmentation,
+        overlap_seconds=args.overlap_seconds,
+        batch_size=args.batch_size,
+        cache=cache,
+        model_name=model_id(args.model, args.backend),
+        diarize=args.diarize,
+        num_speakers=args.speakers,
+    )
+
+    archive = TranscriptArchive() if args.archive else None
+
+    def run(path, paths):
+        t0 = time.perf_counter()
+        result = transcribe_file(model, path, **options)
+        write_outputs(result, paths)
+        if archive is not None:
+            archive.add(
+                os.path.abspath(path),
+                result["segments"],
+                title=os.path.basename(path),
+                audio_path=os.path.abspath(path),
+                model=options["model_name"],
+                language=result["language"],
+                duration=result["duration"],
+            )
+        return result, time.perf_counter() - t0
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        futures = {executor.submit(run, path, paths): path for path, paths in todo}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                result, elapsed = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"error {path}: {e}", file=sys.stderr)
+                continue
+            rtf = elapsed / result["duration"] if result["duration"] else 0.0
+            print(f"done  {path}  {result['duration']:.1f}s audio, {elapsed:.1f}s, RTF {rtf:.3f}")
+
+    print(f"{len(todo) - failed}/{len(todo)} file OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+import os
+
+
+# ==========================
+# ⚙️ Cấu hình qua biến môi trường
+# ==========================
+CACHE_DIR = os.environ.get("STT_CACHE_DIR", ".cache")
+
+# Giới hạn dung lượng cache transcript (MB), quá thì xoá theo LRU
+TRANSCRIPT_CACHE_MB = int(os.environ.get("STT_TRANSCRIPT_CACHE_MB", "256"))
+
+# Giới hạn dung lượng kho audio upload (file gốc + bản chuẩn hoá, MB); audio còn
+# được session / job dùng không bị xoá, còn lại xoá theo LRU
+AUDIO_STORE_MB = int(os.environ.get("STT_AUDIO_STORE_MB", "2048"))
+
+# Thời gian (giây) một session giữ audio vừa upload kể từ lần dùng cuối
+AUDIO_SESSION_TTL = int(os.environ.get("STT_AUDIO_SESSION_TTL", "3600"))
+
+# Giới hạn dung lượng log-mel đã tính sẵn (float16, ~57 MB mỗi giờ audio), quá thì xoá file cũ nhất
+MEL_CACHE_MB = int(os.environ.get("STT_MEL_CACHE_MB", "512"))
+
+# Backend inference trên CPU: fp32 | int8 | fp32-jit | int8-jit (xem stt/backends.py)
+BACKEND = os.environ.get("STT_BACKEND", "fp32")
+
+# Số intra-op thread của torch (0 = để torch tự chọn)
+TORCH_THREADS = int(os.environ.get("STT_TORCH_THREADS", "0"))
+
+# Các model Whisper nạp sẵn khi app khởi động (nạp nền), ví dụ "tiny,base,small"
+PRELOAD_MODELS = [m.strip() for m in os.environ.get("STT_PRELOAD_MODELS", "base").split(",") if m.strip()]
+
+# Tổng RAM tối đa cho các model đang nạp (MB), quá thì bỏ model ít dùng nhất
+MODEL_MEMORY_MB = int(os.environ.get("STT_MODEL_MEMORY_MB", "1500"))
+
+# Số job Speech-to-Text chạy nền đồng thời (các job khác xếp hàng); các job
+# cùng model được gộp batch bởi stt.scheduler nên không tranh thread torch
+MAX_JOBS = int(os.environ.get("STT_MAX_JOBS", "4"))
+
+# Thời gian tối đa (ms) một cửa sổ chờ để được gộp batch với cửa sổ của session khác
+BATCH_WAIT_MS = int(os.environ.get("STT_BATCH_WAIT_MS", "30"))
+
+# Thư mục artifact model (trọng số mmap + manifest JSON, xem stt/artifacts.py)
+MODEL_DIR = os.environ.get("STT_MODEL_DIR", "models")
@@ -0,0 +1,293 @@
+import bisect
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from stt.audio import SAMPLE_RATE
+from stt.config import MAX_JOBS
+from stt.engine import HOP_LENGTH
+from stt.features import LogMel
+from stt.trace import span
+from stt.vad import detect_speech
+
+
+# ==========================
+# ⚙️ Tham số diarization (CPU, không cần model)
+# ==========================
+FRAME_SECONDS = HOP_LENGTH / SAMPLE_RATE  # frame log-mel của stt.features (10ms)
+WINDOW_SECONDS = 1.5      # mỗi embedding lấy thống kê trên 1.5s tiếng nói
+HOP_SECONDS = 0.75        # cửa sổ chồng lấn một nửa -> nhãn theo bước 0.75s
+N_MFCC = 20               # bỏ c0 (năng lượng): còn c1..c19
+MAX_SPEAKERS = 8
+NEW_SPEAKER_SIM = 0.35    # cosine với mọi tâm cụm thấp hơn -> người nói mới
+MERGE_LOSS = 0.3          # gộp hai cụm nếu độ gắn kết trung bình giảm ít hơn
+MIN_SPEAKER_SECONDS = 5.0 # cụm ít tiếng nói hơn bị gộp vào cụm gần nhất
+REFINE_ITERS = 5
+SMOOTH_WINDOWS = 5        # lọc đa số trên nhãn liền kề, bỏ lượt nói "nhảy" 0.75s
+
+
+# ==========================
+# 🎙️ Embedding người nói theo cửa sổ
+# ==========================
+def _dct_matrix(n_mels: int, n_mfcc: int = N_MFCC) -> np.ndarray:
+    """DCT-II trực chuẩn: log-mel -> MFCC (như librosa.feature.mfcc)"""
+    k = np.arange(n_mfcc)[:, None]
+    n = np.arange(n_mels)[None, :]
+    dct = np.cos(np.pi * k * (2 * n + 1) / (2 * n_mels)) * np.sqrt(2.0 / n_mels)
+    dct[0] /= np.sqrt(2.0)
+    return dct.astype(np.float32)
+
+
+def window_embeddings(features: LogMel, regions):
+    """
+    Mean + std của MFCC (c1..c19) trên các cửa sổ WINDOW_SECONDS trượt trong
+    từng vùng nói. Tổng tích luỹ theo vùng -> O(số frame), không giữ MFCC
+    của cả file trong RAM. Trả về (embedding (N, 38), khoảng thời gian (N, 2) giây).
+    """
+    dct = _dct_matrix(features.n_mels)[1:]
+    win = int(WINDOW_SECONDS / FRAME_SECONDS)
+    hop = int(HOP_SECONDS / FRAME_SECONDS)
+    n_frames = features.data.shape[1]
+
+    embeddings, spans = [], []
+    for s0, s1 in regions:
+        f0, f1 = s0 // HOP_LENGTH, min(s1 // HOP_LENGTH, n_frames)
+        if f1 - f0 < win // 2:
+            continue  # vùng nói quá ngắn: để nhãn của lượt nói gần nhất
+        mfcc = dct @ np.asarray(features.data[:, f0:f1], dtype=np.float32)
+        csum = np.pad(np.cumsum(mfcc, axis=1, dtype=np.float64), ((0, 0), (1, 0)))
+        csq = np.pad(np.cumsum(np.square(mfcc, dtype=np.float64), axis=1), ((0, 0), (1, 0)))
+
+        starts = np.arange(0, max(1, f1 - f0 - win + 1), hop)
+        ends = np.minimum(starts + win, f1 - f0)
+        count = (ends - starts)[None, :]
+        mean = (csum[:, ends] - csum[:, starts]) / count
+        std = np.sqrt(np.maximum((csq[:, ends] - csq[:, starts]) / count - mean ** 2, 0.0))
+        embeddings.append(np.concatenate([mean, std]).T)
+
+        # mỗi cửa sổ đại diện cho bước hop của nó, cửa sổ cuối kéo tới hết vùng
+        t0 = (f0 + starts) * FRAME_SECONDS
+        t1 = np.append(t0[1:], f1 * FRAME_SECONDS)
+        spans.append(np.stack([t0, t1], axis=1))
+
+    if not embeddings:
+        return np.zeros((0, 2 * len(dct)), dtype=np.float32), np.zeros((0, 2))
+
+    x = np.concatenate(embeddings)
+    # chuẩn hoá theo cả bản ghi (bỏ đặc tính kênh / micro), rồi đưa lên mặt cầu đơn vị
+    x = (x - x.mean(axis=0)) / (x.std(axis=0) + 1e-6)
+    x /= np.linalg.norm(x, axis=1, keepdims=True) + 1e-9
+    return x.astype(np.float32), np.concatenate(spans)
+
+
+# ==========================
+# 🧮 Phân cụm tăng dần (O(N·K))
+# ==========================
+def _normalize(centroids: np.ndarray) -> np.ndarray:
+    return centroids / (np.linalg.norm(centroids, axis=1, keepdims=True) + 1e-9)
+
+
+def online_clusters(x: np.ndarray, max_speakers: int = MAX_SPEAKERS,
+                    threshold: float = NEW_SPEAKER_SIM) -> np.ndarray:
+    """
+    Một lượt theo thời gian: gán mỗi cửa sổ vào tâm cụm gần nhất (cosine) và
+    cập nhật trung bình chạy, mở cụm mới khi không cụm nào đủ giống. Chỉ so
+    với <= max_speakers tâm cụm nên không bao giờ dựng ma trận N x N.
+    """
+    sums = np.zeros((max_speakers, x.shape[1]), dtype=np.float64)
+    k = 0
+    for v in x:
+        if k:
+            sims = _normalize(sums[:k]) @ v
+            best = int(np.argmax(sims))
+            if sims[best] >= threshold or k == max_speakers:
+                sums[best] += v
+                continue
+        sums[k] = v
+        k += 1
+    return _normalize(sums[:k]).astype(np.float32)
+
+
+def _sums(x: np.ndarray, labels: np.ndarray, k: int) -> np.ndarray:
+    sums = np.zeros((k, x.shape[1]), dtype=np.float64)
+    np.add.at(sums, labels, x)
+    return sums
+
+
+def kmeans(x: np.ndarray, centroids: np.ndarray, durations: np.ndarray,
+           iters: int = REFINE_ITERS, min_seconds: float = MIN_SPEAKER_SECONDS) -> np.ndarray:
+    """
+    Vài vòng k-means cosine (vector hoá, N x K); cụm có ít hơn min_seconds
+    tiếng nói bị bỏ, cửa sổ của nó về tâm gần nhất. Trả về nhãn 0..K-1.
+    """
+    for _ in range(iters):
+        labels = np.argmax(x @ centroids.T, axis=1)
+        seconds = np.bincount(labels, weights=durations, minlength=len(centroids))
+        keep = (seconds > 0) & (seconds >= min(min_seconds, seconds.max()))
+        centroids = _normalize(_sums(x, labels, len(centroids))[keep]).astype(np.float32)
+    labels = np.argmax(x @ centroids.T, axis=1)
+    return np.unique(labels, return_inverse=True)[1]
+
+
+def merge_clusters(x: np.ndarray, labels: np.ndarray, max_loss: float = MERGE_LOSS) -> np.ndarray:
+    """
+    Gộp tham lam cặp cụm mà khi gộp độ gắn kết (cosine trung bình tới tâm
+    cụm = |tổng| / số phần tử) giảm ít nhất, tới khi mọi cặp giảm quá max_loss.
+    Chỉ làm trên tổng của K <= MAX_SPEAKERS cụm.
+    """
+    k = labels.max() + 1
+    sums = list(_sums(x, labels, k))
+    counts = np.bincount(labels, minlength=k).tolist()
+    groups = [[i] for i in range(k)]
+    while len(sums) > 1:
+        loss, i, j = min(
+            ((np.linalg.norm(sums[i]) + np.linalg.norm(sums[j]) - np.linalg.norm(sums[i] + sums[j]))
+             / (counts[i] + counts[j]), i, j)
+            for i in range(len(sums)) for j in range(i + 1, len(sums))
+        )
+        if loss > max_loss:
+            break
+        sums[i] = sums[i] + sums.pop(j)
+        counts[i] += counts.pop(j)
+        groups[i] += groups.pop(j)
+
+    mapping = np.zeros(k, dtype=np.int64)
+    for new, members in enumerate(groups):
+        mapping[members] = new
+    return mapping[labels]
+
+
+def kmeans_init(x: np.ndarray, k: int) -> np.ndarray:
+    """Biết trước số người nói: chọn tâm xa nhau nhất (farthest-point), O(N·K)"""
+    centroids = [x[0]]
+    closest = x @ x[0]
+    for _ in range(1, min(k, len(x))):
+        i = int(np.argmin(closest))
+        centroids.append(x[i])
+        closest = np.maximum(closest, x @ x[i])
+    return np.stack(centroids)
+
+
+def smooth(labels: np.ndarray, width: int = SMOOTH_WINDOWS) -> np.ndarray:
+    """Lọc đa số trượt (width cửa sổ) trên chuỗi nhãn"""
+    if len(labels) < width or width < 2:
+        return labels
+    k = labels.max() + 1
+    onehot = np.eye(k, dtype=np.int32)[labels]
+    votes = np.cumsum(np.pad(onehot, ((width // 2 + 1, width // 2), (0, 0)), mode="edge"), axis=0)
+    counts = votes[width:] - votes[:-width]
+    return np.argmax(counts[:len(labels)], axis=1)
+
+
+# ==========================
+# 👥 Diarization cả tín hiệu
+# ==========================
+def diarize(y, sr: int = SAMPLE_RATE, num_speakers: int = None,
+            max_speakers: int = MAX_SPEAKERS, features: LogMel = None, key: str = None):
+    """
+    Lượt nói [{"start", "end", "speaker"}] (giây, "S1", "S2"... theo thứ tự
+    xuất hiện) của tín hiệu 16kHz đã chuẩn hoá. Dùng lại log-mel của cả tín
+    hiệu (stt.features, memmap theo hash) và VAD năng lượng của pipeline;
+    num_speakers=None thì tự ước lượng số người nói (tối đa max_speakers).
+    key: khoá nội dung đã biết của y (kho audio) -> không hash lại tín hiệu.
+    """
+    if sr != SAMPLE_RATE:
+        raise ValueError(f"diarize cần audio {SAMPLE_RATE} Hz, nhận {sr} Hz")
+
+    with span("diarize", seconds=round(len(y) / sr, 1)):
+        features = features or LogMel.compute(y, key=key)
+        with span("diarize_embed"):
+            regions = detect_speech(y, sr)
+            x, spans = window_embeddings(features, regions)
+        if len(x) == 0:
+            return []
+
+        with span("diarize_cluster", windows=len(x)):
+            durations = spans[:, 1] - spans[:, 0]
+            if num_speakers:
+                labels = kmeans(x, kmeans_init(x, int(num_speakers)), durations, min_seconds=0.0)
+            else:
+                # lượt tăng dần tạo cụm thô -> k-means -> gộp cụm cùng người -> k-means lại
+                labels = kmeans(x, online_clusters(x, max_speakers), durations)
+                labels = merge_clusters(x, labels)
+                centroids = _normalize(_sums(x, labels, labels.max() + 1)).astype(np.float32)
+                labels = kmeans(x, centroids, durations)
+            labels = smooth(labels)
+        return _turns(labels, spans)
+
+
+def _turns(labels: np.ndarray, spans: np.ndarray, max_gap: float = 0.5):
+    """Gộp các cửa sổ liền nhau cùng nhãn thành lượt nói, đặt tên theo thứ tự xuất hiện"""
+    names = {}
+    turns = []
+    for label, (start, end) in zip(labels.tolist(), spans.tolist()):
+        name = names.setdefault(label, f"S{len(names) + 1}")
+        if turns and turns[-1]["speaker"] == name and start - turns[-1]["end"] <= max_gap:
+            turns[-1]["end"] = round(end, 2)
+        else:
+            turns.append({"start": round(start, 2), "end": round(end, 2), "speaker": name})
+    return turns
+
+
+# ==========================
+# 🔗 Gắn nhãn người nói vào transcript
+# ==========================
+def speaker_at(turns, ends, start: float, end: float):
+    """Người nói chiếm nhiều thời gian nhất trong [start, end]; không giao nhau -> lượt gần nhất"""
+    i = bisect.bisect_right(ends, start)
+    overlap = {}
+    j = i
+    while j < len(turns) and turns[j]["start"] < end:
+        t = turns[j]
+        overlap[t["speaker"]] = overlap.get(t["speaker"], 0.0) + min(end, t["end"]) - max(start, t["start"])
+        j += 1
+    if overlap:
+        return max(overlap, key=overlap.get)
+
+    near = turns[max(0, i - 1):i + 1]
+    if not near:
+        return None
+    return min(near, key=lambda t: min(abs(t["start"] - end), abs(start - t["end"])))["speaker"]
+
+
+def assign_speakers(segments, turns):
+    """
+    Segment transcript (đã sắp theo thời gian) -> bản sao có "speaker" (và
+    "speaker" cho từng từ nếu có timestamp từ). Tra bằng bisect trên lượt nói
+    nên tổng chi phí ~ O((segment + lượt nói) log).
+    """
+    if not turns:
+        return list(segments)
+    ends = [t["end"] for t in turns]
+    out = []
+    for seg in segments:
+        seg = dict(seg, speaker=speaker_at(turns, ends, seg["start"], seg["end"]))
+        if seg.get("words"):
+            seg["words"] = [
+                dict(w, speaker=speaker_at(turns, ends, w["start"], w["end"])) for w in seg["words"]
+            ]
+        out.append(seg)
+    return out
+
+
+# ==========================
+# 🧵 Chạy song song với nhận dạng
+# ==========================
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def start_diarization(y, sr: int = SAMPLE_RATE, **kwargs):
+    """
+    Chạy diarize() trên thread nền (numpy nhả GIL trong phần nặng) trong khi
+    caller decode ASR; trả về Future -> turns. Giữ tracer hiện hành.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max(1, MAX_JOBS),
+                                           thread_name_prefix="stt-diarize")
+    context = contextvars.copy_context()
+    return _executor.submit(context.run, diarize, y, sr, **kwargs)
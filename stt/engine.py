@@ -0,0 +1,437 @@
+import itertools
+import threading
+import time
+import weakref
+from functools import lru_cache
+
+import numpy as np
+
+from stt.cache import chunk_key
+from stt.trace import current as current_tracer, span
+
+
+# ==========================
+# ⚙️ Ngưỡng fallback (giống whisper.transcribe)
+# ==========================
+TEMPERATURES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+DEFAULT_BATCH_SIZE = 8
+TIME_PRECISION = 0.02  # mỗi timestamp token của Whisper = 20ms
+RESULT_FORMAT = 3       # đổi khi cấu trúc result thay đổi -> không dùng lại cache cũ
+
+# = whisper.audio.SAMPLE_RATE / N_SAMPLES; torch + whisper chỉ được import
+# trong các hàm decode để import engine không tốn vài giây lúc mở trang
+SAMPLE_RATE = 16000
+N_SAMPLES = 30 * SAMPLE_RATE
+HOP_LENGTH = 160
+# chunk dài hơn một cửa sổ encoder sẽ bị split_windows cắt cứng ở mốc 30s (không seek,
+# không prompt) -> chunk_seconds không vượt quá giới hạn này
+MAX_CHUNK_SECONDS = N_SAMPLES // SAMPLE_RATE
+
+
+# ==========================
+# ✅ Chuẩn bị cửa sổ 30s
+# ==========================
+def _as_audio(chunk) -> np.ndarray:
+    """Đường dẫn file -> waveform 16kHz (qua ffmpeg); ndarray / MelChunk -> ndarray"""
+    if isinstance(chunk, str):
+        import whisper
+
+        return whisper.load_audio(chunk)
+    return np.asarray(chunk, dtype=np.float32)
+
+
+def split_windows(audio: np.ndarray, window_samples: int = N_SAMPLES):
+    """Chia một chunk thành các cửa sổ <= 30s (giới hạn của encoder Whisper)"""
+    return [audio[i:i + window_samples] for i in range(0, len(audio), window_samples)]
+
+
+def _iter_windows(indexed_chunks):
+    """yield (chunk index, offset của cửa sổ trong chunk (giây), cửa sổ)"""
+    for ci, chunk in indexed_chunks:
+        # MelChunk (stt.features) giữ nguyên: cửa sổ là slice của log-mel đã tính sẵn
+        audio = chunk if hasattr(chunk, "mel") else _as_audio(chunk)
+        for wi, window in enumerate(split_windows(audio)):
+            yield ci, wi * N_SAMPLES / SAMPLE_RATE, window
+
+
+def _mel_batch(model, windows):
+    import torch
+    import whisper
+
+    n_mels = model.dims.n_mels
+    mels = []
+    for w in windows:
+        # MelChunk: slice log-mel của cả tín hiệu, không tính lại STFT
+        mel = w.mel(n_mels) if hasattr(w, "mel") else None
+        if mel is not None:
+            mels.append(torch.from_numpy(mel))
+        else:
+            # np.array: cửa sổ có thể là view chỉ-đọc của memmap, torch cần buffer ghi được
+            audio = np.array(whisper.pad_or_trim(_as_audio(w)))
+            mels.append(whisper.log_mel_spectrogram(audio, n_mels))
+    return torch.stack(mels).to(model.device)
+
+
+# ==========================
+# 🧠 Batched decode
+# ==========================
+@lru_cache(maxsize=4)
+def _tokenizer(multilingual: bool, num_languages: int):
+    import whisper.tokenizer
+
+    return whisper.tokenizer.get_tokenizer(
+        multilingual, num_languages=num_languages, task="transcribe"
+    )
+
+
+def parse_segments(model, tokens, offset: float = 0.0, duration: float = 30.0,
+                   keep_tokens: bool = False):
+    """
+    Tách các segment từ timestamp token của một lần decode:
+    <|0.00|> text <|2.40|><|2.40|> text ... -> [{"start", "end", "text"}] (giây,
+    cộng thêm offset). Segment cuối không có timestamp đóng thì kết thúc ở duration.
+    keep_tokens: giữ thêm "tokens" của từng segment (cho add_words).
+    """
+    tokenizer = _tokenizer(model.is_multilingual, model.num_languages)
+    ts_begin = tokenizer.timestamp_begin
+
+    segments = []
+    start, text = 0.0, []
+
+    def close(end):
+        content = tokenizer.decode(text).strip()
+        if content:
+            segments.append({
+                "start": round(offset + min(start, duration), 3),
+                "end": round(offset + min(max(end, start), duration), 3),
+                "text": content,
+            })
+            if keep_tokens:
+                segments[-1]["tokens"] = list(text)
+
+    for tok in tokens:
+        if tok >= ts_begin:
+            t = (tok - ts_begin) * TIME_PRECISION
+            if text:
+                close(t)
+                text = []
+            start = t
+        elif tok < tokenizer.eot:
+            text.append(tok)
+
+    if text:
+        close(duration)
+    return segments
+
+
+def _needs_fallback(r) -> bool:
+    if r.compression_ratio > COMPRESSION_RATIO_THRESHOLD:
+        return True
+    if r.avg_logprob < LOGPROB_THRESHOLD:
+        # im lặng thật sự thì không cần decode lại
+        return not r.no_speech_prob > NO_SPEECH_THRESHOLD
+    return False
+
+
+def _is_silence(r) -> bool:
+    return r.no_speech_prob > NO_SPEECH_THRESHOLD and not r.avg_logprob > LOGPROB_THRESHOLD
+
+
+_decode_locks = weakref.WeakKeyDictionary()
+_decode_locks_guard = threading.Lock()
+
+
+def decode_lock(model) -> threading.Lock:
+    """
+    Lock riêng cho từng model: whisper cài kv-cache hook lên chính các module
+    của model trong mỗi lần decode, nên hai lần decode song song trên cùng một
+    model sẽ ghi đè cache của nhau. Mọi lời gọi decode/transcribe dùng chung
+    model phải giữ lock này.
+    """
+    with _decode_locks_guard:
+        lock = _decode_locks.get(model)
+        if lock is None:
+            lock = _decode_locks[model] = threading.Lock()
+        return lock
+
+
+def encode(model, mel):
+    """Encoder cho cả batch mel (B, n_mels, 3000) -> audio features"""
+    import torch
+
+    with span("encode", cat="model", batch=mel.shape[0]), torch.no_grad():
+        return model.embed_audio(mel)
+
+
+def decode_batch(model, mel, language=None, beam_size=None, features=None, prompt=None):
+    """
+    Decode một batch mel (B, n_mels, 3000): encoder chạy một lần cho cả batch
+    (hoặc dùng `features` đã encode), các phần tử decode lỗi (lặp từ / logprob
+    thấp) được decode lại với temperature cao hơn (giống model.transcribe)
+    trên audio features đã có. prompt: text đã chốt trước đó (xem stt.live).
+    """
+    import whisper
+
+    results = [None] * mel.shape[0]
+    pending = list(range(mel.shape[0]))
+
+    if features is None:
+        features = encode(model, mel)
+
+    for t in TEMPERATURES:
+        kwargs = {"language": language, "fp16": False, "temperature": t, "prompt": prompt or None}
+        if t == 0 and beam_size:
+            kwargs["beam_size"] = beam_size
+
+        with span("decode", cat="model", batch=len(pending), temperature=t) as args:
+            with decode_lock(model):
+                decoded = whisper.decode(
+                    model, features[pending], whisper.DecodingOptions(**kwargs)
+                )
+            if args is not None:
+                args["tokens"] = sum(len(r.tokens) for r in decoded)
+
+        retry = []
+        for idx, r in zip(pending, decoded):
+            results[idx] = r
+            if _needs_fallback(r):
+                retry.append(idx)
+
+        pending = retry
+        if not pending:
+            break
+
+    return results
+
+
+class _Encoded:
+    """
+    Model bọc quanh audio features đã có: whisper.timing gọi model(mel, tokens),
+    ở đây "mel" chính là features nên chỉ chạy decoder, không encode lại.
+    """
+
+    def __init__(self, model):
+        self._model = model
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+    def __call__(self, features, tokens):
+        return self._model.decoder(tokens, features)
+
+
+def add_words(model, features, segments, offset: float, num_samples: int):
+    """
+    Gắn "words" [{"word", "start", "end", "probability"}] (giây, tính từ đầu
+    chunk) cho các segment của một cửa sổ, bằng DTW trên cross-attention như
+    whisper.timing. Dùng lại audio features (n_ctx, n_state) của lần decode:
+    chỉ tốn thêm một lượt decoder. segments cần "tokens" (parse_segments(...,
+    keep_tokens=True)); start/end của segment được chỉnh theo từ đầu / cuối.
+    """
+    from whisper.timing import add_word_timestamps
+
+    segments = [seg for seg in segments if seg.get("tokens")]
+    if not segments:
+        return
+    for seg in segments:
+        seg["seek"] = round(offset * SAMPLE_RATE / HOP_LENGTH)  # -> offset thời gian của từ
+
+    with span("align", cat="model", segments=len(segments)), decode_lock(model):
+        add_word_timestamps(
+            segments=segments,
+            model=_Encoded(model),
+            tokenizer=_tokenizer(model.is_multilingual, model.num_languages),
+            mel=features,
+            num_frames=num_samples // HOP_LENGTH,
+            last_speech_timestamp=offset,
+        )
+
+    for seg in segments:
+        del seg["seek"], seg["tokens"]
+        seg["start"], seg["end"] = round(float(seg["start"]), 3), round(float(seg["end"]), 3)
+        for w in seg["words"]:
+            for key in ("start", "end", "probability"):
+                w[key] = round(float(w[key]), 3)
+
+
+def decode_windows(model, windows, language=None, beam_size=None, word_timestamps: bool = True,
+                   prompt=None):
+    """
+    mel -> encode -> decode cho một batch cửa sổ cùng ngôn ngữ; windows là list
+    (offset của cửa sổ trong chunk (giây), audio <= 30s). Trả về mỗi cửa sổ một
+    dict {"text", "language", "segments", "tokens"}; cửa sổ im lặng có text rỗng.
+    """
+    with span("mel", batch=len(windows)):
+        mel = _mel_batch(model, [w for _, w in windows])
+    features = encode(model, mel)
+    decoded = decode_batch(model, mel, language, beam_size, features, prompt)
+
+    out = []
+    for k, ((offset, w), r) in enumerate(zip(windows, decoded)):
+        item = {"text": "", "language": r.language, "segments": [], "tokens": len(r.tokens)}
+        if not _is_silence(r) and r.text.strip():
+            item["text"] = r.text.strip()
+            item["segments"] = parse_segments(
+                model, r.tokens, offset, len(w) / SAMPLE_RATE, keep_tokens=word_timestamps
+            )
+            if word_timestamps:
+                add_words(model, features[k], item["segments"], offset, len(w))
+        out.append(item)
+    return out
+
+
+def per_chunk_languages(language, n: int):
+    """language: None / mã ngôn ngữ / list theo từng chunk -> list độ dài n"""
+    if language is None or isinstance(language, str):
+        return [language] * n
+    return list(language)
+
+
+def cache_lookup(cache, chunks, model_name, language, beam_size, word_timestamps: bool = True):
+    """Trả về (keys, results): results[i] là kết quả đã cache hoặc None"""
+    keys = [None] * len(chunks)
+    results = [None] * len(chunks)
+    languages = per_chunk_languages(language, len(chunks))
+
+    if cache is not None:
+        for ci, chunk in enumerate(chunks):
+            if isinstance(chunk, str):
+                continue
+            keys[ci] = chunk_key(
+                chunk, model=model_name, language=languages[ci], beam_size=beam_size,
+                words=bool(word_timestamps), format=RESULT_FORMAT,
+            )
+            results[ci] = cache.get(keys[ci])
+
+    return keys, results
+
+
+def iter_transcribe_chunks(
+    model,
+    chunks,
+    language=None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    beam_size=None,
+    cache=None,
+    model_name=None,
+    recheck_every: int = 0,
+    word_timestamps: bool = True,
+):
+    """
+    Generator: nhận dạng nhiều chunk (đường dẫn file hoặc ndarray 16kHz) theo
+    batch và yield (index, result) theo đúng thứ tự chunk ngay khi chunk đó
+    decode xong. Chunk dài hơn 30s được tách thành nhiều cửa sổ rồi ghép lại.
+    result = {"text", "language", "segments"}; segments có start/end (giây)
+    tính từ đầu chunk, lấy từ timestamp token của Whisper; word_timestamps:
+    mỗi segment có thêm "words" (xem add_words) từ cùng lần decode.
+    Nếu có `cache` (TranscriptCache), chunk ndarray đã nhận dạng với cùng
+    model/tuỳ chọn được lấy lại từ cache, chỉ chunk còn thiếu mới vào model.
+    language=None (auto): nhận diện một lần trên vài cửa sổ rồi khoá cho mọi
+    chunk (xem stt.language); language cũng có thể là list theo từng chunk.
+    """
+    if language is None and getattr(model, "is_multilingual", False):
+        from stt.language import resolve_languages  # stt.language import engine
+
+        with span("detect_language"):
+            language = resolve_languages(model, chunks, recheck_every)
+    chunk_languages = per_chunk_languages(language, len(chunks))
+
+    with span("cache_lookup", chunks=len(chunks)):
+        keys, results = cache_lookup(
+            cache, chunks, model_name, chunk_languages, beam_size, word_timestamps
+        )
+
+    pending = [ci for ci, r in enumerate(results) if r is None]
+    texts = {ci: [] for ci in pending}
+    segments = {ci: [] for ci in pending}
+    languages = {}
+    emitted = 0
+    tracer = current_tracer()
+    started, tokens = {}, {}  # chỉ dùng khi bật trace: span cho từng chunk
+
+    def finish(ci):
+        if tracer is not None and ci in started:
+            tracer.add("chunk", started.pop(ci), time.perf_counter(), cat="chunk",
+                       index=ci, tokens=tokens.pop(ci, 0))
+        results[ci] = {
+            "text": " ".join(texts.pop(ci)),
+            "language": languages.get(ci),
+            "segments": segments.pop(ci),
+        }
+        if keys[ci] is not None:
+            cache.put(keys[ci], results[ci])
+
+    def ready():
+        nonlocal emitted
+        while emitted < len(results) and results[emitted] is not None:
+            yield emitted, results[emitted]
+            emitted += 1
+
+    yield from ready()
+
+    windows = _iter_windows((ci, chunks[ci]) for ci in pending)
+    open_chunks = iter(pending)
+    current = next(open_chunks, None)
+    while True:
+        batch = list(itertools.islice(windows, max(1, int(batch_size))))
+        if not batch:
+            break
+
+        # DecodingOptions chỉ nhận một ngôn ngữ -> decode theo nhóm ngôn ngữ trong batch
+        if tracer is not None:
+            now = time.perf_counter()
+            for ci, _, _ in batch:
+                started.setdefault(ci, now)
+
+        for lang in dict.fromkeys(chunk_languages[ci] for ci, _, _ in batch):
+            group = [item for item in batch if chunk_languages[item[0]] == lang]
+            decoded = decode_windows(
+                model, [(offset, w) for _, offset, w in group], lang, beam_size, word_timestamps
+            )
+            for (ci, _, _), d in zip(group, decoded):
+                if tracer is not None:
+                    tokens[ci] = tokens.get(ci, 0) + d["tokens"]
+                languages.setdefault(ci, d["language"])
+                if d["text"]:
+                    texts[ci].append(d["text"])
+                    segments[ci].extend(d["segments"])
+
+        # chunk đứng trước cửa sổ cuối của batch đã decode xong -> lưu + yield ngay
+        while current is not None and current < batch[-1][0]:
+            finish(current)
+            current = next(open_chunks, None)
+        yield from ready()
+
+    while current is not None:
+        finish(current)
+        current = next(open_chunks, None)
+    yield from ready()
+
+
+def with_timestamps(indexed_results, ranges, sr: int):
+    """(index, result) -> dict {"start", "end", "text", "language"} (giây), mỗi chunk một dict"""
+    for ci, result in indexed_results:
+        s0, s1 = ranges[ci]
+        yield {
+            "start": s0 / sr,
+            "end": s1 / sr,
+            "text": result.get("text", ""),
+            "language": result.get("language"),
+        }
+
+
+def transcribe_chunks(model, chunks, progress_callback=None, **kwargs):
+    """
+    Bản không-streaming của iter_transcribe_chunks.
+    Trả về list dict {"text", "language"} theo đúng thứ tự chunk.
+    """
+    results = []
+    for ci, result in iter_transcribe_chunks(model, chunks, **kwargs):
+        results.append(result)
+        if progress_callback is not None:
+            progress_callback(ci + 1, len(chunks))
+    return results
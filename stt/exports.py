@@ -0,0 +1,81 @@
+import json
+
+from stt.audio import format_timestamp
+
+
+# ==========================
+# 📝 Xuất transcript: TXT / SRT / VTT / JSON
+# ==========================
+def _speaker(seg) -> str:
+    """Tiền tố "S1: " nếu segment đã được gắn người nói (stt.diarize)"""
+    return f"{seg['speaker']}: " if seg.get("speaker") else ""
+
+
+def to_txt(segments) -> str:
+    """Định dạng gốc của trang Analysis: [mm:ss - mm:ss] text (kèm người nói nếu có)"""
+    return "\n".join(
+        f"[{format_timestamp(seg['start'])} - {format_timestamp(seg['end'])}] {_speaker(seg)}{seg['text']}"
+        for seg in segments
+    )
+
+
+def srt_timestamp(seconds: float, separator: str = ",") -> str:
+    ms = int(round(max(seconds, 0.0) * 1000))
+    h, ms = divmod(ms, 3_600_000)
+    m, ms = divmod(ms, 60_000)
+    s, ms = divmod(ms, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d}{separator}{ms:03d}"
+
+
+def _cues(segments):
+    for seg in segments:
+        text = (seg.get("text") or "").strip()
+        if text:
+            yield seg["start"], max(seg["end"], seg["start"]), text, seg.get("speaker")
+
+
+def to_srt(segments) -> str:
+    return "\n".join(
+        f"{i}\n{srt_timestamp(start)} --> {srt_timestamp(end)}\n"
+        f"{f'{speaker}: ' if speaker else ''}{text}\n"
+        for i, (start, end, text, speaker) in enumerate(_cues(segments), start=1)
+    )
+
+
+def to_vtt(segments) -> str:
+    """WebVTT: như SRT nhưng mili giây ngăn bằng dấu chấm, có header; người nói dùng thẻ <v>"""
+    cues = [
+        f"{srt_timestamp(start, '.')} --> {srt_timestamp(end, '.')}\n"
+        f"{f'<v {speaker}>' if speaker else ''}{text}\n"
+        for start, end, text, speaker in _cues(segments)
+    ]
+    return "\n".join(["WEBVTT\n", *cues])
+
+
+def to_json(result: dict) -> str:
+    return json.dumps(result, ensure_ascii=False, indent=2)
+
+
+def render(result: dict, fmt: str) -> str:
+    """
+    result: dict có "segments" (xem pipeline.transcribe_file). Mọi định dạng
+    lấy từ cùng segment của một lần decode; JSON giữ cả timestamp từng từ.
+    """
+    if fmt == "txt":
+        return to_txt(result["segments"])
+    if fmt == "srt":
+        return to_srt(result["segments"])
+    if fmt == "vtt":
+        return to_vtt(result["segments"])
+    if fmt == "json":
+        return to_json(result)
+    raise ValueError(f"Unknown output format {fmt!r}")
+
+
+FORMATS = ("txt", "srt", "vtt", "json")
+MIME_TYPES = {
+    "txt": "text/plain",
+    "srt": "application/x-subrip",
+    "vtt": "text/vtt",
+    "json": "application/json",
+}
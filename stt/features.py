@@ -0,0 +1,187 @@
+import os
+import threading
+
+import numpy as np
+
+from stt.cache import audio_hash
+from stt.config import CACHE_DIR, MEL_CACHE_MB
+from stt.engine import HOP_LENGTH, N_SAMPLES
+from stt.trace import span
+
+
+# ==========================
+# ⚙️ Tham số log-mel (giống whisper.audio)
+# ==========================
+N_FFT = 400
+N_FRAMES = N_SAMPLES // HOP_LENGTH   # 3000 frame cho một cửa sổ 30s
+LOG_FLOOR = -10.0                    # log10(1e-10): giá trị của frame im lặng / padding
+BLOCK_FRAMES = 6000                  # mỗi block STFT 60s audio
+
+_lock = threading.Lock()   # chỉ bảo vệ _path_locks
+_path_locks = {}
+
+
+def _path_lock(path: str) -> threading.Lock:
+    """Lock riêng cho từng file mel: chỉ các lần tính cùng audio / n_mels phải chờ nhau"""
+    with _lock:
+        return _path_locks.setdefault(path, threading.Lock())
+
+
+def _reflect_slice(y, start: int, end: int) -> np.ndarray:
+    """y đã pad reflect N_FFT // 2 mẫu hai đầu (như torch.stft center=True), lấy [start, end)"""
+    pad = N_FFT // 2
+    if start >= pad and end - pad <= len(y):
+        return np.array(y[start - pad:end - pad], dtype=np.float32)  # copy: torch cần buffer ghi được
+    idx = np.arange(start, end) - pad
+    idx = np.abs(idx)
+    idx = np.where(idx >= len(y), 2 * (len(y) - 1) - idx, idx)
+    return np.asarray(y, dtype=np.float32)[idx]
+
+
+def _log_mel_block(y, f0: int, f1: int, n_mels: int):
+    """log10 mel (chưa clamp / scale) cho frame [f0, f1) của cả tín hiệu"""
+    import torch
+    import whisper
+
+    audio = torch.from_numpy(_reflect_slice(y, f0 * HOP_LENGTH, (f1 - 1) * HOP_LENGTH + N_FFT))
+    stft = torch.stft(audio, N_FFT, HOP_LENGTH, window=torch.hann_window(N_FFT),
+                      center=False, return_complex=True)
+    mel = whisper.audio.mel_filters("cpu", n_mels) @ (stft.abs() ** 2)
+    return torch.clamp(mel, min=1e-10).log10().numpy()
+
+
+# ==========================
+# 🎛️ Log-mel của cả tín hiệu (float16, memmap)
+# ==========================
+class LogMel:
+    """
+    log10 mel (n_mels, n_frames) float16 của cả tín hiệu đã chuẩn hoá, tính
+    một lần theo block và lưu memmap trong CACHE_DIR/mel (khoá theo hash audio):
+    chunk / cửa sổ 30s chỉ là slice, trang phổ đồ đọc lại cùng mảng.
+    Bước clamp max-8 + scale của Whisper làm theo từng cửa sổ (window()).
+    """
+
+    def __init__(self, data: np.ndarray, audio):
+        self.data = data
+        self.audio = audio
+        self.n_mels = data.shape[0]
+
+    @classmethod
+    def compute(cls, y, n_mels: int = 80, key: str = None, cache_dir: str = CACHE_DIR):
+        n_frames = len(y) // HOP_LENGTH
+        if n_frames == 0:
+            return cls(np.full((n_mels, 0), LOG_FLOOR, dtype=np.float16), y)
+
+        key = key or audio_hash(y)
+        folder = os.path.join(cache_dir, "mel")
+        path = os.path.join(folder, f"{key}-{n_mels}.f16")
+        shape = (n_mels, n_frames)
+
+        with _path_lock(path):
+            if os.path.exists(path) and os.path.getsize(path) == n_mels * n_frames * 2:
+                os.utime(path)  # LRU theo mtime
+                return cls(np.memmap(path, dtype=np.float16, mode="r", shape=shape), y)
+
+            os.makedirs(folder, exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.part"
+            data = np.memmap(tmp, dtype=np.float16, mode="w+", shape=shape)
+            with span("log_mel", frames=n_frames, n_mels=n_mels):
+                for f0 in range(0, n_frames, BLOCK_FRAMES):
+                    f1 = min(f0 + BLOCK_FRAMES, n_frames)
+                    data[:, f0:f1] = _log_mel_block(y, f0, f1, n_mels)
+            data.flush()
+            del data
+            os.replace(tmp, path)
+            _evict(folder, keep=path)
+        return cls(np.memmap(path, dtype=np.float16, mode="r", shape=shape), y)
+
+    def window(self, start: int, n_samples: int) -> np.ndarray:
+        """
+        Input cho encoder (n_mels, 3000) float32 của audio [start, start + n_samples)
+        (mẫu), giống whisper.log_mel_spectrogram(pad_or_trim(audio)): phần sau
+        audio là LOG_FLOOR, rồi clamp theo max của cửa sổ - 8 và scale.
+        """
+        f0 = start // HOP_LENGTH
+        n = min(N_FRAMES, -(-n_samples // HOP_LENGTH), self.data.shape[1] - f0)
+        out = np.full((self.n_mels, N_FRAMES), LOG_FLOOR, dtype=np.float32)
+        out[:, :max(n, 0)] = self.data[:, f0:f0 + max(n, 0)]
+        np.maximum(out, out.max() - 8.0, out=out)
+        return (out + 4.0) / 4.0
+
+    def chunk(self, s0: int, s1: int) -> "MelChunk":
+        return MelChunk(self, s0, s1)
+
+    def overview(self, columns: int):
+        """Phổ đồ thu gọn (dB) ~columns cột: max theo nhóm frame, clamp 80 dB như Whisper"""
+        n = self.data.shape[1]
+        group = max(1, n // max(1, columns))
+        m = n // group
+        if m == 0:
+            return np.full((self.n_mels, 1), LOG_FLOOR * 10, dtype=np.float32)
+        pooled = np.asarray(self.data[:, :m * group], dtype=np.float32)
+        pooled = pooled.reshape(self.n_mels, m, group).max(axis=2) * 10.0
+        return np.maximum(pooled, pooled.max() - 80.0)
+
+
+class MelChunk:
+    """
+    Một đoạn [s0, s1) (mẫu) của tín hiệu kèm log-mel đã tính sẵn. Dùng thay
+    cho ndarray trong engine: len() / np.asarray() là audio (hash cache,
+    nhận diện ngôn ngữ), slice cho cửa sổ 30s, mel() cho encoder.
+    """
+
+    def __init__(self, features: LogMel, s0: int, s1: int):
+        self.features = features
+        self.s0 = int(s0)
+        self.s1 = int(s1)
+
+    @property
+    def audio(self):
+        return self.features.audio[self.s0:self.s1]
+
+    def __len__(self):
+        return self.s1 - self.s0
+
+    def __array__(self, dtype=None, copy=None):
+        return np.asarray(self.audio, dtype=dtype)
+
+    def __getitem__(self, item):
+        start, stop, step = item.indices(len(self))
+        if step != 1:
+            raise ValueError("MelChunk chỉ hỗ trợ slice liên tục")
+        return MelChunk(self.features, self.s0 + start, self.s0 + max(start, stop))
+
+    def mel(self, n_mels: int):
+        """
+        Input encoder (n_mels, 3000); None (engine tự tính từ audio) nếu số mel
+        khác model hoặc đoạn không bắt đầu đúng biên frame (ranges của VAD luôn đúng biên).
+        """
+        if n_mels != self.features.n_mels or self.s0 % HOP_LENGTH:
+            return None
+        return self.features.window(self.s0, len(self))
+
+
+def mel_chunks(y, ranges, n_mels: int = 80, key: str = None):
+    """Tính log-mel của cả y một lần, trả về MelChunk cho từng range (mẫu)"""
+    features = LogMel.compute(y, n_mels, key)
+    return [features.chunk(s0, s1) for s0, s1 in ranges]
+
+
+def _evict(folder: str, keep: str, max_mb: int = MEL_CACHE_MB):
+    """Giữ tổng dung lượng thư mục mel dưới max_mb, xoá file dùng lâu nhất trước"""
+    files = []
+    for name in os.listdir(folder):
+        path = os.path.join(folder, name)
+        if name.endswith(".f16") and path != keep:
+            stat = os.stat(path)
+            files.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in files) + os.path.getsize(keep)
+    for _, size, path in sorted(files):
+        if total <= max_mb * 1024 * 1024:
+            break
+        try:
+            os.remove(path)  # memmap đang mở vẫn đọc được trên Linux
+            total -= size
+        except OSError:
+            pass
@@ -0,0 +1,350 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+
+import numpy as np
+
+from stt.backends import model_id
+from stt.config import CACHE_DIR, MAX_JOBS
+from stt.diarize import assign_speakers, start_diarization
+from stt.engine import DEFAULT_BATCH_SIZE
+from stt.features import mel_chunks
+from stt.parallel import ParallelTranscriber
+from stt.scheduler import get_scheduler
+from stt.stitch import stitch
+from stt.trace import PROFILERS, Tracer, profiling
+
+
+ACTIVE = ("queued", "running")
+
+
+# ==========================
+# 🗂️ Job Speech-to-Text chạy nền
+# ==========================
+class JobManager:
+    """
+    Chạy transcription trong thread nền, tách khỏi vòng rerun của Streamlit.
+    Trạng thái job và từng đoạn đã decode được ghi vào SQLite ngay khi xong,
+    nên trang có thể poll / hiển thị lại sau khi refresh hoặc mất kết nối,
+    và job dở dang được chạy tiếp (bỏ qua các đoạn đã có) khi app khởi động lại.
+    Số job chạy đồng thời bị giới hạn bởi max_concurrent, còn lại xếp hàng.
+    """
+
+    def __init__(self, path: str = None, max_concurrent: int = MAX_JOBS, cache=None, archive=None,
+                 store=None):
+        path = path or os.path.join(CACHE_DIR, "jobs.sqlite")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        self.cache = cache
+        self.archive = archive  # stt.archive.TranscriptArchive: job xong thì lưu + đánh chỉ mục
+        self.store = store      # stt.storage.AudioStore: giữ audio của job tới khi job kết thúc
+        self._lock = threading.Lock()
+        self._cancelled = set()
+        # tối đa một pool process (mỗi worker giữ một model): đổi cấu hình thì pool cũ
+        # bị tắt ngay khi không còn job nào dùng
+        self._pool = None          # (key, ParallelTranscriber)
+        self._pool_users = {}      # ParallelTranscriber -> số job đang dùng
+        self._pools_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, int(max_concurrent)), thread_name_prefix="stt-job"
+        )
+
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                created REAL NOT NULL,
+                updated REAL NOT NULL,
+                total INTEGER NOT NULL,
+                done INTEGER NOT NULL DEFAULT 0,
+                audio_path TEXT,
+                options TEXT NOT NULL,
+                error TEXT,
+                trace TEXT,
+                speakers TEXT
+            );
+            CREATE TABLE IF NOT EXISTS job_segments (
+                job_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                start REAL NOT NULL,
+                end REAL NOT NULL,
+                text TEXT NOT NULL,
+                language TEXT,
+                segments TEXT,
+                PRIMARY KEY (job_id, idx)
+            );
+            """
+        )
+        # DB tạo bởi bản cũ: thêm các cột mới
+        for table, column in (("job_segments", "segments"), ("jobs", "trace"), ("jobs", "speakers")):
+            columns = {row[1] for row in self._db.execute(f"PRAGMA table_info({table})")}
+            if column not in columns:
+                self._db.execute(f"ALTER TABLE {table} ADD COLUMN {column} TEXT")
+        self._db.commit()
+        self._resume()
+
+    # ---------- SQLite helpers ----------
+    def _execute(self, sql, params=()):
+        with self._lock:
+            self._db.execute(sql, params)
+            self._db.commit()
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def _set_status(self, job_id, status, error=None):
+        self._execute(
+            "UPDATE jobs SET status = ?, error = ?, updated = ? WHERE id = ?",
+            (status, error, time.time(), job_id),
+        )
+
+    # ---------- API ----------
+    def submit(self, y: np.ndarray, sr: int, ranges, **options) -> str:
+        """
+        Tạo job cho các đoạn `ranges` (mẫu) của tín hiệu y.
+        options: model_size, backend, language, recheck_every, batch_size,
+        workers (>= 1: pool process riêng, kể cả 1 worker; 0: scheduler chung), threads,
+        trace (None / "spans" / "cprofile" / "torch"), diarize, num_speakers,
+        title / audio_hash / wav_path (thông tin lưu vào kho transcript),
+        audio_key (khoá trong AudioStore: audio không bị dọn khi job chưa xong).
+        """
+        job_id = uuid.uuid4().hex[:12]
+        options = dict(
+            options, sr=sr, duration=len(y) / sr, ranges=[[int(a), int(b)] for a, b in ranges]
+        )
+        audio_path = getattr(y, "filename", None)  # np.memmap -> chạy tiếp được sau restart
+
+        now = time.time()
+        self._execute(
+            "INSERT INTO jobs (id, status, created, updated, total, audio_path, options)"
+            " VALUES (?, 'queued', ?, ?, ?, ?, ?)",
+            (job_id, now, now, len(ranges), audio_path, json.dumps(options)),
+        )
+        if self.store is not None and options.get("audio_key"):
+            self.store.acquire(options["audio_key"], f"job:{job_id}")
+        self._executor.submit(self._run, job_id, y, options)
+        return job_id
+
+    def get(self, job_id: str):
+        rows = self._query(
+            "SELECT status, total, done, options, error, created, updated, trace, speakers"
+            " FROM jobs WHERE id = ?",
+            (job_id,),
+        )
+        if not rows:
+            return None
+
+        status, total, done, options, error, created, updated, trace, speakers = rows[0]
+        options = json.loads(options)
+        chunks = [
+            (idx, {
+                "text": text,
+                "language": language,
+                "segments": json.loads(segments) if segments else None,
+            })
+            for idx, text, language, segments in self._query(
+                "SELECT idx, text, language, segments FROM job_segments"
+                " WHERE job_id = ? ORDER BY idx",
+                (job_id,),
+            )
+        ]
+        # chunk chồng lấn -> cắt theo timestamp và bỏ từ lặp ở mối nối
+        segments = list(stitch(chunks, options["ranges"], options["sr"]))
+        if speakers:
+            segments = assign_speakers(segments, json.loads(speakers))
+        return {
+            "id": job_id,
+            "status": status,
+            "total": total,
+            "done": done,
+            "options": options,
+            "error": error,
+            "created": created,
+            "updated": updated,
+            "segments": segments,
+            "trace": json.loads(trace) if trace else None,
+        }
+
+    def cancel(self, job_id: str):
+        self._cancelled.add(job_id)
+
+    # ---------- Worker ----------
+    def _stream(self, y, ranges, options, session=None):
+        language = options.get("language")
+        recheck_every = int(options.get("recheck_every") or 0)
+        batch_size = options.get("batch_size", DEFAULT_BATCH_SIZE)
+        model_size = options.get("model_size", "base")
+        backend = options.get("backend", "fp32")
+
+        workers = int(options.get("workers") or 0)
+        if workers >= 1:
+            key = (model_size, workers, int(options.get("threads") or 1), backend)
+            # worker process tự tính mel: chỉ gửi audio
+            return self._parallel_stream(
+                key,
+                [y[s0:s1] for s0, s1 in ranges],
+                language=language,
+                batch_size=batch_size,
+                cache=self.cache,
+                recheck_every=recheck_every,
+            )
+
+        # job cùng model dùng chung một scheduler: cửa sổ của các job được gộp batch
+        scheduler = get_scheduler(model_size, backend)
+        return scheduler.iter_transcribe(
+            mel_chunks(y, ranges, scheduler.model.dims.n_mels, key=options.get("audio_key")),
+            session=session,
+            language=language,
+            cache=self.cache,
+            model_name=model_id(model_size, backend),
+            recheck_every=recheck_every,
+        )
+
+    def _parallel_stream(self, key, chunks, **kwargs):
+        pool = self._acquire_pool(key)
+        try:
+            yield from pool.iter_transcribe(chunks, **kwargs)
+        finally:
+            self._release_pool(pool)
+
+    def _acquire_pool(self, key):
+        """Pool cho key (size, workers, threads, backend); pool khác đang rảnh thì tắt trước khi tạo"""
+        with self._pools_lock:
+            if self._pool is None or self._pool[0] != key:
+                if self._pool is not None and not self._pool_users.get(self._pool[1]):
+                    self._pool[1].shutdown()
+                # pool cũ còn job dùng: job cuối cùng tắt nó (_release_pool)
+                self._pool = (key, ParallelTranscriber(key[0], key[1], key[2], key[3]))
+            pool = self._pool[1]
+            self._pool_users[pool] = self._pool_users.get(pool, 0) + 1
+            return pool
+
+    def _release_pool(self, pool):
+        with self._pools_lock:
+            users = self._pool_users.pop(pool) - 1
+            if users:
+                self._pool_users[pool] = users
+                return
+            retired = self._pool is None or self._pool[1] is not pool
+        if retired:
+            pool.shutdown()
+
+    def _run(self, job_id, y, options):
+        """options["trace"]: None / "spans" / "cprofile" / "torch" (xem stt.trace)"""
+        trace = options.get("trace")
+        if not trace:
+            status, error = self._process(job_id, y, options)
+            self._finish(job_id, options, status, error)
+            return
+
+        tracer = Tracer(f"job {job_id}")
+        try:
+            with tracer.activate(), profiling(tracer, trace if trace in PROFILERS else None):
+                with tracer.span("job", chunks=len(options["ranges"])):
+                    status, error = self._process(job_id, y, options)
+        except Exception as e:  # lỗi của chính profiler
+            status, error = "error", str(e)
+        # ghi trace trước khi đổi trạng thái -> trang thấy "done" là đã có trace
+        self._execute(
+            "UPDATE jobs SET trace = ? WHERE id = ?", (json.dumps(tracer.to_dict()), job_id)
+        )
+        self._finish(job_id, options, status, error)
+
+    def _finish(self, job_id, options, status, error):
+        self._set_status(job_id, status, error)
+        if self.store is not None and options.get("audio_key"):
+            self.store.release(options["audio_key"], f"job:{job_id}")
+
+    def _process(self, job_id, y, options):
+        """Chạy các đoạn còn thiếu, trả về (trạng thái cuối, lỗi)"""
+        try:
+            if job_id in self._cancelled:
+                return "cancelled", None
+            self._set_status(job_id, "running")
+
+            sr = options["sr"]
+            ranges = options["ranges"]
+            done = {row[0] for row in self._query(
+                "SELECT idx FROM job_segments WHERE job_id = ?", (job_id,)
+            )}
+            todo = [i for i in range(len(ranges)) if i not in done]
+
+            # diarization chạy song song với nhận dạng, trên cùng tín hiệu / log-mel
+            diarization = None
+            if options.get("diarize") and not self._query(
+                "SELECT 1 FROM jobs WHERE id = ? AND speakers IS NOT NULL", (job_id,)
+            ):
+                diarization = start_diarization(
+                    y, sr, num_speakers=options.get("num_speakers"), key=options.get("audio_key")
+                )
+
+            # huỷ giữa chừng: đóng stream ngay -> các cửa sổ / shard chưa chạy bị huỷ
+            stream = self._stream(y, [ranges[i] for i in todo], options, session=job_id)
+            with closing(stream):
+                for k, result in stream:
+                    if job_id in self._cancelled:
+                        return "cancelled", None
+
+                    i = todo[k]
+                    with self._lock:
+                        self._db.execute(
+                            "INSERT OR REPLACE INTO job_segments"
+                            " (job_id, idx, start, end, text, language, segments)"
+                            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            (job_id, i, ranges[i][0] / sr, ranges[i][1] / sr,
+                             (result.get("text") or "").strip(), result.get("language"),
+                             json.dumps(result.get("segments"), ensure_ascii=False)),
+                        )
+                        self._db.execute(
+                            "UPDATE jobs SET done = done + 1, updated = ? WHERE id = ?",
+                            (time.time(), job_id),
+                        )
+                        self._db.commit()
+
+            if diarization is not None:
+                self._execute(
+                    "UPDATE jobs SET speakers = ? WHERE id = ?",
+                    (json.dumps(diarization.result()), job_id),
+                )
+            if self.archive is not None:
+                self._archive(job_id)
+            return "done", None
+        except Exception as e:
+            return "error", str(e)
+
+    def _archive(self, job_id):
+        """Lưu transcript đã ghép (kèm người nói) của job vào kho tìm kiếm"""
+        job = self.get(job_id)
+        options = job["options"]
+        language = next((seg["language"] for seg in job["segments"] if seg.get("language")), None)
+        self.archive.add(
+            job_id,
+            job["segments"],
+            title=options.get("title"),
+            audio_hash=options.get("audio_hash"),
+            audio_path=options.get("wav_path"),
+            model=model_id(options.get("model_size", "base"), options.get("backend", "fp32")),
+            language=language,
+            duration=options.get("duration"),
+        )
+
+    def _resume(self):
+        """Chạy tiếp các job đang dở khi process trước bị dừng"""
+        for job_id, audio_path, options in self._query(
+            "SELECT id, audio_path, options FROM jobs WHERE status IN (?, ?)", ACTIVE
+        ):
+            if not audio_path or not os.path.exists(audio_path):
+                self._set_status(job_id, "error", "Audio của job không còn tồn tại")
+                continue
+
+            y = np.memmap(audio_path, dtype=np.float32, mode="r")
+            self._set_status(job_id, "queued")
+            self._executor.submit(self._run, job_id, y, json.loads(options))
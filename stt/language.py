@@ -0,0 +1,99 @@
+import numpy as np
+
+from stt.engine import DEFAULT_BATCH_SIZE, N_SAMPLES, _as_audio, _mel_batch, decode_lock
+
+
+# ==========================
+# ⚙️ Nhận diện ngôn ngữ một lần cho cả audio
+# ==========================
+DETECT_WINDOWS = 3     # số cửa sổ 30s bỏ phiếu cho mỗi khối
+MIN_CONFIDENCE = 0.6   # khối re-check chỉ đổi ngôn ngữ khi đủ chắc chắn
+
+
+def _rms(audio) -> float:
+    window = _as_audio(audio)[:N_SAMPLES]
+    return float(np.sqrt(np.mean(window ** 2))) if len(window) else 0.0
+
+
+def representative_chunks(chunks, indices, n: int = DETECT_WINDOWS):
+    """
+    Chọn n chunk có năng lượng cao nhất trong số các ứng viên cách đều
+    (tránh cửa sổ im lặng / chỉ có nhạc nền), giữ thứ tự thời gian.
+    """
+    indices = list(indices)
+    if len(indices) <= n:
+        return indices
+
+    step = max(1, len(indices) // (3 * n))
+    candidates = indices[::step]
+    loudest = sorted(candidates, key=lambda ci: _rms(chunks[ci]), reverse=True)[:n]
+    return sorted(loudest)
+
+
+def detection_plan(chunks, recheck_every: int = 0, n_windows: int = DETECT_WINDOWS):
+    """
+    Chia các chunk thành khối [start, end) kèm chunk đại diện của mỗi khối.
+    recheck_every = 0: một khối duy nhất cho cả audio.
+    """
+    block = int(recheck_every) if recheck_every and recheck_every > 0 else max(1, len(chunks))
+    return [
+        (start, min(start + block, len(chunks)),
+         representative_chunks(chunks, range(start, min(start + block, len(chunks))), n_windows))
+        for start in range(0, len(chunks), block)
+    ]
+
+
+def detect_probs(model, windows):
+    """Phân bố xác suất ngôn ngữ (dict) cho mỗi cửa sổ audio, một lần encoder cho cả batch"""
+    probs = []
+    for i in range(0, len(windows), DEFAULT_BATCH_SIZE):
+        mel = _mel_batch(model, windows[i:i + DEFAULT_BATCH_SIZE])
+        with decode_lock(model):
+            _, batch_probs = model.detect_language(mel)
+        probs.extend(batch_probs)
+    return probs
+
+
+def vote(prob_dicts):
+    """Cộng phân bố xác suất của các cửa sổ -> (ngôn ngữ, độ tin cậy trung bình)"""
+    if not prob_dicts:
+        return None, 0.0
+
+    total = {}
+    for probs in prob_dicts:
+        for lang, p in probs.items():
+            total[lang] = total.get(lang, 0.0) + p
+
+    lang = max(total, key=total.get)
+    return lang, total[lang] / len(prob_dicts)
+
+
+def resolve_languages(model, chunks, recheck_every: int = 0, detect=None):
+    """
+    Nhận diện ngôn ngữ trên vài cửa sổ có tiếng nói, bỏ phiếu rồi khoá ngôn ngữ
+    cho mọi chunk. recheck_every > 0: mỗi khối recheck_every chunk được bỏ phiếu
+    lại và chỉ đổi sang ngôn ngữ khác khi độ tin cậy >= MIN_CONFIDENCE
+    (cuộc họp nói xen kẽ nhiều thứ tiếng).
+    detect(windows) -> list dict xác suất; mặc định chạy detect_probs trên model.
+    Trả về list mã ngôn ngữ theo thứ tự chunk.
+    """
+    if not chunks:
+        return []
+
+    plan = detection_plan(chunks, recheck_every)
+    windows = [_as_audio(chunks[ci])[:N_SAMPLES] for _, _, reps in plan for ci in reps]
+    probs = detect(windows) if detect is not None else detect_probs(model, windows)
+
+    locked, _ = vote(probs)
+    languages = [locked] * len(chunks)
+
+    if len(plan) > 1:
+        pos = 0
+        for start, end, reps in plan:
+            lang, confidence = vote(probs[pos:pos + len(reps)])
+            pos += len(reps)
+            if lang and lang != locked and confidence >= MIN_CONFIDENCE:
+                languages[start:end] = [lang] * (end - start)
+
+    return languages
+
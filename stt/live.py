@@ -0,0 +1,465 @@
+"""
+Nhận dạng trực tiếp (live caption) từ nguồn audio tăng dần.
+
+Nguồn: micro (cần `pip install sounddevice`), file đang được ghi tiếp
+(WAV PCM16 / raw s16le 16kHz mono), socket TCP nhận PCM s16le 16kHz mono,
+hoặc phát lại một file có sẵn theo thời gian thực (test offline).
+
+Buffer audio cuộn, mỗi bước chỉ decode lại phần đuôi chưa ổn định và
+chốt các từ mà hai lần decode liên tiếp cho cùng kết quả (LocalAgreement-2).
+
+Chạy từ thư mục gốc repo:
+    python -m stt.live file demo.mp3 --realtime --model base --language vi
+    python -m stt.live mic --latency 2 -o live.srt
+    python -m stt.live listen --port 5005            # terminal 1
+    python -m stt.live send demo.mp3 --port 5005     # terminal 2
+    python -m stt.live follow recording.wav
+"""
+import argparse
+import os
+import queue
+import re
+import socket
+import struct
+import sys
+import threading
+import time
+
+import numpy as np
+
+from stt.audio import SAMPLE_RATE, normalize_audio_to_wav
+from stt.engine import decode_windows
+
+
+# ==========================
+# ⚙️ Tham số streaming
+# ==========================
+TARGET_LATENCY = 2.0    # giây: từ lúc nói tới lúc từ được chốt (ước lượng)
+BUFFER_SECONDS = 15.0   # buffer dài hơn mức này thì cắt ở từ đã chốt cuối cùng
+MAX_BUFFER_SECONDS = 28.0  # < 30s của encoder: quá mức này thì chốt hết phần đang có
+BLOCK_SECONDS = 0.1     # kích thước block đọc từ nguồn
+PROMPT_CHARS = 200      # text đã chốt đưa vào prompt cho lần decode sau
+DETECT_SECONDS = 2.0    # language=None: nhận diện một lần khi buffer đủ dài rồi khoá
+
+
+def _pcm16(buf: bytes) -> np.ndarray:
+    return np.frombuffer(buf, dtype="<i2").astype(np.float32) / 32768.0
+
+
+# ==========================
+# 🎤 Nguồn audio (yield block float32 16kHz mono)
+# ==========================
+def array_source(y, sr: int = SAMPLE_RATE, block_seconds: float = BLOCK_SECONDS,
+                 realtime: bool = False):
+    """Phát lại một tín hiệu có sẵn; realtime=True: nhả block đúng nhịp thời gian thực"""
+    block = max(1, int(block_seconds * sr))
+    t0 = time.perf_counter()
+    for start in range(0, len(y), block):
+        if realtime:
+            delay = t0 + start / sr - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        yield np.array(y[start:start + block], dtype=np.float32)
+
+
+def file_source(audio_path: str, block_seconds: float = BLOCK_SECONDS, realtime: bool = False):
+    """File có sẵn -> chuẩn hoá mono 16kHz như trang Analysis -> phát lại"""
+    wav_path, sr, y = normalize_audio_to_wav(audio_path)
+    raw_path = getattr(y, "filename", None)
+    try:
+        yield from array_source(y, sr, block_seconds, realtime)
+    finally:
+        del y
+        for path in (wav_path, raw_path):
+            if path and os.path.exists(path):
+                os.remove(path)
+
+
+def _wav_data_offset(f) -> int:
+    """Vị trí bắt đầu chunk "data" của WAV PCM16 mono 16kHz (raw s16le: 0)"""
+    head = f.read(12)
+    if head[:4] != b"RIFF" or head[8:12] != b"WAVE":
+        return 0
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            raise ValueError("WAV header chưa đầy đủ")
+        chunk_id, size = header[:4], struct.unpack("<I", header[4:])[0]
+        if chunk_id == b"data":
+            return f.tell()
+        body = f.read(size + (size & 1))
+        if chunk_id == b"fmt ":
+            fmt, channels, rate = struct.unpack("<HHI", body[:8])
+            bits = struct.unpack("<H", body[14:16])[0]
+            if (fmt, channels, rate, bits) != (1, 1, SAMPLE_RATE, 16):
+                raise ValueError(
+                    f"Cần WAV PCM16 mono {SAMPLE_RATE}Hz, file là "
+                    f"format={fmt} channels={channels} rate={rate} bits={bits}"
+                )
+
+
+def follow_source(path: str, block_seconds: float = BLOCK_SECONDS, poll: float = 0.2,
+                  idle_timeout: float = 5.0):
+    """File đang được ghi tiếp (như `tail -f`); dừng khi file không lớn thêm sau idle_timeout giây"""
+    block_bytes = max(2, int(block_seconds * SAMPLE_RATE) * 2)
+    with open(path, "rb") as f:
+        f.seek(_wav_data_offset(f))
+        idle_since = time.monotonic()
+        pending = b""
+        while True:
+            buf = f.read(block_bytes)
+            if buf:
+                idle_since = time.monotonic()
+                pending += buf
+                usable = len(pending) - len(pending) % 2
+                if usable:
+                    yield _pcm16(pending[:usable])
+                    pending = pending[usable:]
+            elif time.monotonic() - idle_since > idle_timeout:
+                return
+            else:
+                time.sleep(poll)
+
+
+def socket_source(port: int, host: str = "127.0.0.1", block_seconds: float = BLOCK_SECONDS):
+    """Nhận một kết nối TCP gửi PCM s16le 16kHz mono; kết thúc khi bên gửi đóng kết nối"""
+    block_bytes = max(2, int(block_seconds * SAMPLE_RATE) * 2)
+    with socket.create_server((host, port)) as server:
+        conn, _ = server.accept()
+        with conn:
+            pending = b""
+            while True:
+                buf = conn.recv(block_bytes)
+                if not buf:
+                    break
+                pending += buf
+                usable = len(pending) - len(pending) % 2
+                if usable:
+                    yield _pcm16(pending[:usable])
+                    pending = pending[usable:]
+
+
+def send_audio(audio_path: str, port: int, host: str = "127.0.0.1", realtime: bool = True):
+    """Phía gửi cho socket_source: chuẩn hoá file rồi gửi PCM s16le (mặc định đúng nhịp thời gian thực)"""
+    with socket.create_connection((host, port)) as conn:
+        for block in file_source(audio_path, realtime=realtime):
+            pcm = (np.clip(block, -1.0, 1.0) * 32767).astype("<i2")
+            conn.sendall(pcm.tobytes())
+
+
+def mic_source(block_seconds: float = BLOCK_SECONDS, device=None):
+    """Micro mặc định qua sounddevice (thư viện tuỳ chọn); dừng bằng Ctrl+C"""
+    try:
+        import sounddevice as sd
+    except ImportError as e:
+        raise RuntimeError("Nguồn micro cần thư viện sounddevice: pip install sounddevice") from e
+
+    blocks = queue.Queue()
+
+    def callback(indata, frames, time_info, status):
+        blocks.put(indata[:, 0].copy())
+
+    with sd.InputStream(samplerate=SAMPLE_RATE, channels=1, dtype="float32", device=device,
+                        blocksize=int(block_seconds * SAMPLE_RATE), callback=callback):
+        while True:
+            yield blocks.get()
+
+
+# ==========================
+# 🤝 LocalAgreement-2
+# ==========================
+def _norm(word: str) -> str:
+    return re.sub(r"[^\w]", "", word.lower())
+
+
+class HypothesisBuffer:
+    """
+    Giữ giả thuyết (list từ {"word", "start", "end"} theo giây tuyệt đối) của
+    lần decode trước; từ được chốt khi lần decode mới cho cùng tiền tố.
+    """
+
+    def __init__(self):
+        self.committed = []   # từ đã chốt còn nằm trong buffer audio
+        self.hypothesis = []  # đuôi chưa ổn định của lần decode trước
+        self.last_end = 0.0
+
+    def insert(self, words):
+        """Nhận giả thuyết mới, trả về các từ vừa được chốt"""
+        words = [w for w in words if w["start"] > self.last_end - 0.1]
+
+        # decode lại từ đầu buffer -> bỏ n-gram đầu trùng với đuôi đã chốt
+        if words and self.committed and abs(words[0]["start"] - self.last_end) < 1.0:
+            for n in range(min(len(self.committed), len(words), 5), 0, -1):
+                tail = [_norm(w["word"]) for w in self.committed[-n:]]
+                if tail == [_norm(w["word"]) for w in words[:n]]:
+                    words = words[n:]
+                    break
+
+        agreed = 0
+        while (agreed < len(words) and agreed < len(self.hypothesis)
+               and _norm(words[agreed]["word"]) == _norm(self.hypothesis[agreed]["word"])):
+            agreed += 1
+
+        commit = words[:agreed]
+        self.hypothesis = words[agreed:]
+        if commit:
+            self.committed.extend(commit)
+            self.last_end = commit[-1]["end"]
+        return commit
+
+    def flush(self):
+        """Hết audio: chốt luôn phần giả thuyết còn lại"""
+        commit, self.hypothesis = self.hypothesis, []
+        if commit:
+            self.committed.extend(commit)
+            self.last_end = commit[-1]["end"]
+        return commit
+
+    def drop_before(self, t: float):
+        self.committed = [w for w in self.committed if w["end"] > t]
+
+
+class LiveTranscriber:
+    """
+    Nhận block audio (push), decode lại buffer mỗi khi có thêm ~latency/2 giây
+    audio mới và trả về các từ đã chốt. Một từ cần xuất hiện giống nhau ở hai
+    lần decode liên tiếp nên độ trễ chốt ~ 2 bước + thời gian decode.
+    """
+
+    def __init__(self, model, language=None, latency: float = TARGET_LATENCY,
+                 buffer_seconds: float = BUFFER_SECONDS, beam_size=None):
+        self.model = model
+        self.language = language
+        self.step = max(0.3, latency / 2)
+        self.buffer_seconds = min(buffer_seconds, MAX_BUFFER_SECONDS)
+        self.beam_size = beam_size
+
+        self.audio = np.zeros(0, dtype=np.float32)
+        self.offset = 0.0       # thời điểm (giây) của mẫu đầu buffer
+        self.received = 0       # tổng số mẫu đã nhận
+        self.decoded_at = 0     # số mẫu đã nhận ở lần decode trước
+        self.arrivals = []      # (mẫu cuối của block, perf_counter lúc nhận)
+        self.words = HypothesisBuffer()
+        self.text = []          # mọi từ đã chốt
+
+    # ---------- audio ----------
+    def push(self, block) -> list:
+        """Thêm audio; đủ audio mới thì decode, trả về list từ vừa chốt"""
+        block = np.asarray(block, dtype=np.float32)
+        self.audio = np.concatenate([self.audio, block])
+        self.received += len(block)
+        self.arrivals.append((self.received, time.perf_counter()))
+
+        if (self.received - self.decoded_at) / SAMPLE_RATE < self.step:
+            return []
+        return self.process()
+
+    def finish(self) -> list:
+        """Nguồn đã hết: decode phần còn lại rồi chốt toàn bộ"""
+        committed = self.process() if self.received > self.decoded_at else []
+        return committed + self._commit(self.words.flush())
+
+    # ---------- decode ----------
+    def _prompt(self) -> str:
+        before = "".join(w["word"] for w in self.text if w["end"] <= self.offset)
+        return before[-PROMPT_CHARS:].strip()
+
+    def _detect_language(self):
+        from stt.language import detect_probs, vote
+
+        lang, _ = vote(detect_probs(self.model, [self.audio]))
+        return lang
+
+    def _decode(self):
+        """Decode cả buffer, trả về list từ với thời gian tuyệt đối"""
+        if self.language is None and getattr(self.model, "is_multilingual", False):
+            if len(self.audio) < DETECT_SECONDS * SAMPLE_RATE:
+                return []
+            self.language = self._detect_language()
+
+        window = decode_windows(self.model, [(self.offset, self.audio)], self.language,
+                                self.beam_size, prompt=self._prompt())[0]
+        return [w for seg in window["segments"] for w in seg.get("words", [])]
+
+    def process(self) -> list:
+        self.decoded_at = self.received
+        committed = self._commit(self.words.insert(self._decode()))
+
+        buffered = len(self.audio) / SAMPLE_RATE
+        if buffered > MAX_BUFFER_SECONDS:
+            # không có từ nào ổn định đủ lâu: chốt hết để buffer không vượt 30s
+            committed += self._commit(self.words.flush())
+        if buffered > self.buffer_seconds and self.words.last_end > self.offset:
+            self._trim(self.words.last_end)
+        elif buffered > MAX_BUFFER_SECONDS:
+            self._trim(self.offset + buffered - self.buffer_seconds)
+        return committed
+
+    def _trim(self, t: float):
+        """Bỏ audio trước thời điểm t (giây tuyệt đối)"""
+        cut = int((t - self.offset) * SAMPLE_RATE)
+        if cut <= 0:
+            return
+        self.audio = self.audio[cut:]
+        self.offset += cut / SAMPLE_RATE
+        self.words.drop_before(self.offset)
+
+    def _commit(self, words) -> list:
+        """Ghi lại từ đã chốt + độ trễ: từ lúc nhận mẫu cuối của từ tới lúc chốt"""
+        now = time.perf_counter()
+        for w in words:
+            end_sample = int(w["end"] * SAMPLE_RATE)
+            arrived = next((t for n, t in self.arrivals if n >= end_sample), now)
+            w["latency"] = round(now - arrived, 3)
+        if words:
+            self.text.extend(words)
+            oldest = int(self.offset * SAMPLE_RATE)
+            self.arrivals = [a for a in self.arrivals if a[0] >= oldest]
+        return words
+
+
+# ==========================
+# 🔁 Chạy trên một nguồn
+# ==========================
+def _background(source):
+    """Đọc nguồn ở thread riêng: decode chậm không làm rơi audio của micro / socket"""
+    blocks = queue.Queue()
+    done = object()
+
+    def reader():
+        try:
+            for block in source:
+                blocks.put(block)
+        finally:
+            blocks.put(done)
+
+    threading.Thread(target=reader, daemon=True, name="live-source").start()
+    while True:
+        block = blocks.get()
+        if block is done:
+            return
+        batch = [block]
+        # gom mọi block đã tới trong lúc decode -> một lần decode
+        while True:
+            try:
+                block = blocks.get_nowait()
+            except queue.Empty:
+                break
+            if block is done:
+                yield np.concatenate(batch)
+                return
+            batch.append(block)
+        yield np.concatenate(batch)
+
+
+def transcribe_stream(model, source, **kwargs):
+    """
+    Generator: yield mỗi lần có từ được chốt một segment
+    {"start", "end", "text", "language", "words", "latency"} (latency: max
+    của các từ). Ctrl+C dừng nguồn và chốt phần còn lại.
+    kwargs: language, latency, buffer_seconds, beam_size (xem LiveTranscriber).
+    """
+    live = LiveTranscriber(model, **kwargs)
+
+    def event(words):
+        return {
+            "start": words[0]["start"],
+            "end": words[-1]["end"],
+            "text": "".join(w["word"] for w in words).strip(),
+            "language": live.language,
+            "words": words,
+            "latency": max(w["latency"] for w in words),
+        }
+
+    try:
+        for block in _background(source):
+            words = live.push(block)
+            if words:
+                yield event(words)
+    except KeyboardInterrupt:
+        pass
+
+    words = live.finish()
+    if words:
+        yield event(words)
+
+
+# ==========================
+# 🚀 CLI
+# ==========================
+def main(argv=None):
+    from stt.backends import BACKENDS
+    from stt.config import BACKEND
+    from stt.exports import FORMATS, render
+    from stt.registry import get_registry
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    sub = parser.add_subparsers(dest="source", required=True)
+
+    p_mic = sub.add_parser("mic", help="Micro mặc định (cần sounddevice)")
+    p_mic.add_argument("--device", default=None)
+    p_file = sub.add_parser("file", help="Phát lại một file có sẵn")
+    p_file.add_argument("path")
+    p_file.add_argument("--realtime", action="store_true", help="Nhả audio đúng nhịp thời gian thực")
+    p_follow = sub.add_parser("follow", help="File WAV PCM16 / raw s16le đang được ghi tiếp")
+    p_follow.add_argument("path")
+    p_follow.add_argument("--idle-timeout", type=float, default=5.0)
+    p_listen = sub.add_parser("listen", help="Nhận PCM s16le 16kHz mono qua TCP")
+    p_send = sub.add_parser("send", help="Gửi một file tới `listen` (test offline)")
+    p_send.add_argument("path")
+    p_send.add_argument("--fast", action="store_true", help="Gửi nhanh nhất có thể")
+    for p in (p_listen, p_send):
+        p.add_argument("--host", default="127.0.0.1")
+        p.add_argument("--port", type=int, default=5005)
+
+    for p in (p_mic, p_file, p_follow, p_listen):
+        p.add_argument("--model", default="base")
+        p.add_argument("--backend", default=BACKEND, choices=list(BACKENDS))
+        p.add_argument("--language", default=None, help="vd. vi; bỏ trống để tự nhận diện")
+        p.add_argument("--latency", type=float, default=TARGET_LATENCY,
+                       help="Độ trễ mục tiêu (giây); nhỏ hơn = decode thường xuyên hơn")
+        p.add_argument("--buffer-seconds", type=float, default=BUFFER_SECONDS)
+        p.add_argument("-o", "--output", default=None,
+                       help=f"Ghi transcript khi kết thúc, định dạng theo đuôi ({', '.join(FORMATS)})")
+    args = parser.parse_args(argv)
+
+    if args.source == "send":
+        send_audio(args.path, args.port, args.host, realtime=not args.fast)
+        return 0
+
+    if args.source == "mic":
+        source = mic_source(device=args.device)
+    elif args.source == "file":
+        source = file_source(args.path, realtime=args.realtime)
+    elif args.source == "follow":
+        source = follow_source(args.path, idle_timeout=args.idle_timeout)
+    else:
+        print(f"Đang chờ kết nối tại {args.host}:{args.port}...", file=sys.stderr)
+        source = socket_source(args.port, args.host)
+
+    # cùng registry với load_whisper của trang Analysis
+    model = get_registry().get(args.model, args.backend)
+
+    segments, latencies = [], []
+    for seg in transcribe_stream(model, source, language=args.language, latency=args.latency,
+                                 buffer_seconds=args.buffer_seconds):
+        segments.append(seg)
+        latencies.extend(w["latency"] for w in seg["words"])
+        print(f"[{seg['start']:7.2f} - {seg['end']:7.2f}] (+{seg['latency']:.2f}s) {seg['text']}",
+              flush=True)
+
+    if latencies:
+        print(f"{len(latencies)} từ, độ trễ chốt p50 {np.percentile(latencies, 50):.2f}s, "
+              f"p90 {np.percentile(latencies, 90):.2f}s", file=sys.stderr)
+
+    if args.output:
+        fmt = os.path.splitext(args.output)[1].lstrip(".").lower() or "txt"
+        language = next((seg["language"] for seg in segments if seg["language"]), None)
+        result = {"source": args.source, "language": language, "segments": segments}
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(render(result, fmt))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+import multiprocessing as mp
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from stt.backends import build_model, model_id
+from stt.engine import DEFAULT_BATCH_SIZE, cache_lookup, per_chunk_languages, transcribe_chunks
+from stt.language import detect_probs, resolve_languages
+
+
+# ==========================
+# 👷 Worker process
+# ==========================
+_worker_model = None
+
+
+def _init_worker(model_size: str, threads: int, backend: str):
+    """Chạy một lần khi worker khởi động: giới hạn thread torch + load model"""
+    global _worker_model
+    import torch
+
+    torch.set_num_interop_threads(1)
+    _worker_model = build_model(model_size, backend, threads)
+
+
+def _ping():
+    return os.getpid()
+
+
+def _detect_probs(windows):
+    if not _worker_model.is_multilingual:
+        return None
+    return detect_probs(_worker_model, windows)
+
+
+def _transcribe_shard(chunks, language, batch_size, beam_size):
+    return transcribe_chunks(
+        _worker_model,
+        chunks,
+        language=language,
+        batch_size=batch_size,
+        beam_size=beam_size,
+    )
+
+
+SHARDS_PER_WORKER = 2  # số shard gửi trước cho mỗi worker (một đang chạy, một chờ sẵn)
+
+
+def default_split(cores: int = None):
+    """(workers, threads/worker) mặc định: 2 thread mỗi worker"""
+    cores = cores or os.cpu_count() or 1
+    threads = 2 if cores >= 4 else 1
+    return max(1, cores // threads), threads
+
+
+# ==========================
+# ⚡ Pool nhận dạng song song
+# ==========================
+class ParallelTranscriber:
+    """
+    Chia các chunk cho một pool process, mỗi process giữ một model riêng
+    (load một lần lúc khởi động pool). Kết quả được ghép lại theo thứ tự chunk.
+    """
+
+    def __init__(
+        self,
+        model_size: str = "base",
+        workers: int = 2,
+        threads_per_worker: int = 1,
+        backend: str = "fp32",
+    ):
+        self.model_size = model_size
+        self.backend = backend
+        self.workers = int(workers)
+        self.threads_per_worker = int(threads_per_worker)
+
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=mp.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_size, self.threads_per_worker, backend),
+        )
+        # mỗi lần submit khi chưa có worker rảnh sẽ spawn thêm một process
+        wait([self._pool.submit(_ping) for _ in range(self.workers)])
+
+    def iter_transcribe(
+        self,
+        chunks,
+        language=None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        beam_size=None,
+        cache=None,
+        recheck_every: int = 0,
+    ):
+        """Cùng giao diện với engine.iter_transcribe_chunks: yield (index, result) theo thứ tự"""
+        if language is None:
+            # nhận diện một lần ở một worker rồi khoá cho mọi shard
+            language = resolve_languages(
+                None,
+                chunks,
+                recheck_every,
+                detect=lambda windows: self._pool.submit(_detect_probs, windows).result() or [],
+            )
+
+        languages = per_chunk_languages(language, len(chunks))
+        keys, results = cache_lookup(
+            cache, chunks, model_id(self.model_size, self.backend), languages, beam_size
+        )
+        pending = [ci for ci, r in enumerate(results) if r is None]
+
+        # mỗi shard = một batch liên tiếp -> giữ được lợi ích batching trong worker
+        shard_size = max(1, int(batch_size))
+        shards = iter([pending[i:i + shard_size] for i in range(0, len(pending), shard_size)])
+        futures = {}
+
+        def submit_next():
+            # chỉ copy audio của shard lúc gửi -> hàng đợi của pool không giữ cả tín hiệu
+            shard = next(shards, None)
+            if shard is not None:
+                fut = self._pool.submit(
+                    _transcribe_shard,
+                    [np.asarray(chunks[ci]) for ci in shard],
+                    [languages[ci] for ci in shard],
+                    shard_size,
+                    beam_size,
+                )
+                futures[fut] = shard
+
+        for _ in range(SHARDS_PER_WORKER * self.workers):
+            submit_next()
+
+        emitted = 0
+        try:
+            while True:
+                # shard xong không theo thứ tự -> chỉ yield phần liền mạch từ đầu
+                while emitted < len(results) and results[emitted] is not None:
+                    yield emitted, results[emitted]
+                    emitted += 1
+                if not futures:
+                    break
+
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    shard = futures.pop(fut)
+                    for ci, r in zip(shard, fut.result()):
+                        results[ci] = r
+                        if keys[ci] is not None:
+                            cache.put(keys[ci], r)
+                    submit_next()
+        finally:
+            # đóng generator giữa chừng (huỷ job): bỏ các shard chưa chạy
+            for fut in futures:
+                fut.cancel()
+
+    def transcribe(self, chunks, progress_callback=None, **kwargs):
+        """Cùng giao diện và kết quả với engine.transcribe_chunks"""
+        results = []
+        for ci, result in self.iter_transcribe(chunks, **kwargs):
+            results.append(result)
+            if progress_callback is not None:
+                progress_callback(ci + 1, len(chunks))
+        return results
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,89 @@
+import os
+
+from stt.audio import normalize_audio_to_wav, chunk_signal
+from stt.diarize import assign_speakers, start_diarization
+from stt.engine import DEFAULT_BATCH_SIZE, MAX_CHUNK_SECONDS, iter_transcribe_chunks
+from stt.features import mel_chunks
+from stt.stitch import stitch
+from stt.vad import vad_chunks
+
+
+SEGMENTATIONS = ("vad", "fixed")
+
+
+# ==========================
+# 🔗 normalize -> chunk -> transcribe (không phụ thuộc Streamlit)
+# ==========================
+def segment(y, sr: int, chunk_seconds: int, segmentation: str = "vad", overlap_seconds: float = 0):
+    """
+    Ranges (mẫu) theo VAD hoặc cắt cố định như chunk_signal (có thể chồng lấn);
+    chunk_seconds bị giới hạn ở MAX_CHUNK_SECONDS (một cửa sổ encoder).
+    """
+    chunk_seconds = min(chunk_seconds, MAX_CHUNK_SECONDS)
+    if segmentation == "vad":
+        return vad_chunks(y, sr, chunk_seconds)
+    if segmentation == "fixed":
+        return chunk_signal(y, sr, chunk_seconds, overlap_seconds)
+    raise ValueError(f"Unknown segmentation {segmentation!r}, expected one of {SEGMENTATIONS}")
+
+
+def transcribe_signal(
+    model,
+    y,
+    sr: int,
+    *,
+    chunk_seconds: int = 30,
+    segmentation: str = "vad",
+    overlap_seconds: float = 0,
+    language=None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    cache=None,
+    model_name=None,
+    recheck_every: int = 0,
+):
+    """Generator: yield segment dict {"start", "end", "text", "language", "words"} theo thứ tự"""
+    ranges = segment(y, sr, chunk_seconds, segmentation, overlap_seconds)
+    # log-mel của cả tín hiệu tính một lần, mỗi chunk / cửa sổ chỉ là slice
+    chunks = mel_chunks(y, ranges, model.dims.n_mels)
+    stream = iter_transcribe_chunks(
+        model,
+        chunks,
+        language=language,
+        batch_size=batch_size,
+        cache=cache,
+        model_name=model_name,
+        recheck_every=recheck_every,
+    )
+    yield from stitch(stream, ranges, sr)
+
+
+def transcribe_file(model, audio_path: str, diarize: bool = False, num_speakers: int = None,
+                    **kwargs):
+    """
+    Chạy trọn pipeline cho một file, trả về
+    {"audio", "duration", "language", "segments"}.
+    diarize=True: phân biệt người nói song song với nhận dạng (stt.diarize),
+    mỗi segment có thêm "speaker".
+    File trung gian của bước chuẩn hoá được xoá khi xong.
+    """
+    wav_path, sr, y = normalize_audio_to_wav(audio_path)
+    raw_path = getattr(y, "filename", None)
+    try:
+        turns = start_diarization(y, sr, num_speakers=num_speakers) if diarize else None
+        segments = list(transcribe_signal(model, y, sr, **kwargs))
+        if turns is not None:
+            segments = assign_speakers(segments, turns.result())
+        duration = len(y) / sr
+    finally:
+        del y
+        for path in (wav_path, raw_path):
+            if path and os.path.exists(path):
+                os.remove(path)
+
+    language = next((seg["language"] for seg in segments if seg.get("language")), None)
+    return {
+        "audio": audio_path,
+        "duration": duration,
+        "language": language,
+        "segments": segments,
+    }
@@ -0,0 +1,128 @@
+import threading
+from collections import OrderedDict
+
+from stt.backends import build_model
+from stt.config import BACKEND, MODEL_MEMORY_MB, PRELOAD_MODELS, TORCH_THREADS
+from stt.trace import span
+
+
+MODEL_SIZES = ["tiny", "base", "small"]
+
+
+def model_nbytes(model) -> int:
+    """Ước lượng RAM của model từ state_dict (tính cả packed params int8)"""
+    total = 0
+    for value in model.state_dict().values():
+        tensors = value if isinstance(value, (tuple, list)) else (value,)
+        for t in tensors:
+            if hasattr(t, "element_size"):
+                total += t.numel() * t.element_size()
+    return total
+
+
+# ==========================
+# 📚 Registry model dùng chung trong process
+# ==========================
+class ModelRegistry:
+    """
+    Giữ các model đã nạp theo (size, backend), thread-safe.
+    Tổng RAM vượt max_mb thì bỏ model dùng lâu nhất (LRU);
+    model vừa được yêu cầu không bao giờ bị bỏ. Ai còn giữ model (scheduler)
+    đăng ký on_evict để nhả tham chiếu khi model bị bỏ.
+    """
+
+    def __init__(self, max_mb: int = MODEL_MEMORY_MB, backend: str = BACKEND, threads: int = TORCH_THREADS):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.backend = backend
+        self.threads = threads
+
+        self._models = OrderedDict()  # (size, backend) -> (model, nbytes)
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._evict_hooks = []
+        self._preload_thread = None
+
+    def get(self, model_size: str = "base", backend: str = None):
+        key = (model_size, backend or self.backend)
+
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key][0]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # mỗi key chỉ nạp một lần kể cả khi nhiều session gọi cùng lúc
+        with load_lock:
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    return self._models[key][0]
+
+            with span("model_load", model=key[0], backend=key[1]):
+                model = build_model(key[0], key[1], self.threads)
+
+            with self._lock:
+                self._models[key] = (model, model_nbytes(model))
+                evicted = self._evict(keep=key)
+                hooks = list(self._evict_hooks)
+            for evicted_key in evicted:
+                for hook in hooks:
+                    hook(evicted_key)
+            return model
+
+    def on_evict(self, hook):
+        """hook(key) được gọi (ngoài lock) sau khi model của key bị bỏ khỏi registry"""
+        with self._lock:
+            if hook not in self._evict_hooks:
+                self._evict_hooks.append(hook)
+
+    def _evict(self, keep):
+        total = sum(n for _, n in self._models.values())
+        evicted = []
+        for key in list(self._models):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= self._models.pop(key)[1]
+            evicted.append(key)
+        return evicted
+
+    def preload(self, sizes=PRELOAD_MODELS, background: bool = True):
+        """Nạp trước các size cấu hình; chạy nền một lần duy nhất cho mỗi process"""
+        def run():
+            for size in sizes:
+                self.get(size)
+
+        if not background:
+            run()
+            return None
+
+        with self._lock:
+            if self._preload_thread is None:
+                self._preload_thread = threading.Thread(
+                    target=run, name="stt-model-preload", daemon=True
+                )
+                self._preload_thread.start()
+        return self._preload_thread
+
+    def loaded(self):
+        """[(size, backend, MB)] theo thứ tự LRU -> MRU"""
+        with self._lock:
+            return [
+                (size, backend, round(n / (1024 * 1024), 1))
+                for (size, backend), (_, n) in self._models.items()
+            ]
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ModelRegistry:
+    """Registry singleton của process (dùng chung giữa các session Streamlit)"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
@@ -0,0 +1,277 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+
+from stt.config import BATCH_WAIT_MS
+from stt.engine import (
+    DEFAULT_BATCH_SIZE,
+    _iter_windows,
+    cache_lookup,
+    decode_windows,
+    per_chunk_languages,
+)
+from stt.registry import get_registry
+from stt.trace import current as current_tracer, span
+
+
+# ==========================
+# 🚦 Scheduler inference dùng chung model
+# ==========================
+class _Request:
+    __slots__ = ("session", "offset", "window", "key", "future", "tracer", "arrived")
+
+    def __init__(self, session, offset, window, key, tracer):
+        self.session = session
+        self.offset = offset
+        self.window = window
+        self.key = key          # (language, beam_size, word_timestamps): một batch chỉ một key
+        self.future = Future()
+        self.tracer = tracer
+        self.arrived = time.perf_counter()
+
+
+class InferenceScheduler:
+    """
+    Một thread duy nhất giữ model và chạy mọi lần decode: cửa sổ 30s của mọi
+    session được gom thành micro-batch (tối đa max_batch, chờ tối đa max_wait
+    giây kể từ cửa sổ cũ nhất), lấy xoay vòng mỗi session một cửa sổ để job
+    dài không chặn job ngắn. Kết quả trả về qua Future của từng cửa sổ.
+    """
+
+    def __init__(self, model, max_batch: int = DEFAULT_BATCH_SIZE,
+                 max_wait: float = BATCH_WAIT_MS / 1000):
+        self.model = model
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max(0.0, float(max_wait))
+        self.stats = {"batches": 0, "windows": 0, "shared_batches": 0}  # shared: > 1 session
+
+        self._queues = OrderedDict()  # session -> deque[_Request], thứ tự = lượt phục vụ
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._loop, name="stt-scheduler", daemon=True)
+        self._thread.start()
+
+    # ---------- API ----------
+    def submit(self, session, window, offset: float = 0.0, language=None, beam_size=None,
+               word_timestamps: bool = True) -> Future:
+        """Future -> dict {"text", "language", "segments", "tokens"} (xem engine.decode_windows)"""
+        req = _Request(session, offset, window, (language, beam_size, bool(word_timestamps)),
+                       current_tracer())
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Scheduler đã đóng")
+            self._queues.setdefault(session, deque()).append(req)
+            self._cond.notify()
+        return req.future
+
+    def pending(self) -> int:
+        with self._cond:
+            return sum(len(q) for q in self._queues.values())
+
+    def close(self, cancel: bool = True):
+        """
+        Không nhận thêm cửa sổ. cancel=True: huỷ hàng đợi và chờ batch đang chạy
+        xong; cancel=False: thread chạy nốt hàng đợi rồi tự dừng (không chờ).
+        """
+        with self._cond:
+            self._closed = True
+            if cancel:
+                for q in self._queues.values():
+                    for req in q:
+                        req.future.cancel()
+                self._queues.clear()
+            self._cond.notify_all()
+        if cancel and threading.current_thread() is not self._thread:
+            self._thread.join()
+
+    # ---------- Gom batch ----------
+    def _next_batch(self):
+        with self._cond:
+            while not self._queues:
+                if self._closed:
+                    return None
+                self._cond.wait()
+
+            # chờ thêm cửa sổ (của session khác) tới khi đủ batch hoặc hết max_wait
+            oldest = min(q[0].arrived for q in self._queues.values())
+            deadline = oldest + self.max_wait
+            while not self._closed:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0 or sum(len(q) for q in self._queues.values()) >= self.max_batch:
+                    break
+                self._cond.wait(remaining)
+            return self._pick()
+
+    def _pick(self):
+        """Xoay vòng: mỗi vòng lấy một cửa sổ của mỗi session (cùng key với cửa sổ đầu tiên)"""
+        batch, key = [], None
+        while len(batch) < self.max_batch:
+            taken = False
+            for session in list(self._queues):
+                q = self._queues[session]
+                while q and q[0].future.cancelled():
+                    q.popleft()
+                if q and key is None:
+                    key = q[0].key
+                if q and q[0].key == key:
+                    batch.append(q.popleft())
+                    taken = True
+                    # session vừa được phục vụ xuống cuối -> batch sau bắt đầu từ session khác
+                    self._queues.move_to_end(session)
+                if not q:
+                    del self._queues[session]
+                if len(batch) >= self.max_batch:
+                    break
+            if not taken:
+                break
+        return [req for req in batch if req.future.set_running_or_notify_cancel()]
+
+    # ---------- Worker ----------
+    def _loop(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            if batch:
+                self._run(batch)
+
+    def _run(self, batch):
+        language, beam_size, word_timestamps = batch[0].key
+        start = time.perf_counter()
+        tracers = list(dict.fromkeys(req.tracer for req in batch if req.tracer is not None))
+        sessions = len({req.session for req in batch})
+
+        try:
+            if tracers:
+                # span chi tiết (mel / encode / decode / align) ghi vào trace của cửa sổ đầu tiên
+                with tracers[0].activate(), span("scheduler_batch", cat="scheduler",
+                                                 batch=len(batch), sessions=sessions):
+                    results = self._decode(batch, language, beam_size, word_timestamps)
+            else:
+                results = self._decode(batch, language, beam_size, word_timestamps)
+        except Exception as e:
+            for req in batch:
+                req.future.set_exception(e)
+            return
+
+        end = time.perf_counter()
+        for tracer in tracers[1:]:
+            tracer.add("scheduler_batch", start, end, cat="scheduler",
+                       batch=len(batch), sessions=sessions)
+        self.stats["batches"] += 1
+        self.stats["windows"] += len(batch)
+        self.stats["shared_batches"] += sessions > 1
+        for req, result in zip(batch, results):
+            req.future.set_result(result)
+
+    def _decode(self, batch, language, beam_size, word_timestamps):
+        return decode_windows(
+            self.model, [(req.offset, req.window) for req in batch], language, beam_size,
+            word_timestamps,
+        )
+
+    # ---------- Cùng giao diện với engine.iter_transcribe_chunks ----------
+    def iter_transcribe(
+        self,
+        chunks,
+        session=None,
+        language=None,
+        beam_size=None,
+        cache=None,
+        model_name=None,
+        recheck_every: int = 0,
+        word_timestamps: bool = True,
+        batch_size=None,
+    ):
+        """
+        Generator: yield (index, result) theo thứ tự chunk như
+        engine.iter_transcribe_chunks, nhưng mọi cửa sổ đi qua scheduler
+        (batch_size bị bỏ qua: scheduler tự gom batch). Đóng generator giữa
+        chừng (huỷ job) = huỷ các cửa sổ chưa chạy.
+        """
+        if language is None and getattr(self.model, "is_multilingual", False):
+            from stt.language import resolve_languages
+
+            with span("detect_language"):
+                language = resolve_languages(self.model, chunks, recheck_every)
+        chunk_languages = per_chunk_languages(language, len(chunks))
+
+        with span("cache_lookup", chunks=len(chunks)):
+            keys, results = cache_lookup(
+                cache, chunks, model_name, chunk_languages, beam_size, word_timestamps
+            )
+
+        session = session if session is not None else object()
+        futures = {}
+        pending = [ci for ci, r in enumerate(results) if r is None]
+        tracer = current_tracer()
+        submitted = time.perf_counter()
+        try:
+            for ci, offset, window in _iter_windows((ci, chunks[ci]) for ci in pending):
+                futures.setdefault(ci, []).append(self.submit(
+                    session, window, offset, chunk_languages[ci], beam_size, word_timestamps
+                ))
+
+            for ci in range(len(chunks)):
+                if results[ci] is None:
+                    parts = [f.result() for f in futures.pop(ci, [])]
+                    if tracer is not None:
+                        # chunk: từ lúc gửi vào scheduler tới khi đủ kết quả (gồm thời gian chờ)
+                        tracer.add("chunk", submitted, time.perf_counter(), cat="chunk",
+                                   index=ci, tokens=sum(p["tokens"] for p in parts))
+                    results[ci] = {
+                        "text": " ".join(p["text"] for p in parts if p["text"]),
+                        "language": parts[0]["language"] if parts else None,
+                        "segments": [seg for p in parts for seg in p["segments"]],
+                    }
+                    if keys[ci] is not None:
+                        cache.put(keys[ci], results[ci])
+                yield ci, results[ci]
+        finally:
+            for fs in futures.values():
+                for f in fs:
+                    f.cancel()
+
+    def transcribe(self, chunks, progress_callback=None, **kwargs):
+        """Cùng giao diện và kết quả với engine.transcribe_chunks"""
+        results = []
+        for ci, result in self.iter_transcribe(chunks, **kwargs):
+            results.append(result)
+            if progress_callback is not None:
+                progress_callback(ci + 1, len(chunks))
+        return results
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def _drop_scheduler(key):
+    """
+    Registry vừa bỏ model của key: đóng và bỏ scheduler đang giữ model đó để
+    RAM được trả lại (job đang dùng vẫn nhận đủ kết quả rồi thread tự dừng).
+    """
+    with _schedulers_lock:
+        scheduler = _schedulers.pop(key, None)
+    if scheduler is not None:
+        scheduler.close(cancel=False)
+
+
+def get_scheduler(model_size: str = "base", backend: str = None) -> InferenceScheduler:
+    """
+    Scheduler của process cho (size, backend), dùng model trong registry.
+    Registry bỏ model thì scheduler tương ứng bị đóng và bỏ theo (không giữ
+    model ngoài hạn mức STT_MODEL_MEMORY_MB); nạp lại thì tạo scheduler mới.
+    """
+    registry = get_registry()
+    registry.on_evict(_drop_scheduler)
+    key = (model_size, backend or registry.backend)
+    model = registry.get(*key)
+    with _schedulers_lock:
+        scheduler = _schedulers.get(key)
+        if scheduler is None or scheduler.model is not model:
+            if scheduler is not None:
+                scheduler.close(cancel=False)  # job đang dùng vẫn nhận đủ kết quả
+            scheduler = _schedulers[key] = InferenceScheduler(model)
+        return scheduler
@@ -0,0 +1,116 @@
+import re
+
+
+# ==========================
+# ⚙️ Tham số ghép chunk chồng lấn
+# ==========================
+MAX_OVERLAP_WORDS = 12   # số từ tối đa so khớp ở mối nối
+EDGE_MARGIN = 0.5        # segment kết thúc sát mép chunk (giây) coi như bị cắt ngang
+EPS = 1e-3
+
+
+def _norm_words(words):
+    return [re.sub(r"[^\w]", "", w.lower()) for w in words]
+
+
+def drop_repeated_prefix(prev_text: str, text: str, max_words: int = MAX_OVERLAP_WORDS) -> str:
+    """Bỏ các từ đầu của text trùng với đuôi prev_text (chọn đoạn khớp dài nhất)"""
+    tail = _norm_words(prev_text.split()[-max_words:])
+    words = text.split()
+    head = _norm_words(words[:max_words])
+
+    for k in range(min(len(tail), len(head)), 0, -1):
+        if tail[-k:] == head[:k] and any(head[:k]):
+            return " ".join(words[k:])
+    return text
+
+
+def chunk_segments(result: dict, s0: int, s1: int, sr: int):
+    """Segment của một chunk theo thời gian tuyệt đối (giây)"""
+    offset = s0 / sr
+    language = result.get("language")
+    segments = result.get("segments")
+
+    if segments is None:
+        # result không có timestamp: cả chunk là một segment
+        segments = [{"start": 0.0, "end": (s1 - s0) / sr, "text": result.get("text", "")}]
+
+    out = []
+    for seg in segments:
+        if not seg["text"].strip():
+            continue
+        item = {
+            "start": round(offset + seg["start"], 3),
+            "end": round(offset + seg["end"], 3),
+            "text": seg["text"].strip(),
+            "language": language,
+        }
+        if "words" in seg:
+            item["words"] = [
+                dict(w, start=round(offset + w["start"], 3), end=round(offset + w["end"], 3))
+                for w in seg["words"]
+            ]
+        out.append(item)
+    return out
+
+
+def drop_words(seg: dict, text: str) -> dict:
+    """Segment với text đã bỏ các từ đầu; "words" bỏ cùng số từ, start dời theo từ đầu còn lại"""
+    dropped = len(seg["text"].split()) - len(text.split())
+    seg = dict(seg, text=text)
+    if seg.get("words") and dropped > 0:
+        seg["words"] = seg["words"][dropped:]
+        if seg["words"]:
+            seg["start"] = seg["words"][0]["start"]
+    return seg
+
+
+def trim_overlap(prev, nxt, prev_end: float, next_start: float):
+    """
+    Chia vùng chồng lấn [next_start, prev_end] giữa hai chunk liền nhau:
+    chunk trước giữ các segment bắt đầu trước điểm giữa vùng chồng lấn
+    (trừ segment bị cắt ngang ở mép mà chunk sau đã nghe trọn), chunk sau
+    chỉ giữ phần kết thúc sau những gì chunk trước đã giữ.
+    """
+    cut = (next_start + prev_end) / 2
+    keep = [
+        seg for seg in prev
+        if seg["start"] < cut
+        and not (seg["end"] > prev_end - EDGE_MARGIN and seg["start"] >= next_start)
+    ]
+    covered = max((seg["end"] for seg in keep), default=float("-inf"))
+    return keep, [seg for seg in nxt if seg["end"] > covered + EPS]
+
+
+# ==========================
+# 🧵 Ghép kết quả các chunk
+# ==========================
+def stitch(indexed_results, ranges, sr: int):
+    """
+    Generator: (index, result) theo thứ tự chunk -> segment dict
+    {"start", "end", "text", "language"} (giây, kèm "words" nếu result có).
+    Chunk chồng lấn với chunk trước được cắt theo timestamp, rồi bỏ các từ
+    lặp lại ở mối nối.
+    Chunk không chồng lấn giữ nguyên segment.
+    """
+    pending = None
+    for ci, result in indexed_results:
+        s0, s1 = ranges[ci]
+        segments = chunk_segments(result, s0, s1, sr)
+
+        if pending is not None:
+            pi, prev = pending
+            prev_end = ranges[pi][1]
+            if s0 < prev_end:
+                prev, segments = trim_overlap(prev, segments, prev_end / sr, s0 / sr)
+                if prev and segments:
+                    text = drop_repeated_prefix(prev[-1]["text"], segments[0]["text"])
+                    segments[0] = drop_words(segments[0], text)
+                    if not text:
+                        segments = segments[1:]
+            yield from prev
+
+        pending = (ci, segments)
+
+    if pending is not None:
+        yield from pending[1]
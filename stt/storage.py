@@ -0,0 +1,281 @@
+import hashlib
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from stt.audio import SAMPLE_RATE, normalize_audio_to_wav
+from stt.config import AUDIO_SESSION_TTL, AUDIO_STORE_MB, CACHE_DIR
+
+
+# ==========================
+# ⚙️ Tham số spool upload
+# ==========================
+SPOOL_BLOCK = 1024 * 1024   # đọc / hash / ghi upload theo block 1 MB
+PART_MAX_AGE = 24 * 3600    # file .part bỏ dở (process chết giữa chừng) quá 1 ngày thì xoá
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for entry in os.scandir(path):
+        if entry.is_file(follow_symlinks=False):
+            total += entry.stat().st_size
+    return total
+
+
+# ==========================
+# 📦 Kho audio theo hash nội dung
+# ==========================
+class AudioStore:
+    """
+    Mỗi upload được spool xuống đĩa theo block và hash cùng lúc, lưu trong
+    root/<hash>/ (upload<đuôi gốc>, audio.f32, audio.wav): upload trùng nội
+    dung dùng lại bản đã chuẩn hoá. Ai đang dùng audio (session, job) giữ một
+    tham chiếu trong SQLite (có hạn dùng cho session); khi vượt quota, các
+    audio không còn tham chiếu bị xoá theo thứ tự dùng lâu nhất trước.
+    """
+
+    def __init__(self, root: str = None, quota_mb: int = AUDIO_STORE_MB):
+        self.root = root or os.path.join(CACHE_DIR, "audio")
+        self.quota = int(quota_mb * 1024 * 1024)
+        self._tmp = os.path.join(self.root, "tmp")
+        os.makedirs(self._tmp, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._db = sqlite3.connect(os.path.join(self.root, "store.sqlite"), check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                name TEXT,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS refs (
+                key TEXT NOT NULL,
+                holder TEXT NOT NULL,
+                expires REAL,
+                PRIMARY KEY (key, holder)
+            );
+            """
+        )
+        self._db.commit()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    # ---------- Ghi ----------
+    def put(self, fileobj, name: str = "", holder: str = None, ttl: float = None) -> str:
+        """
+        Spool file-like (upload của Streamlit, file đang mở...) xuống đĩa theo
+        block SPOOL_BLOCK, hash blake2b trên đường đi; trả về khoá nội dung.
+        Nội dung đã có trong kho thì bỏ bản vừa ghi. holder: giữ tham chiếu
+        ngay (trước khi dọn quota) như acquire().
+        """
+        suffix = os.path.splitext(name)[1].lower()
+        h = hashlib.blake2b(digest_size=20)
+        with tempfile.NamedTemporaryFile(delete=False, dir=self._tmp, suffix=".part") as part:
+            while True:
+                block = fileobj.read(SPOOL_BLOCK)
+                if not block:
+                    break
+                h.update(block)
+                part.write(block)
+        key = h.hexdigest()
+
+        folder = self.path(key)
+        with self._key_lock(key):
+            if self.upload_path(key) is not None:
+                os.remove(part.name)  # cùng nội dung (có thể khác tên / đuôi): dùng bản cũ
+            else:
+                os.makedirs(folder, exist_ok=True)
+                os.replace(part.name, os.path.join(folder, "upload" + suffix))
+            self._touch(key, name)
+            if holder is not None:
+                # trong lock của key: cleanup kiểm tra lại tham chiếu dưới cùng lock trước khi xoá
+                self.acquire(key, holder, ttl)
+        self.cleanup()
+        return key
+
+    def normalized(self, key: str):
+        """
+        (wav_path, sr, y) của audio đã chuẩn hoá như normalize_audio_to_wav,
+        chỉ chuẩn hoá lần đầu với mỗi nội dung; y là memmap của audio.f32.
+        """
+        folder = self.path(key)
+        raw_path = os.path.join(folder, "audio.f32")
+        wav_path = os.path.join(folder, "audio.wav")
+        with self._key_lock(key):
+            created = not os.path.exists(raw_path)
+            if created:
+                upload = self.upload_path(key)
+                if upload is None:
+                    raise FileNotFoundError(f"Audio {key} không còn trong kho")
+                normalize_audio_to_wav(upload, SAMPLE_RATE, out_dir=folder)
+            self._touch(key)
+            n = os.path.getsize(raw_path) // 4
+            y = np.memmap(raw_path, dtype=np.float32, mode="r", shape=(n,)) if n else np.zeros(0, np.float32)
+        if created:
+            self.cleanup()  # ngoài lock của key: cleanup cũng lấy lock đó trước khi xoá
+        return wav_path, SAMPLE_RATE, y
+
+    def upload_path(self, key: str):
+        folder = self.path(key)
+        if not os.path.isdir(folder):
+            return None
+        for name in os.listdir(folder):
+            if name.startswith("upload") and not name.endswith(".part"):
+                return os.path.join(folder, name)
+        return None
+
+    # ---------- Tham chiếu ----------
+    def acquire(self, key: str, holder: str, ttl: float = None):
+        """holder (session / job) đang dùng key; ttl=None: giữ tới khi release"""
+        expires = time.time() + ttl if ttl else None
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO refs (key, holder, expires) VALUES (?, ?, ?)",
+                (key, holder, expires),
+            )
+            self._db.commit()
+
+    def release(self, key: str, holder: str):
+        with self._lock:
+            self._db.execute("DELETE FROM refs WHERE key = ? AND holder = ?", (key, holder))
+            self._db.commit()
+        self.cleanup()
+
+    def release_holder(self, holder: str, keep: str = None):
+        """Bỏ mọi tham chiếu của holder (vd. session vừa upload file khác), trừ keep"""
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM refs WHERE holder = ? AND key IS NOT ?", (holder, keep)
+            )
+            self._db.commit()
+
+    # ---------- Dọn dẹp ----------
+    def cleanup(self):
+        """
+        Xoá tham chiếu hết hạn và file .part bỏ dở (của upload trong tmp/ lẫn
+        của bước chuẩn hoá trong thư mục từng audio); nếu tổng dung lượng vượt
+        quota thì xoá audio không còn ai tham chiếu, dùng lâu nhất trước.
+        """
+        now = time.time()
+        self._sweep_parts(now)
+
+        with self._lock:
+            self._db.execute("DELETE FROM refs WHERE expires IS NOT NULL AND expires < ?", (now,))
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            victims = []
+            if total > self.quota:
+                for key, size in self._db.execute(
+                    "SELECT key, size FROM entries WHERE key NOT IN (SELECT key FROM refs)"
+                    " ORDER BY last_access ASC"
+                ).fetchall():
+                    if total <= self.quota:
+                        break
+                    victims.append(key)
+                    total -= size
+            self._db.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k in victims])
+            self._db.commit()
+
+        removed = []
+        for key in victims:
+            # cùng lock với put() / normalized(): không xoá thư mục đang được ghi lại;
+            # trong lúc chờ, audio có thể vừa được upload lại / giữ tham chiếu -> bỏ qua
+            with self._key_lock(key):
+                with self._lock:
+                    alive = self._db.execute(
+                        "SELECT 1 FROM entries WHERE key = ? UNION ALL SELECT 1 FROM refs WHERE key = ?",
+                        (key, key),
+                    ).fetchone()
+                if alive:
+                    continue
+                # memmap đang mở (job vừa xong, trang đang vẽ) vẫn đọc được trên Linux
+                shutil.rmtree(self.path(key), ignore_errors=True)
+            removed.append(key)
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+            referenced = self._db.execute("SELECT COUNT(DISTINCT key) FROM refs").fetchone()[0]
+        return {
+            "entries": entries,
+            "referenced": referenced,
+            "size_mb": round(size / (1024 * 1024), 2),
+            "quota_mb": round(self.quota / (1024 * 1024), 2),
+        }
+
+    # ---------- Nội bộ ----------
+    def _key_lock(self, key: str):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _sweep_parts(self, now: float):
+        """Xoá file .part quá PART_MAX_AGE (process chết giữa lúc spool / chuẩn hoá)"""
+        for folder in os.scandir(self.root):
+            if not folder.is_dir(follow_symlinks=False):
+                continue
+            try:
+                entries = list(os.scandir(folder.path))
+            except OSError:  # thư mục vừa bị cleanup khác xoá
+                continue
+            for entry in entries:
+                if folder.path == self._tmp or entry.name.endswith(".part"):
+                    try:
+                        if now - entry.stat().st_mtime > PART_MAX_AGE:
+                            os.remove(entry.path)
+                    except OSError:
+                        pass
+
+    def _touch(self, key: str, name: str = None):
+        """Cập nhật dung lượng thực tế của thư mục + thời điểm dùng cuối"""
+        size = _dir_size(self.path(key))
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO entries (key, name, size, created, last_access) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET size = excluded.size,"
+                " last_access = excluded.last_access, name = COALESCE(excluded.name, name)",
+                (key, name, size, now, now),
+            )
+            self._db.commit()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> AudioStore:
+    """Kho audio dùng chung của process (trang Analysis, Analysis_VN, JobManager)"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = AudioStore()
+        return _store
+
+
+def session_upload(fileobj, name: str, session: str, key: str = None,
+                   ttl: float = AUDIO_SESSION_TTL) -> str:
+    """
+    Upload của một session -> khoá trong kho: spool + dedup, giữ tham chiếu
+    của session (gia hạn mỗi lần gọi) và nhả audio session dùng trước đó.
+    key: khoá đã biết của upload này (rerun của Streamlit) -> không spool / hash lại.
+    """
+    store = get_store()
+    holder = f"session:{session}"
+    if key is None or store.upload_path(key) is None:
+        key = store.put(fileobj, name, holder, ttl)
+    else:
+        store.acquire(key, holder, ttl)
+    store.release_holder(holder, keep=key)
+    return key
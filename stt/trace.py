@@ -0,0 +1,187 @@
+import contextvars
+import json
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+
+# ==========================
+# ⏱️ Trace các bước của pipeline
+# ==========================
+PROFILERS = ("cprofile", "torch")
+
+_current = contextvars.ContextVar("stt_tracer", default=None)
+_NOOP = nullcontext()
+
+
+class Tracer:
+    """
+    Ghi span (tên, thời điểm bắt đầu, thời lượng, thread, tham số) cho từng
+    bước: chuẩn hoá, vẽ, phân đoạn, load model, mel / encode / decode từng batch,
+    từng chunk. Thời điểm tính theo epoch (µs) nên gộp được trace của trang
+    và của job chạy nền vào cùng một timeline.
+    """
+
+    def __init__(self, name: str = "stt"):
+        self.name = name
+        self.spans = []
+        self.profile = None
+        self._epoch = time.time()
+        self._perf = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def _us(self, t: float) -> int:
+        return int((self._epoch + (t - self._perf)) * 1e6)
+
+    def add(self, name: str, start: float, end: float, cat: str = "stage", **args):
+        """start/end: giá trị time.perf_counter()"""
+        span = {
+            "name": name,
+            "cat": cat,
+            "ts": self._us(start),
+            "dur": max(0, int((end - start) * 1e6)),
+            "tid": threading.current_thread().name,
+            "args": args,
+        }
+        with self._lock:
+            self.spans.append(span)
+
+    @contextmanager
+    def span(self, name: str, cat: str = "stage", **args):
+        """args có thể được bổ sung trong khối with (vd. số token)"""
+        start = time.perf_counter()
+        try:
+            yield args
+        finally:
+            self.add(name, start, time.perf_counter(), cat, **args)
+
+    @contextmanager
+    def activate(self):
+        """Đặt tracer hiện hành cho thread / context đang chạy"""
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "spans": list(self.spans), "profile": self.profile}
+
+
+def current():
+    return _current.get()
+
+
+def span(name: str, cat: str = "stage", **args):
+    """
+    Span trên tracer hiện hành; không bật trace thì trả về nullcontext dùng
+    chung (chỉ tốn một lần đọc ContextVar).
+    """
+    tracer = _current.get()
+    if tracer is None:
+        return _NOOP
+    return tracer.span(name, cat, **args)
+
+
+@contextmanager
+def _activate_span(tracer: Tracer, name: str, cat: str, args: dict):
+    with tracer.activate(), tracer.span(name, cat, **args) as span_args:
+        yield span_args
+
+
+def stage(tracer, name: str, cat: str = "stage", **args):
+    """Span trên tracer cho trước (None = tắt) và đặt nó làm tracer hiện hành trong khối with"""
+    if tracer is None:
+        return _NOOP
+    return _activate_span(tracer, name, cat, args)
+
+
+# ==========================
+# 🔬 Profiler tuỳ chọn
+# ==========================
+@contextmanager
+def profiling(tracer: Tracer, kind: str = None, limit: int = 30):
+    """Bọc khối code bằng cProfile hoặc torch.profiler, lưu bảng tóm tắt vào tracer.profile"""
+    if kind is None:
+        yield
+        return
+    if kind not in PROFILERS:
+        raise ValueError(f"Unknown profiler {kind!r}, expected one of {PROFILERS}")
+
+    if kind == "cprofile":
+        import cProfile
+        import io
+        import pstats
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+            tracer.profile = out.getvalue()
+        return
+
+    import torch
+
+    prof = torch.profiler.profile(activities=[torch.profiler.ProfilerActivity.CPU])
+    try:
+        with prof:
+            yield
+    finally:
+        tracer.profile = prof.key_averages().table(sort_by="cpu_time_total", row_limit=limit)
+
+
+# ==========================
+# 📤 Tổng hợp + export
+# ==========================
+def summarize(spans):
+    """Gộp theo tên span: số lần, tổng / trung bình / max (ms), tổng token"""
+    rows = {}
+    for s in spans:
+        row = rows.setdefault(s["name"], {"span": s["name"], "count": 0, "total_ms": 0.0,
+                                          "max_ms": 0.0, "tokens": 0})
+        ms = s["dur"] / 1000
+        row["count"] += 1
+        row["total_ms"] += ms
+        row["max_ms"] = max(row["max_ms"], ms)
+        row["tokens"] += int(s["args"].get("tokens", 0))
+
+    for row in rows.values():
+        row["mean_ms"] = row["total_ms"] / row["count"]
+        for key in ("total_ms", "mean_ms", "max_ms"):
+            row[key] = round(row[key], 1)
+    return sorted(rows.values(), key=lambda r: r["total_ms"], reverse=True)
+
+
+def to_json(traces) -> str:
+    """traces: list dict từ Tracer.to_dict()"""
+    return json.dumps(traces, ensure_ascii=False, indent=2)
+
+
+def to_chrome_trace(traces) -> str:
+    """Định dạng Trace Event (mở bằng chrome://tracing hoặc Perfetto)"""
+    events = []
+    tids = {}
+    for pid, trace in enumerate(traces, start=1):
+        events.append({"name": "process_name", "ph": "M", "pid": pid, "tid": 0,
+                       "args": {"name": trace["name"]}})
+        for s in trace["spans"]:
+            key = (pid, s["tid"])
+            if key not in tids:
+                tids[key] = len(tids) + 1
+                events.append({"name": "thread_name", "ph": "M", "pid": pid,
+                               "tid": tids[key], "args": {"name": s["tid"]}})
+            events.append({
+                "name": s["name"],
+                "cat": s["cat"],
+                "ph": "X",
+                "ts": s["ts"],
+                "dur": s["dur"],
+                "pid": pid,
+                "tid": tids[key],
+                "args": s["args"],
+            })
+    return json.dumps({"traceEvents": events})
@@ -0,0 +1,151 @@
+import numpy as np
+
+from stt.audio import chunk_signal
+from stt.engine import MAX_CHUNK_SECONDS
+
+
+# ==========================
+# ⚙️ Tham số VAD mặc định
+# ==========================
+FRAME_MS = 30            # 30ms @ 16kHz = 480 mẫu (bội của hop 160 của Whisper)
+MIN_SPEECH_MS = 250      # bỏ các đoạn "nói" ngắn hơn (tiếng click, gõ bàn)
+MIN_SILENCE_MS = 300     # khoảng lặng ngắn hơn được coi là một phần câu nói
+PAD_MS = 150             # nới rộng mỗi đoạn nói để không cắt mất phụ âm đầu/cuối
+ENERGY_MARGIN_DB = 12.0  # ngưỡng = nền nhiễu + margin
+SILENCE_DB = -60.0       # frame to nhất vẫn dưới mức này: cả file coi như im lặng
+
+
+# ==========================
+# 📊 Đặc trưng theo frame (vectorized)
+# ==========================
+def frame_features(y: np.ndarray, sr: int, frame_ms: int = FRAME_MS):
+    """Năng lượng (dB) và zero-crossing rate của từng frame không chồng lấn"""
+    hop = int(sr * frame_ms / 1000)
+    n = len(y) // hop
+    if n == 0:
+        return hop, np.zeros(0), np.zeros(0)
+
+    frames = y[: n * hop].reshape(n, hop)  # view, không copy
+    energy_db = 10.0 * np.log10(np.mean(np.square(frames, dtype=np.float64), axis=1) + 1e-10)
+    zcr = np.count_nonzero(np.diff(np.signbit(frames), axis=1), axis=1) / hop
+    return hop, energy_db, zcr
+
+
+def _runs(mask: np.ndarray):
+    """Các đoạn liên tiếp True -> mảng (start, end) theo chỉ số frame"""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+# ==========================
+# 🗣️ Phát hiện vùng có tiếng nói
+# ==========================
+def detect_speech(
+    y: np.ndarray,
+    sr: int,
+    frame_ms: int = FRAME_MS,
+    min_speech_ms: int = MIN_SPEECH_MS,
+    min_silence_ms: int = MIN_SILENCE_MS,
+    pad_ms: int = PAD_MS,
+    margin_db: float = ENERGY_MARGIN_DB,
+):
+    """
+    VAD năng lượng + zero-crossing với ngưỡng thích nghi theo nền nhiễu.
+    Trả về list (start, end) theo mẫu của các vùng có tiếng nói.
+    """
+    hop, energy_db, zcr = frame_features(y, sr, frame_ms)
+    if energy_db.size == 0:
+        return []
+
+    # không vượt trung vị: audio không có đoạn yên (nói liên tục trên nền nhạc,
+    # cuộc gọi nhiễu) thì nền nhiễu ~ mức nói và ngưỡng sẽ không frame nào qua
+    noise_floor = np.percentile(energy_db, 10)
+    threshold = max(noise_floor + margin_db, energy_db.max() - 60.0)
+    threshold = min(threshold, np.median(energy_db))
+
+    # phụ âm xát (s, x, ph) năng lượng thấp nhưng ZCR cao
+    speech = (energy_db > threshold) | (
+        (energy_db > threshold - margin_db / 2) & (zcr > 0.25)
+    )
+
+    # lấp khoảng lặng ngắn
+    starts, ends = _runs(~speech)
+    min_silence = max(1, min_silence_ms // frame_ms)
+    for s, e in zip(starts, ends):
+        if s > 0 and e < len(speech) and e - s < min_silence:
+            speech[s:e] = True
+
+    # bỏ đoạn nói quá ngắn
+    starts, ends = _runs(speech)
+    keep = (ends - starts) >= max(1, min_speech_ms // frame_ms)
+    starts, ends = starts[keep], ends[keep]
+
+    pad = pad_ms // frame_ms
+    total = len(y)
+    regions = []
+    for s, e in zip(starts, ends):
+        s0 = int(max(0, (s - pad) * hop))
+        s1 = int(min(total, (e + pad) * hop))
+        if regions and s0 <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], s1)
+        else:
+            regions.append((s0, s1))
+
+    return regions
+
+
+def _split_long(start: int, end: int, max_len: int, energy_db: np.ndarray, hop: int):
+    """Cắt vùng nói dài hơn max_len tại frame yên nhất ở nửa sau mỗi đoạn"""
+    pieces = []
+    while end - start > max_len:
+        lo = (start + max_len // 2) // hop
+        hi = (start + max_len) // hop
+        cut = (lo + int(np.argmin(energy_db[lo:hi]))) * hop if hi > lo else start + max_len
+        cut = max(cut, start + hop)
+        pieces.append((start, cut))
+        start = cut
+    pieces.append((start, end))
+    return pieces
+
+
+# ==========================
+# ✂️ Gom vùng nói thành chunk
+# ==========================
+def vad_chunks(y: np.ndarray, sr: int, max_seconds: int, **vad_kwargs):
+    """
+    Thay cho chunk_signal: bỏ khoảng lặng, gom các vùng nói liên tiếp thành
+    chunk dài tối đa max_seconds, ranh giới rơi vào chỗ ngắt nghỉ tự nhiên.
+    Không tìm được vùng nói nào mà tín hiệu không im lặng (tín hiệu đều,
+    không có khoảng nghỉ) thì cắt cố định như chunk_signal.
+    max_seconds không vượt quá cửa sổ encoder (MAX_CHUNK_SECONDS): vùng nói dài
+    được cắt ở frame yên nhất thay vì để engine cắt cứng ở mốc 30s.
+    """
+    max_seconds = min(max_seconds, MAX_CHUNK_SECONDS)
+    max_len = int(max_seconds * sr)
+    regions = detect_speech(y, sr, **vad_kwargs)
+    hop, energy_db, _ = frame_features(y, sr, vad_kwargs.get("frame_ms", FRAME_MS))
+    if not regions:
+        if energy_db.size and energy_db.max() > SILENCE_DB:
+            return chunk_signal(y, sr, max_seconds)
+        return regions
+    if max_len <= 0:
+        return regions
+
+    pieces = []
+    for s0, s1 in regions:
+        pieces.extend(_split_long(s0, s1, max_len, energy_db, hop))
+
+    ranges = [pieces[0]]
+    for s0, s1 in pieces[1:]:
+        if s1 - ranges[-1][0] <= max_len:
+            ranges[-1] = (ranges[-1][0], s1)
+        else:
+            ranges.append((s0, s1))
+
+    return ranges
+
+
+def speech_ratio(ranges, total_samples: int) -> float:
+    if total_samples <= 0:
+        return 0.0
+    return sum(s1 - s0 for s0, s1 in ranges) / total_samples
@@ -0,0 +1,116 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+# ==========================
+# ⚙️ Tham số hiển thị
+# ==========================
+SCREEN_WIDTH = 1200   # số cột / bin tối đa cần vẽ (~ độ phân giải màn hình)
+BASE_BIN = 64         # số mẫu mỗi bin ở tầng đáy của pyramid
+LEVEL_FACTOR = 4      # mỗi tầng gộp 4 bin của tầng dưới
+CACHE_ENTRIES = 16
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _cached(key, compute):
+    """LRU nhỏ trong process, khoá theo hash audio + tham số"""
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    value = compute()
+
+    with _cache_lock:
+        _cache[key] = value
+        while len(_cache) > CACHE_ENTRIES:
+            _cache.popitem(last=False)
+    return value
+
+
+# ==========================
+# 📈 Envelope min/max nhiều tầng
+# ==========================
+def envelope_pyramid(y: np.ndarray, base_bin: int = BASE_BIN, factor: int = LEVEL_FACTOR):
+    """
+    Tầng 0: min/max mỗi base_bin mẫu (reshape view, không vòng lặp Python).
+    Tầng k+1: gộp factor bin của tầng k. Trả về list (mins, maxs, samples_per_bin).
+    """
+    n = len(y) // base_bin
+    if n == 0:
+        y = np.asarray(y, dtype=np.float32)
+        return [(y.copy(), y.copy(), 1)]
+
+    frames = y[: n * base_bin].reshape(n, base_bin)
+    levels = [(frames.min(axis=1), frames.max(axis=1), base_bin)]
+
+    while len(levels[-1][0]) >= factor * 2:
+        mins, maxs, spb = levels[-1]
+        m = len(mins) // factor
+        levels.append((
+            mins[: m * factor].reshape(m, factor).min(axis=1),
+            maxs[: m * factor].reshape(m, factor).max(axis=1),
+            spb * factor,
+        ))
+    return levels
+
+
+def envelope(levels, width: int = SCREEN_WIDTH):
+    """Chọn tầng thô nhất còn >= width bin rồi gộp tiếp về ~width cột"""
+    mins, maxs, spb = levels[0]
+    for lv in levels:
+        if len(lv[0]) >= width:
+            mins, maxs, spb = lv
+
+    group = max(1, len(mins) // width)
+    m = len(mins) // group
+    if group > 1:
+        mins = mins[: m * group].reshape(m, group).min(axis=1)
+        maxs = maxs[: m * group].reshape(m, group).max(axis=1)
+    return mins, maxs, spb * group
+
+
+def waveform_envelope(y: np.ndarray, key: str, width: int = SCREEN_WIDTH):
+    levels = _cached((key, "pyramid"), lambda: envelope_pyramid(y))
+    return envelope(levels, width)
+
+
+# ==========================
+# 📊 Mel spectrogram thu gọn
+# ==========================
+def mel_overview(features, key: str, columns: int = SCREEN_WIDTH):
+    """
+    Log-mel (dB) ~`columns` cột từ stt.features.LogMel: dùng lại đúng mảng
+    log-mel đưa vào encoder (memmap), chỉ gộp max theo nhóm frame.
+    """
+    return _cached((key, "mel", features.n_mels, columns), lambda: features.overview(columns))
+
+
+# ==========================
+# 🎨 Vẽ bằng matplotlib (số điểm cố định)
+# ==========================
+def plot_waveform(y: np.ndarray, sr: int, key: str, ax, width: int = SCREEN_WIDTH):
+    mins, maxs, spb = waveform_envelope(y, key, width)
+    t = (np.arange(len(mins)) + 0.5) * spb / sr
+    ax.fill_between(t, mins, maxs, linewidth=0.5)
+    ax.set_xlim(0, len(y) / sr)
+    ax.set_xlabel("Time (seconds)")
+    ax.set_ylabel("Amplitude")
+
+
+def plot_mel(features, duration: float, key: str, ax, columns: int = SCREEN_WIDTH):
+    mel_db = mel_overview(features, key, columns)
+    img = ax.imshow(
+        mel_db,
+        origin="lower",
+        aspect="auto",
+        extent=(0, duration, 0, mel_db.shape[0]),
+        cmap="magma",
+    )
+    ax.set_xlabel("Time (seconds)")
+    ax.set_ylabel("Mel bin")
+    return img
@@ -0,0 +1,37 @@
+import importlib
+import threading
+
+from stt.registry import get_registry
+
+
+# ==========================
+# 🔥 Import nền các thư viện nặng
+# ==========================
+HEAVY_MODULES = ("torch", "whisper", "matplotlib.pyplot", "librosa")
+
+_thread = None
+_lock = threading.Lock()
+
+
+def prewarm(modules=HEAVY_MODULES, preload_models: bool = True):
+    """
+    Sau lần vẽ trang đầu tiên: import các thư viện nặng trong thread nền rồi
+    nạp sẵn model, một lần cho mỗi process. Trang nào cần module trước khi
+    thread xong chỉ phải chờ phần còn lại (import lock của Python).
+    """
+    global _thread
+
+    def run():
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                pass  # thiếu dependency thì báo lỗi ở trang dùng tới nó
+        if preload_models:
+            get_registry().preload(background=False)
+
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=run, name="stt-prewarm", daemon=True)
+            _thread.start()
+    return _thread